@@ -0,0 +1,191 @@
+# analytics.py
+import sys
+import numpy as np
+import pandas as pd
+
+'''
+백테스트 성과 지표 (배치)
+
+평가액 곡선은 (거래일 x 실행) 행렬, 청산 거래는 run_id 컬럼이 있는 테이블로 받아
+실행별 루프 없이 한 번에 계산한다. 스윕/몬테카를로 결과 순위 비교용.
+
+- 평가액 행렬: strategy_rules.run_batch(record_equity=True)['equity'] 또는 Parquet 일별 결과 pivot
+  (실행별 기간이 달라 생긴 앞/뒤 NaN 허용)
+- 수익률/변동성/MDD 등은 % 단위, 기간은 거래일 단위
+'''
+
+PERIODS_PER_YEAR = 252
+
+
+def _ffill(values):
+    """열별 forward fill (앞쪽 NaN은 유지)"""
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return values[idx, np.arange(values.shape[1])]
+
+
+def drawdown_stats(equity):
+    """MDD(%)와 최장 drawdown 기간(거래일) - 전고점 회복 전까지를 하나의 기간으로 본다
+
+    Args:
+        equity: (거래일 x 실행) 평가액
+    """
+    equity = _ffill(np.asarray(equity, dtype=np.float64))
+    peak = np.fmax.accumulate(equity, axis=0)
+    drawdown = (equity - peak) / peak * 100
+    underwater = drawdown < 0
+
+    # 마지막으로 전고점에 있던 날부터의 경과일 -> 최대값
+    idx = np.arange(len(equity))[:, None]
+    last_high = np.where(underwater, -1, idx)
+    np.maximum.accumulate(last_high, axis=0, out=last_high)
+    duration = np.where(underwater, idx - last_high, 0)
+    return np.nanmin(drawdown, axis=0), duration.max(axis=0)
+
+
+def equity_metrics(equity, initial_funds, names=None, periods_per_year=PERIODS_PER_YEAR, risk_free=0.0):
+    """평가액 곡선 지표 - 총수익률, CAGR, 변동성, Sharpe, Sortino, MDD, Calmar, 최장 drawdown 기간
+
+    Args:
+        equity: (거래일 x 실행) 일별 마감 평가액
+        initial_funds: 최초 자금 (스칼라 또는 실행별 배열) - 첫날 수익률 기준
+        risk_free: 연 무위험 수익률 (비율)
+
+    Returns:
+        DataFrame (실행별 1행)
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.ndim == 1:
+        equity = equity[:, None]
+    runs = equity.shape[1]
+    initial = np.broadcast_to(np.asarray(initial_funds, dtype=np.float64), (runs,))
+
+    filled = _ffill(equity)
+    days = (~np.isnan(equity)).sum(axis=0)
+    final = filled[-1]
+    curve = np.vstack([initial, equity])
+    returns = curve[1:] / _ffill(curve)[:-1] - 1 # 일별 수익률 (NaN 구간은 NaN)
+
+    excess = returns - risk_free / periods_per_year
+    mean = np.nanmean(excess, axis=0)
+    std = np.nanstd(returns, axis=0, ddof=1)
+    downside = np.sqrt(np.nanmean(np.minimum(excess, 0) ** 2, axis=0))
+    years = days / periods_per_year
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_return = (final / initial - 1) * 100
+        cagr = ((final / initial) ** (1 / years) - 1) * 100
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan)
+        sortino = np.where(downside > 0, mean / downside * np.sqrt(periods_per_year), np.nan)
+        mdd, dd_duration = drawdown_stats(equity)
+        calmar = np.where(mdd < 0, cagr / np.abs(mdd), np.nan)
+
+    return pd.DataFrame({
+        'days': days,
+        'total_return': total_return,
+        'cagr': cagr,
+        'volatility': std * np.sqrt(periods_per_year) * 100,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'mdd': mdd,
+        'max_dd_days': dd_duration,
+        'calmar': calmar,
+    }, index=names)
+
+
+def trade_metrics(trades, run_col='run_id'):
+    """청산 거래 통계 (trade_history / result_writer 형식) - groupby 한 번으로 실행별 집계
+
+    Returns:
+        DataFrame (run_id별) - trades, win_rate, avg_return, avg_win, avg_loss, profit_factor, avg_days, traded
+    """
+    returns = trades['수익률(%)']
+    buy_amount = trades['매수가'] * trades['매수수량']
+    sell_amount = trades['매도가'] * trades['매도수량']
+    frame = pd.DataFrame({
+        run_col: trades[run_col].to_numpy(),
+        'win': (returns > 0).to_numpy(),
+        'return': returns.to_numpy(),
+        'win_return': returns.where(returns > 0).to_numpy(),
+        'loss_return': returns.where(returns <= 0).to_numpy(),
+        'profit': (sell_amount - buy_amount).clip(lower=0).to_numpy(),
+        'loss': (buy_amount - sell_amount).clip(lower=0).to_numpy(),
+        'days': trades['보유기간'].to_numpy(),
+        'traded': (buy_amount + sell_amount).to_numpy(),
+    })
+    grouped = frame.groupby(run_col)
+    stats = grouped.agg(trades=('return', 'size'), wins=('win', 'sum'), avg_return=('return', 'mean'),
+                        avg_win=('win_return', 'mean'), avg_loss=('loss_return', 'mean'),
+                        gross_profit=('profit', 'sum'), gross_loss=('loss', 'sum'), avg_days=('days', 'mean'),
+                        traded=('traded', 'sum'))
+    stats['win_rate'] = stats['wins'] / stats['trades'] * 100
+    stats['profit_factor'] = stats['gross_profit'] / stats['gross_loss'].replace(0, np.nan)
+    return stats.drop(columns=['gross_profit', 'gross_loss'])
+
+
+def batch_metrics(result, names=None, periods_per_year=PERIODS_PER_YEAR, risk_free=0.0):
+    """strategy_rules.run_batch(record_equity=True) 결과 지표 - 노출도, 회전율, 수수료 비용 포함
+
+    회전율은 연간 체결금액 / 평균 평가액, 수수료 비용(fee_drag)은 연간 수수료 / 평균 평가액 (%)
+    """
+    equity = result['equity']
+    metrics = equity_metrics(equity, result['initial_funds'], names or result['names'], periods_per_year, risk_free)
+    days = metrics['days'].to_numpy()
+    mean_equity = np.nanmean(equity, axis=0)
+    years = days / periods_per_year
+    metrics['exposure'] = result['exposure_days'] / days * 100
+    metrics['turnover'] = result['traded'] / mean_equity / years
+    metrics['fee_drag'] = result['total_fee'] / mean_equity / years * 100
+    metrics['trades'] = result['trades']
+    metrics['win_rate'] = np.where(result['trades'] > 0, result['wins'] / np.maximum(result['trades'], 1) * 100,
+                                   np.nan)
+    return metrics
+
+
+def result_metrics(result_dir, run_ids=None, periods_per_year=PERIODS_PER_YEAR, risk_free=0.0):
+    """result_writer 결과 디렉토리의 실행별 지표 (평가액 + 청산 거래)
+
+    회전율은 청산 거래 기준, 수수료 비용은 일별 '총 수수료($)' 컬럼이 있는 엔진(침몰방지법)만 계산된다.
+    """
+    from result_writer import load_results, load_runs
+
+    runs = {run['run_id']: run for run in load_runs(result_dir) if run_ids is None or run['run_id'] in run_ids}
+    daily = load_results(result_dir, 'daily', run_ids, columns=['run_id', '날짜', '보유 주식 수', '총 평가액',
+                                                                '총 수수료($)'])
+    equity = daily.pivot(index='날짜', columns='run_id', values='총 평가액')
+    names = list(equity.columns)
+    initial = np.array([runs.get(name, {}).get('params', {}).get('initial_funds', np.nan) for name in names],
+                       dtype=np.float64)
+    # 초기 자금이 기록되지 않은 실행은 첫날 평가액 기준
+    first = _ffill(equity.to_numpy()[::-1])[-1]
+    initial = np.where(np.isnan(initial), first, initial)
+
+    metrics = equity_metrics(equity.to_numpy(), initial, names, periods_per_year, risk_free)
+    metrics.index.name = 'run_id'
+    exposure = daily.assign(exposed=daily['보유 주식 수'] > 0).groupby('run_id')['exposed'].mean() * 100
+    metrics['exposure'] = exposure.reindex(names)
+
+    mean_equity = equity.mean(axis=0)
+    years = metrics['days'] / periods_per_year
+    fees = daily.groupby('run_id')['총 수수료($)'].last()
+    metrics['fee_drag'] = fees.reindex(names) / mean_equity / years * 100
+
+    trades = load_results(result_dir, 'trades', run_ids)
+    if len(trades):
+        stats = trade_metrics(trades)
+        metrics = metrics.join(stats)
+        metrics['turnover'] = metrics['traded'] / mean_equity / years
+    return metrics
+
+
+if __name__ == "__main__":
+    # python analytics.py 결과디렉토리 [정렬 지표(기본 calmar)] [상위 N]  - 실행별 성과 지표 순위
+    result_dir = sys.argv[1]
+    sort_by = sys.argv[2] if len(sys.argv) > 2 else 'calmar'
+    top = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    metrics = result_metrics(result_dir)
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', None)
+    print(metrics.sort_values(sort_by, ascending=False).head(top).round(2))
@@ -0,0 +1,167 @@
+# api_metrics.py
+import json
+import os
+import sys
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+# 지연시간 히스토그램 버킷 상한 (ms)
+BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+METRICS_SUMMARY_PATH = 'logs/kis_api_metrics.json'
+METRICS_PROM_PATH = 'logs/kis_api_metrics.prom'
+ROLLING_DAYS = 30  # 요약 파일에 보관하는 일수
+
+
+def _new_entry():
+    return {
+        'count': 0,
+        'sum_ms': 0.0,
+        'buckets': [0] * len(BUCKETS_MS),
+        'status': {},
+        'rt_cd_failures': 0,
+        'retries': 0,
+        'network_errors': 0,
+    }
+
+
+def _merge_entry(dst, src):
+    dst['count'] += src['count']
+    dst['sum_ms'] += src['sum_ms']
+    dst['buckets'] = [a + b for a, b in zip(dst['buckets'], src['buckets'])]
+    for status, n in src['status'].items():
+        dst['status'][status] = dst['status'].get(status, 0) + n
+    dst['rt_cd_failures'] += src['rt_cd_failures']
+    dst['retries'] += src['retries']
+    dst['network_errors'] += src['network_errors']
+
+
+def _bucket_percentile(buckets, q):
+    """히스토그램 버킷으로 추정한 백분위수 상한 (ms)"""
+    total = sum(buckets)
+    if total == 0:
+        return 0.0
+    target = total * q
+    seen = 0
+    for bound, n in zip(BUCKETS_MS, buckets):
+        seen += n
+        if seen >= target:
+            return bound
+    return BUCKETS_MS[-1]
+
+
+class EndpointMetrics:
+    """TR_ID별 지연시간 히스토그램/상태코드/rt_cd 실패/재시도 집계"""
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def observe(self, tr_id, elapsed_ms, status=None, rt_cd=None, retry=False, network_error=False):
+        """요청 1건 기록 - 요청 경로에서는 정수 증가만 수행"""
+        entry = self.endpoints.get(tr_id)
+        if entry is None:
+            entry = self.endpoints[tr_id] = _new_entry()
+        entry['count'] += 1
+        entry['sum_ms'] += elapsed_ms
+        entry['buckets'][bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        if status is not None:
+            key = str(status)
+            entry['status'][key] = entry['status'].get(key, 0) + 1
+        if rt_cd is not None and rt_cd != '0':
+            entry['rt_cd_failures'] += 1
+        if retry:
+            entry['retries'] += 1
+        if network_error:
+            entry['network_errors'] += 1
+
+    def flush(self, summary_path=METRICS_SUMMARY_PATH, prom_path=METRICS_PROM_PATH, today=None):
+        """이번 실행 집계를 일자별 요약 파일에 병합하고 Prometheus 텍스트 파일 갱신"""
+        if not self.endpoints:
+            return
+        today = today or datetime.now().strftime('%Y-%m-%d')
+
+        summary = load_summary(summary_path)
+        day = summary['days'].setdefault(today, {})
+        for tr_id, entry in self.endpoints.items():
+            _merge_entry(day.setdefault(tr_id, _new_entry()), entry)
+
+        # 보관 기간 지난 날짜 제거
+        cutoff = (datetime.strptime(today, '%Y-%m-%d') - timedelta(days=ROLLING_DAYS - 1)).strftime('%Y-%m-%d')
+        summary['days'] = {d: v for d, v in summary['days'].items() if d >= cutoff}
+        summary['buckets_ms'] = [b if b != float('inf') else 'inf' for b in BUCKETS_MS]
+
+        os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1, sort_keys=True)
+
+        write_prometheus(rolling_totals(summary), prom_path)
+        self.endpoints = {}
+
+
+def load_summary(path=METRICS_SUMMARY_PATH):
+    """일자별 요약 파일 로드"""
+    if not os.path.exists(path):
+        return {'days': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rolling_totals(summary):
+    """보관 기간 전체 합계 {tr_id: entry}"""
+    totals = {}
+    for day in summary['days'].values():
+        for tr_id, entry in day.items():
+            _merge_entry(totals.setdefault(tr_id, _new_entry()), entry)
+    return totals
+
+
+def write_prometheus(totals, path=METRICS_PROM_PATH):
+    """Prometheus text exposition 형식으로 저장"""
+    lines = [
+        '# HELP kis_request_duration_seconds KIS API request latency by TR_ID',
+        '# TYPE kis_request_duration_seconds histogram',
+    ]
+    for tr_id, entry in sorted(totals.items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS_MS, entry['buckets']):
+            cumulative += n
+            le = '+Inf' if bound == float('inf') else f'{bound / 1000:g}'
+            lines.append(f'kis_request_duration_seconds_bucket{{tr_id="{tr_id}",le="{le}"}} {cumulative}')
+        lines.append(f'kis_request_duration_seconds_sum{{tr_id="{tr_id}"}} {entry["sum_ms"] / 1000:.6f}')
+        lines.append(f'kis_request_duration_seconds_count{{tr_id="{tr_id}"}} {entry["count"]}')
+
+    lines += ['# HELP kis_responses_total KIS API responses by HTTP status',
+              '# TYPE kis_responses_total counter']
+    for tr_id, entry in sorted(totals.items()):
+        for status, n in sorted(entry['status'].items()):
+            lines.append(f'kis_responses_total{{tr_id="{tr_id}",status="{status}"}} {n}')
+
+    for name, key, help_text in (
+            ('kis_rt_cd_failures_total', 'rt_cd_failures', 'Responses with rt_cd != 0'),
+            ('kis_retries_total', 'retries', 'Retried requests'),
+            ('kis_network_errors_total', 'network_errors', 'Requests failed at the network layer')):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for tr_id, entry in sorted(totals.items()):
+            lines.append(f'{name}{{tr_id="{tr_id}"}} {entry[key]}')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+if __name__ == "__main__":
+    # python api_metrics.py [요약파일]  - TR_ID별 최근 30일 요약 출력
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_SUMMARY_PATH
+    summary = load_summary(path)
+    totals = rolling_totals(summary)
+
+    print('=' * 80)
+    print(f"KIS API TR_ID별 요약 ({len(summary['days'])}일)")
+    print('=' * 80)
+    print(f"{'TR_ID':<16}{'count':>7}{'avg(ms)':>10}{'p50<=':>9}{'p95<=':>9}{'rt_fail':>9}{'retry':>7}{'net_err':>9}  status")
+    for tr_id, entry in sorted(totals.items()):
+        avg = entry['sum_ms'] / entry['count'] if entry['count'] else 0
+        status = ', '.join(f'{k}:{v}' for k, v in sorted(entry['status'].items()))
+        print(f"{tr_id:<16}{entry['count']:>7}{avg:>10.1f}"
+              f"{_bucket_percentile(entry['buckets'], 0.5):>9g}{_bucket_percentile(entry['buckets'], 0.95):>9g}"
+              f"{entry['rt_cd_failures']:>9}{entry['retries']:>7}{entry['network_errors']:>9}  {status}")
@@ -1,137 +1,25 @@
 import pandas as pd
 from datetime import datetime, timedelta
-from utils import get_data, round_half_up_to_two,  calculate_mdd
+from utils import get_data, data_version
+from strategies import InfiniteBuy
+from streaming import ListSink, TeeSink, iter_frame, run_strategies
 from IPython.display import display
 
-# 떨사오팔 매매 로직
+# 떨사오팔 매매 로직 (strategies.InfiniteBuy)
 
-def infinite_buy_simulation(df, df_res, initial_funds, buy_portion, start_idx, simulation_period,fee,welfare):
-    funds = initial_funds # 초기 자금
-    one_buy_amount = initial_funds / buy_portion # 회차별 매수금액
-    holdings = 0 # 보유 주식 수
-    buy_records = []  # 각 매수 건을 저장하여 관리 (개별 매도 관리)
-    trade_history = []  # 매도 기록 저장
-    trade_id = 1  # 매수 회차별 ID (매수 구분)
-    fee = (fee/100) # 수수료
+def infinite_buy_simulation(df, df_res, initial_funds, buy_portion, start_idx, simulation_period,fee,welfare, writer=None):
+    """
+    Args:
+        df_res: 사용하지 않음 (호환용, 결과 DataFrame은 새로 생성)
+        writer: 일별 현황/청산 거래를 함께 기록할 sink (result_writer.ResultWriter)
+    """
+    collected = ListSink()
+    strategy = InfiniteBuy(TeeSink(collected, writer), initial_funds, buy_portion, fee, welfare)
+    summary = run_strategies(iter_frame(df, start_idx, start_idx + simulation_period), [strategy],
+                             start_date=df.index[start_idx])[0]
 
-    # 날짜별 거래기록 데이터 프레임
-    df_res = pd.DataFrame(index=range(start_idx, start_idx + simulation_period + 1),
-                         columns=['날짜', '시가', '고가', '종가', '등락율',
-                                'LOC 매수', '수익 실현 매도', 'MOC 손절',
-                                '보유 주식 수', '예수금', '총 평가액', '수익율(%)'])
-
-    # 시작일 - 종료일 시뮬레이션 진행
-    for i in range(start_idx, start_idx + simulation_period + 1):
-        # 데이터 시리즈로 가져오기
-        current_date = df.index[i]
-        open_price = float(df['Open'].iloc[i]) #시가
-        high_price = float(df['High'].iloc[i]) #고가
-        close_price = float(df['Close'].iloc[i]) #종가
-        return_val = float(df['Return'].iloc[i]) #등락율
-        prev_price = float(df['Close'].iloc[i-1]) if i > 0 else close_price #전날 종가
-
-        # 오늘 데이터
-        df_res.at[i, '날짜'] = current_date
-        df_res.at[i, '시가'] = open_price
-        df_res.at[i, '고가'] = high_price
-        df_res.at[i, '종가'] = close_price
-        df_res.at[i, '등락율'] = f"{round_half_up_to_two(return_val)}%"
-
-        # 당일 종가
-        price = close_price
-
-        # 매수/매도 칼럼 초기화
-        df_res.at[i, 'LOC 매수'] = 0
-        df_res.at[i, '수익 실현 매도'] = 0
-        df_res.at[i, 'MOC 손절'] = 0
-
-        # 복리 투자 시
-        T = len(buy_records)
-        one_buy_welfare = funds / (buy_portion-T) if buy_portion>T else 0 # 복리투자 1회차 금액
-
-        # 매도 로직
-        if holdings > 0:
-            new_buy_records = []  # 매도되지 않은 매수 건을 저장할 새 리스트
-            total_sell = 0  # 당일 총 매도 수량
-
-            for record in buy_records: # 보유 주식 순회
-                record['days'] += 1  # 보유일 count
-                # 각 매수 건별 매도 목표가
-                #sell_price = record['buy_price'] * 1.005 # 한국투자증권 온라인 수수료 * 2
-                sell_price = record['buy_price'] * (1+fee*2)  # 백테스트 기준 0.044% * 2
-
-                if price >= sell_price:  # 수익 실현 매도 조건 충족
-                    funds += record['quantity'] * price
-                    funds -= (record['quantity'] * price)*fee # 수수료 차감
-                    total_sell += record['quantity']
-                    holdings -= record['quantity']
-                    # 거래 기록 저장
-                    trade_history.append({
-                        '회차': record['id'],
-                        '매수일': record['buy_date'],
-                        '매수가': record['buy_price'],
-                        '매수수량': record['quantity'],
-                        '매도일': current_date,
-                        '매도가': price,
-                        '매도수량': record['quantity'],
-                        '보유기간': record['days'],
-                        '수익률(%)': round_half_up_to_two((price/record['buy_price'] - 1) * 100)
-                    })
-                elif record['days'] >= 39:  # 40일 경과 시 손절
-                    funds += record['quantity'] * price
-                    funds -= (record['quantity'] * price)*fee # 수수료 차감
-                    df_res.at[i, 'MOC 손절'] = record['quantity']
-                    holdings -= record['quantity']
-                    # 손절 거래 기록 저장
-                    trade_history.append({
-                        '회차': record['id'],
-                        '매수일': record['buy_date'],
-                        '매수가': record['buy_price'],
-                        '매수수량': record['quantity'],
-                        '매도일': current_date,
-                        '매도가': price,
-                        '매도수량': record['quantity'],
-                        '보유기간': record['days'],
-                        '수익률(%)': (price/record['buy_price'] - 1) * 100
-                    })
-                else:
-                    new_buy_records.append(record)
-
-            if total_sell > 0:
-                df_res.at[i, '수익 실현 매도'] = total_sell
-
-            buy_records = new_buy_records
-
-        # 매수 로직
-        if price <= prev_price: # 전날 종가 LOC 매수
-            if welfare: # 복리 적용
-                qty = int(one_buy_welfare / prev_price)
-            else: # 단리 적용
-                qty = int(one_buy_amount / prev_price)
-            if T<buy_portion: # 수수료 적용한 금액이상이 남아있을때 매수
-                holdings += qty
-                funds -= (qty * price) * (1+fee) # 수수료 차감
-                buy_records.append({
-                    'id': trade_id,
-                    'buy_date': current_date,
-                    'buy_price': price,
-                    'quantity': qty,
-                    'days': 0,
-                    'type': 'LOC 매수'
-                })
-                df_res.at[i, 'LOC 매수'] = qty
-                trade_id += 1
-
-        # 포트폴리오 상태 저장
-        df_res.at[i, '보유 주식 수'] = holdings
-        df_res.at[i, '예수금'] = funds
-        df_res.at[i, '총 평가액'] = funds + (price * holdings)
-        df_res.at[i, '수익율(%)'] = ((funds + (price * holdings)) / initial_funds - 1) * 100
-        df_res.at[i, 'MDD'] = calculate_mdd(df_res['총 평가액'])
-
-    final_value = funds + (holdings * float(df['Close'].iloc[start_idx + simulation_period]))
-    final_mdd = calculate_mdd(df_res['총 평가액'])
-    return round_half_up_to_two((final_value / initial_funds - 1) * 100), df_res, final_value, pd.DataFrame(trade_history), final_mdd
+    df_res = pd.DataFrame(collected.daily, index=range(start_idx, start_idx + simulation_period + 1))
+    return summary['return_rate'], df_res, summary['final_value'], pd.DataFrame(collected.trades), summary['mdd']
 
 
 if __name__ == "__main__":
@@ -162,9 +50,14 @@ if __name__ == "__main__":
     df_res = pd.DataFrame(columns=['날짜', '시가', '고가', '종가', '등락율', 'LOC 매수', '수익 실현 매도', 'MOC 손절',
                                   '보유 주식 수', '예수금', '총 평가액', '수익율(%)', 'MDD'])
 
-    # 시뮬레이션 실행
-    return_rate, df_res, final_value, df_trades , mdd= infinite_buy_simulation(
-        df, df_res, initial_funds, buy_portion, df_length, len(df)-1-df_length,fee, welfare)
+    # 시뮬레이션 실행 (결과는 results/{종목}/ 에 Parquet으로 누적 기록)
+    from result_writer import ResultWriter
+    params = {'strategy': 'infinite_buy', 'symbol': stock_item, 'start_date': start_date, 'end_date': end_date,
+              'initial_funds': initial_funds, 'buy_portion': buy_portion, 'fee': fee, 'welfare': welfare}
+    with ResultWriter(f'results/{stock_item}', params=params,
+                      data_version=data_version(stock_item, start_date_before_30, end_day_next)) as writer:
+        return_rate, df_res, final_value, df_trades , mdd= infinite_buy_simulation(
+            df, df_res, initial_funds, buy_portion, df_length, len(df)-1-df_length,fee, welfare, writer=writer)
 
 
     # 매매 통계 출력
@@ -200,4 +93,4 @@ if __name__ == "__main__":
         '총 평가액': '{:.2f}'
     }).set_properties(**{'text-align': 'center'})
     
-    df_res.to_csv(f'{start_date}_{end_date}_v2.csv', index=False, encoding='utf-8')
\ No newline at end of file
+    print(f"결과 저장: results/{stock_item}/daily/{writer.run_id}.parquet")
\ No newline at end of file
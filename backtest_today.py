@@ -1,100 +1,153 @@
 from utils import get_data, load_config
 from datetime import timedelta, datetime
+from money import to_cents, to_dollars, fee_ppm, fee_cents, sell_target_cents, buy_qty
 
+# 금액은 모두 정수 센트, 수수료는 ppm (money.py 반올림 규칙)
 
-# 떨사오팔 실시간
-def infinite_buy_today(df, initial_funds, buy_portion, start_idx, simulation_period,fee,welfare):
-    funds = initial_funds # 초기 자금
-    one_buy_amount = initial_funds / buy_portion # 회차별 매수금액
-    holdings = 0 # 보유 주식 수
-    buy_records = []  # 각 매수 건을 저장하여 관리 (개별 매도 관리)
-    trade_id = 1  # 매수 회차별 ID (매수 구분)
-    fee = (fee/100) # 수수료
 
+def new_state(initial_funds):
+    """시뮬레이션 시작 상태 (initial_funds는 달러)"""
+    return {
+        'funds': to_cents(initial_funds),  # 예수금 (센트)
+        'holdings': 0,  # 보유 주식 수
+        'buy_records': [],  # 각 매수 건을 저장하여 관리 (개별 매도 관리, buy_price는 센트)
+        'trade_id': 1,  # 매수 회차별 ID (매수 구분)
+    }
 
-    # 시작일 - 종료일 시뮬레이션 진행
-    for i in range(start_idx, start_idx + simulation_period+1 ):
-        # 데이터 시리즈로 가져오기
-        current_date = df.index[i]
-        close_price = float(df['Close'].iloc[i]) #종가
-        prev_price = float(df['Close'].iloc[i-1]) if i > 0 else close_price #전날 종가
-
-        # 당일 종가
-        price = close_price
-
-        # 복리 투자 시
-        T = len(buy_records)
-        one_buy_welfare = funds / (buy_portion-T) if buy_portion>T else funds # 복리투자 1회차 금액
-
-
-        # 매도 로직
-        if holdings > 0:
-            new_buy_records = []  # 매도되지 않은 매수 건을 저장할 새 리스트
-            total_sell = 0  # 당일 총 매도 수량
-
-            for record in buy_records: # 보유 주식 순회
-                record['days'] += 1  # 보유일 count
-                # 각 매수 건별 매도 목표가
-                sell_price = record['buy_price'] * (1+fee*2)  # 백테스트 기준 0.044% * 2
-
-                if price >= sell_price:  # 수익 실현 매도 조건 충족
-                    funds += record['quantity'] * price
-                    funds -= (record['quantity'] * price)*fee # 수수료 차감
-                    total_sell += record['quantity']
-                    holdings -= record['quantity']
-                elif record['days'] >= 40:  # 40일 경과 시 손절
-                    funds += record['quantity'] * price
-                    funds -= (record['quantity'] * price)*fee # 수수료 차감
-                    holdings -= record['quantity']
-                else:
-                    new_buy_records.append(record)
-
-
-            buy_records = new_buy_records
-
-        # 매수 로직
-        if price <= prev_price: # 전날 종가 LOC 매수
-            if welfare: # 복리 적용
-                qty = int(one_buy_welfare / prev_price)
-            else: # 단리 적용
-                qty = int(one_buy_amount / prev_price)
-            if funds >= (qty * price) * (1+fee): # 수수료 적용한 금액이상이 남아있을때 매수
-                holdings += qty
-                funds -= (qty * price) * (1+fee) # 수수료 차감
-                buy_records.append({
-                    'id': trade_id,
-                    'buy_date': current_date,
-                    'buy_price': price,
-                    'quantity': qty,
-                    'days': 1,
-                    'type': 'LOC 매수'
-                })
-                trade_id += 1
-    # 복리 투자 시
+
+def buy_quantity(funds, T, prev_price, initial_funds, buy_portion, welfare):
+    """LOC 매수 수량 - 복리: 예수금/(분할수-T), 단리: 초기자금/분할수 (센트)"""
+    if welfare:
+        return buy_qty(funds, prev_price * (buy_portion-T)) if buy_portion>T else buy_qty(funds, prev_price)
+    return buy_qty(initial_funds, prev_price * buy_portion)
+
+
+# 떨사오팔 하루 진행 (가격/예수금/초기자금은 센트, fee는 ppm)
+def infinite_buy_step(state, current_date, price, prev_price, initial_funds, buy_portion, fee, welfare,
+                      trade_history=None, events=None):
+    """
+    Args:
+        events: 거래 이벤트를 추가할 리스트 (선택, journal.py 형식 - 종가(mark), 매수, 매도(sell/stop))
+    """
+    funds = state['funds']
+    holdings = state['holdings']
+    buy_records = state['buy_records']
+
+    # 매수 수량은 전날 기준 (매도 전 예수금/T)
     T = len(buy_records)
-    one_buy_welfare = funds / (buy_portion-T) if buy_portion>T else funds # 복리투자 1회차 금액
+    qty = buy_quantity(funds, T, prev_price, initial_funds, buy_portion, welfare)
+    if events is not None:
+        events.append({'date': current_date, 'type': 'mark', 'price': price})
+
+    # 매도 로직
+    if holdings > 0:
+        new_buy_records = []  # 매도되지 않은 매수 건을 저장할 새 리스트
+
+        for record in buy_records: # 보유 주식 순회
+            record['days'] += 1  # 보유일 count
+            # 각 매수 건별 매도 목표가 (왕복 수수료 이상인 첫 호가)
+            if price >= sell_target_cents(record['buy_price'], fee):  # 수익 실현 매도 조건 충족
+                sell_type = 'LOC'
+            elif record['days'] >= 40:  # 40일 경과 시 손절
+                sell_type = 'MOC'
+            else:
+                new_buy_records.append(record)
+                continue
+
+            amount = record['quantity'] * price
+            sell_fee = fee_cents(amount, fee)
+            funds += amount - sell_fee # 수수료 차감
+            holdings -= record['quantity']
+            if trade_history is not None:
+                trade_history.append(dict(record, sell_date=current_date, sell_price=price, sell_type=sell_type))
+            if events is not None:
+                events.append({'date': current_date, 'type': 'sell' if sell_type == 'LOC' else 'stop',
+                               'lot_id': record['id'], 'price': price, 'quantity': record['quantity'],
+                               'amount': amount, 'fee': sell_fee})
+
+        buy_records = new_buy_records
+
+    # 매수 로직
+    if price <= prev_price: # 전날 종가 LOC 매수
+        amount = qty * price
+        cost = amount + fee_cents(amount, fee)
+        if funds >= cost: # 수수료 적용한 금액이상이 남아있을때 매수
+            holdings += qty
+            funds -= cost
+            buy_records.append({
+                'id': state['trade_id'],
+                'buy_date': current_date,
+                'buy_price': price,
+                'quantity': qty,
+                'days': 1,
+                'type': 'LOC 매수'
+            })
+            if events is not None:
+                events.append({'date': current_date, 'type': 'buy', 'lot_id': state['trade_id'], 'price': price,
+                               'quantity': qty, 'amount': amount, 'fee': cost - amount})
+            state['trade_id'] += 1
+
+    state['funds'] = funds
+    state['holdings'] = holdings
+    state['buy_records'] = buy_records
+    return state
+
+
+# 다음 거래일 주문 생성 (센트/ppm 입력, 주문 가격은 달러)
+def build_orders(state, last_close, initial_funds, buy_portion, fee, welfare):
+    T = len(state['buy_records'])
 
     #매수주문
-    buyToday= float(df['Close'].iloc[-1]) # 전일종가
-    buyQty= int(one_buy_welfare / buyToday) if welfare else int(one_buy_amount / buyToday)
+    buyToday= to_dollars(last_close) # 전일종가
+    buyQty= buy_quantity(state['funds'], T, last_close, initial_funds, buy_portion, welfare)
 
     #매도주문
     sellToday=[]
-    for record in buy_records: # 보유 주식 순회
+    for record in state['buy_records']: # 보유 주식 순회
         if record['days']<39:
-          sell_price = record['buy_price'] * (1+fee*2)
-          sell_qty = record['quantity']
-          sell_type = "LOC"
-          sellToday.append((sell_type,sell_price, sell_qty))
+          sellToday.append(("LOC", to_dollars(sell_target_cents(record['buy_price'], fee)), record['quantity']))
         else:
-          sell_price = 0
-          sell_qty = record['quantity']
-          sell_type = "MOC"
-          sellToday.append((sell_type,sell_price, sell_qty))
+          sellToday.append(("MOC", 0, record['quantity']))
+    return buyToday, buyQty, sellToday
+
+
+# 떨사오팔 실시간
+def infinite_buy_today(df, initial_funds, buy_portion, start_idx, simulation_period,fee,welfare,
+                       state=None, trade_history=None, snapshots=None, events=None):
+    """
+    Args:
+        initial_funds: 초기 자금 ($)
+        fee: 수수료(%)
+        state: 이어서 진행할 상태 (센트 단위, None이면 초기 자금부터 시작, 전달 시 진행 결과로 갱신됨)
+        trade_history: 청산된 매수 건을 추가할 리스트 (선택, 가격은 센트)
+        snapshots: 일별 (날짜, 종가, 예수금, 보유 주식 수, 보유 회차 수, 다음 회차 ID)를 추가할 리스트 (선택, 달러)
+        events: 거래 이벤트를 추가할 리스트 (선택, infinite_buy_step 참고)
+
+    Returns:
+        (매수가, 매수 수량, 예수금, 보유 주식 수, 보유 회차, 매도 주문) - 금액은 달러
+    """
+    if state is None:
+        state = new_state(initial_funds)
+    initial_cents = to_cents(initial_funds)
+    fee = fee_ppm(fee) # 수수료 (ppm)
+    closes = [to_cents(float(close)) for close in df['Close']]
+
+    # 시작일 - 종료일 시뮬레이션 진행
+    for i in range(start_idx, start_idx + simulation_period+1 ):
+        current_date = df.index[i]
+        close_price = closes[i] #종가
+        prev_price = closes[i-1] if i > 0 else close_price #전날 종가
+
+        infinite_buy_step(state, current_date, close_price, prev_price, initial_cents, buy_portion, fee, welfare,
+                          trade_history, events)
+        if snapshots is not None:
+            snapshots.append((current_date, to_dollars(close_price), to_dollars(state['funds']), state['holdings'],
+                              len(state['buy_records']), state['trade_id']))
 
+    buyToday, buyQty, sellToday = build_orders(state, closes[-1], initial_cents, buy_portion, fee, welfare)
+    buy_records = [dict(record, buy_price=to_dollars(record['buy_price'])) for record in state['buy_records']]
 
-    #final_value = funds + (holdings * float(df['Close'].iloc[start_idx + simulation_period])) # 평가액
-    return buyToday, buyQty, funds, holdings, buy_records, sellToday
+    return buyToday, buyQty, to_dollars(state['funds']), state['holdings'], buy_records, sellToday
 
 
 
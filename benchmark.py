@@ -0,0 +1,290 @@
+# benchmark.py
+import glob
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import yaml
+from synthetic_data import bulk_load, make_symbols
+from utils import get_data
+
+RESULT_DIR = 'logs/benchmark'
+REGRESSION_THRESHOLD = 0.20  # 이전 실행 대비 중앙값 20% 이상 느려지면 회귀
+END_DATE = '2025-12-31'
+INITIAL_FUNDS = 10000
+BUY_PORTION = 7
+FEE = 0.25
+START_OFFSET = 20  # 시뮬레이션 시작 인덱스 (전날 종가/등락율 확보용)
+
+
+def date_range(years):
+    """END_DATE로 끝나는 years년 구간 (시작일, 종료일)"""
+    end = pd.Timestamp(END_DATE)
+    return end - pd.DateOffset(years=years) + pd.Timedelta(days=1), end
+
+
+# ---------------------------------------------------------------- 스텁 KIS 서버
+class StubKISHandler(BaseHTTPRequestHandler):
+    """토큰/주문/조회에 항상 성공 응답하는 로컬 KIS 서버"""
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.startswith('/oauth2/tokenP'):
+            self._reply({'access_token': 'bench', 'expires_in': 86400})
+        elif self.path.startswith('/oauth2/Approval'):
+            self._reply({'approval_key': 'bench'})
+        else:
+            self._reply({'rt_cd': '0', 'msg1': 'OK', 'output': {'ODNO': '0000000001'}})
+
+    def do_GET(self):
+        self._reply({'rt_cd': '0', 'msg1': 'OK', 'output': [], 'output2': []})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubKISHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------------------------------------------------------------- 측정
+def measure(fn, repeat):
+    """fn을 repeat번 실행한 소요시간(ms) 통계"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return {'runs': repeat, 'min_ms': round(min(times), 3), 'median_ms': round(statistics.median(times), 3)}
+
+
+def bench_engines(df, repeat, db_path, symbol):
+    from backtest_all import infinite_buy_simulation
+    from backtest_today import infinite_buy_today
+    from streaming import SummarySink, iter_prices, stream_infinite_buy
+    from 침몰방지법 import prevent_drown_down_simulation
+
+    period = len(df) - 1 - START_OFFSET
+    return {
+        'infinite_buy_simulation': measure(lambda: infinite_buy_simulation(
+            df, pd.DataFrame(), INITIAL_FUNDS, BUY_PORTION, START_OFFSET, period, FEE, True), repeat),
+        'infinite_buy_today': measure(lambda: infinite_buy_today(
+            df, INITIAL_FUNDS, BUY_PORTION, START_OFFSET, period, FEE, True), repeat),
+        'prevent_drown_down_simulation': measure(lambda: prevent_drown_down_simulation(
+            df, pd.DataFrame(), INITIAL_FUNDS, BUY_PORTION, START_OFFSET, period, True, FEE), repeat),
+        'stream_infinite_buy': measure(lambda: stream_infinite_buy(
+            iter_prices(symbol, '1900-01-01', END_DATE, db_path=db_path), SummarySink(), INITIAL_FUNDS,
+            BUY_PORTION, FEE, True, start_date=df.index[START_OFFSET]), repeat),
+    }
+
+
+def bench_db(workdir, years, symbols, df, repeat):
+    from backtest_today import infinite_buy_today, new_state
+    from ledger import Ledger
+
+    def insert_prices():
+        path = os.path.join(workdir, 'insert.db')
+        if os.path.exists(path):
+            os.remove(path)
+        bulk_load(path, len(symbols), *date_range(years))
+
+    db_path = os.path.join(workdir, 'data', 'trading.db')
+
+    def load_all():
+        for symbol in symbols:
+            get_data(symbol, '1900-01-01', END_DATE, db_path=db_path)
+
+    state, trade_history, snapshots = new_state(INITIAL_FUNDS), [], []
+    infinite_buy_today(df, INITIAL_FUNDS, BUY_PORTION, START_OFFSET, len(df) - 1 - START_OFFSET, FEE, True,
+                       state=state, trade_history=trade_history, snapshots=snapshots)
+
+    def save_ledger():
+        ledger = Ledger(db_path)
+        try:
+            ledger.reset('bench', symbols[0])
+            ledger.save('bench', symbols[0], state, trade_history, snapshots, 'bench')
+        finally:
+            ledger.close()
+
+    return {
+        'get_data': measure(lambda: get_data(symbols[0], '1900-01-01', END_DATE, db_path=db_path), repeat),
+        'get_data_all_symbols': measure(load_all, 1 if len(symbols) > 50 else repeat),
+        'db_insert_prices': measure(insert_prices, 1),
+        'ledger_save': measure(save_ledger, repeat),
+    }
+
+
+def bench_morning(workdir, symbol, start_date, repeat):
+    """스텁 KIS 서버 상대로 live 모드 morning task 전체 (원장 없음 / 원장 재개)"""
+    from daily_run import DailyTrader
+    from ledger import Ledger
+
+    server = start_stub_server()
+    prev_cwd, prev_url = os.getcwd(), os.environ.get('KIS_BASE_URL')
+    prev_rps = os.environ.get('KIS_MAX_RPS')
+    os.environ['KIS_BASE_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    os.environ['KIS_MAX_RPS'] = '1000'  # 스텁 서버는 요청 수 제한 없음
+    os.chdir(workdir)
+    try:
+        with open('config.yaml', 'w', encoding='utf-8') as f:
+            yaml.safe_dump({'trading': {'symbol': symbol, 'initial_funds': INITIAL_FUNDS,
+                                        'buy_portion': BUY_PORTION, 'fee_rate': FEE, 'welfare': True,
+                                        'start_date': start_date}}, f)
+
+        trader = DailyTrader(mode='live')
+        logging.getLogger().setLevel(logging.WARNING)
+        session = trader.calendar.next_session(datetime.strptime(END_DATE, '%Y-%m-%d').date())
+        trader.get_us_date = lambda: session
+
+        def clear_ledger():
+            ledger = Ledger()
+            try:
+                ledger.reset('live', symbol)
+                with ledger.conn:
+                    ledger.conn.execute("DELETE FROM order_plans WHERE mode = 'live'")
+            finally:
+                ledger.close()
+
+        def cold():
+            clear_ledger()
+            trader.price_cache.clear()
+            trader.run_morning_task()
+
+        results = {'morning_pipeline_cold': measure(cold, repeat)}
+        results['morning_pipeline_resume'] = measure(trader.run_morning_task, repeat)
+        return results
+    finally:
+        os.chdir(prev_cwd)
+        if prev_url is None:
+            os.environ.pop('KIS_BASE_URL', None)
+        else:
+            os.environ['KIS_BASE_URL'] = prev_url
+        if prev_rps is None:
+            os.environ.pop('KIS_MAX_RPS', None)
+        else:
+            os.environ['KIS_MAX_RPS'] = prev_rps
+        server.shutdown()
+
+
+def run_benchmarks(years, num_symbols, repeat):
+    workdir = tempfile.mkdtemp(prefix='ddulsaopal_bench_')
+    try:
+        os.makedirs(os.path.join(workdir, 'data'))
+        if os.path.exists('data/nyse_calendar.json'):
+            shutil.copy('data/nyse_calendar.json', os.path.join(workdir, 'data'))
+
+        t0 = time.perf_counter()
+        rows = bulk_load(os.path.join(workdir, 'data', 'trading.db'), num_symbols, *date_range(years))
+        logging.info(f"Synthetic data: {rows:,} rows in {time.perf_counter() - t0:.1f}s")
+
+        symbols = make_symbols(num_symbols)
+        df = get_data(symbols[0], '1900-01-01', END_DATE, db_path=os.path.join(workdir, 'data', 'trading.db'))
+        start_date = str(df.index[START_OFFSET])
+
+        results = {}
+        results.update(bench_engines(df, repeat, os.path.join(workdir, 'data', 'trading.db'), symbols[0]))
+        results.update(bench_db(workdir, years, symbols, df, repeat))
+        results.update(bench_morning(workdir, symbols[0], start_date, repeat))
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------- 결과 저장/비교
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous(params, result_dir=RESULT_DIR):
+    """같은 파라미터로 실행한 가장 최근 결과"""
+    for path in sorted(glob.glob(os.path.join(result_dir, '*.json')), reverse=True):
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if report.get('params') == params:
+            return report
+    return None
+
+
+def compare(results, previous, threshold=REGRESSION_THRESHOLD):
+    """[(이름, 현재 중앙값, 이전 중앙값 또는 None, 변화율 또는 None, 회귀 여부)]"""
+    rows = []
+    prev_results = previous['results'] if previous else {}
+    for name, stats in results.items():
+        prev = prev_results.get(name)
+        if prev is None or not prev['median_ms']:
+            rows.append((name, stats['median_ms'], None, None, False))
+            continue
+        change = stats['median_ms'] / prev['median_ms'] - 1
+        rows.append((name, stats['median_ms'], prev['median_ms'], change, change > threshold))
+    return rows
+
+
+def save_report(params, results, result_dir=RESULT_DIR):
+    os.makedirs(result_dir, exist_ok=True)
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'params': params,
+        'results': results,
+    }
+    path = os.path.join(result_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    # python benchmark.py [연수(1-30)] [종목 수(1-500)] [반복 횟수]  - 회귀 발견 시 exit code 1
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    num_symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    if not (1 <= years <= 30 and 1 <= num_symbols <= 500):
+        print("연수는 1-30, 종목 수는 1-500 범위여야 합니다.")
+        sys.exit(2)
+
+    params = {'years': years, 'symbols': num_symbols, 'repeat': repeat}
+    previous = load_previous(params)
+    results = run_benchmarks(years, num_symbols, repeat)
+    path = save_report(params, results)
+
+    print('\n' + '='*80)
+    print(f"Benchmark ({years}년 x {num_symbols}종목, {repeat}회 반복) -> {path}")
+    if previous:
+        print(f"비교 기준: {previous['created_at']} (commit {previous.get('git_commit')})")
+    print('='*80)
+    regressions = 0
+    for name, median, prev, change, regressed in compare(results, previous):
+        line = f"{name:<32} {median:>12,.2f} ms"
+        if prev is not None:
+            line += f"   이전 {prev:>12,.2f} ms  {change * 100:+7.1f}%"
+        if regressed:
+            line += "  << REGRESSION"
+            regressions += 1
+        print(line)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,107 @@
+# daemon.py
+import asyncio
+import logging
+import signal
+import sys
+from datetime import datetime, timedelta
+from daily_run import DailyTrader
+from market_calendar import ET, KST, load_calendar
+
+# 기본값: 겨울(EST) 기준 기존 cron과 같은 시각 (개장+60분 = 00:30 KST, 마감+240분 = 10:00 KST)
+DEFAULT_MORNING_OFFSET_MINUTES = 60   # 개장 후 주문 제출까지
+DEFAULT_EVENING_OFFSET_MINUTES = 240  # 마감 후 종가 업데이트까지
+MAX_SLEEP_SECONDS = 60  # 시스템 절전/시계 변경에 대비해 주기적으로 다시 계산
+
+
+class TradingDaemon:
+    """DailyTrader를 상주시키고 NYSE 세션 시각 기준으로 morning/evening 작업 실행
+
+    캘린더, 토큰, 가격 캐시, 원장 연결 정보가 메모리에 유지되므로
+    작업 시작 시 import/캘린더 생성/토큰 로드 비용이 없다.
+    """
+
+    def __init__(self, mode='dry-run', config_path='config.yaml'):
+        self.trader = DailyTrader(config_path=config_path, mode=mode)
+        daemon_config = self.trader.config.get('daemon', {})
+        self.morning_offset = timedelta(minutes=daemon_config.get('morning_offset_minutes',
+                                                                  DEFAULT_MORNING_OFFSET_MINUTES))
+        self.evening_offset = timedelta(minutes=daemon_config.get('evening_offset_minutes',
+                                                                  DEFAULT_EVENING_OFFSET_MINUTES))
+        self.stopping = asyncio.Event()
+
+    def next_job(self, now=None):
+        """다음 실행할 (작업명, 실행시각 KST, 세션일)"""
+        now = now or datetime.now(KST)
+        calendar = self.trader.calendar
+        session = calendar.previous_session(now.astimezone(ET).date(), inclusive=True)
+
+        while session is not None:
+            jobs = [
+                ('morning', calendar.session_open(session, KST) + self.morning_offset),
+                ('evening', calendar.session_close(session, KST) + self.evening_offset),
+            ]
+            for name, run_at in jobs:
+                if run_at > now:
+                    return name, run_at, session
+            session = calendar.next_session(session)
+        return None
+
+    def run_job(self, name):
+        """작업 실행 (executor 스레드) - 날짜별 로그 파일/경로 갱신 후 실행"""
+        trader = self.trader
+        trader.setup_directories()
+        trader.setup_logging()
+
+        # 캘린더 커버 기간이 짧아지면 재생성
+        if trader.calendar.is_stale():
+            trader.calendar = load_calendar()
+
+        if name == 'morning':
+            trader.run_morning_task()
+        else:
+            trader.run_evening_task()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except NotImplementedError:  # Windows
+                pass
+
+        logging.info(f"Daemon started (mode: {self.trader.mode.upper()})")
+        while not self.stopping.is_set():
+            job = self.next_job()
+            if job is None:
+                logging.error("No upcoming session in calendar - regenerating")
+                self.trader.calendar = load_calendar(today=datetime.now(ET).date() + timedelta(days=365))
+                continue
+
+            name, run_at, session = job
+            logging.info(f"Next job: {name} for session {session} at {run_at.strftime('%Y-%m-%d %H:%M:%S')} KST")
+
+            # 실행 시각까지 대기 (최대 MAX_SLEEP_SECONDS 단위로 재확인)
+            while not self.stopping.is_set():
+                remaining = (run_at - datetime.now(KST)).total_seconds()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=min(remaining, MAX_SLEEP_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+            if self.stopping.is_set():
+                break
+
+            try:
+                await loop.run_in_executor(None, self.run_job, name)
+            except Exception as e:
+                logging.error(f"Daemon job {name} failed: {e}", exc_info=True)
+
+        logging.info("Daemon stopped")
+
+
+if __name__ == "__main__":
+    # python daemon.py [dry-run|live]  - 상주 실행 (cron 대신)
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
+    daemon = TradingDaemon(mode=mode)
+    asyncio.run(daemon.run())
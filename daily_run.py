@@ -2,29 +2,46 @@
 import sqlite3
 import pandas as pd
 import yaml
-import pickle
 import os
 import logging
 from datetime import datetime, timedelta
-import pandas_market_calendars as mcal
-from pytz import timezone
+from pytz import timezone, utc
 from kis_api import KISApi
-from utils import round_half_up_to_two, pointTopercent, get_data
-from backtest_today import infinite_buy_today
+from market_calendar import load_calendar
+from tracing import Tracer, traced
+from event_log import EventLog, render_history
+from utils import round_half_up_to_two, pointTopercent, get_data, data_version
+from backtest_today import infinite_buy_today, new_state
+from money import to_cents
+from ledger import Ledger, make_config_key
+from journal import Journal
 
 
 class DailyTrader:
-    def __init__(self, config_path='config.yaml', mode='dry-run'):
+    def __init__(self, config_path='config.yaml', mode='dry-run', kis=None, clock=None):
         """
         Args:
-            mode: 'dry-run', 'live', 'update-only'
+            mode: 'dry-run', 'live', 'paper', 'update-only'
+            kis: 주문/시세 클라이언트 주입 (기본: KISApi, paper 모드는 시세만 KISApi를 쓰는 PaperExchange)
+            clock: 현재 시각 callable (tz-aware, 기본: 실제 시각) - paper 재생용 가상 시계
         """
         self.mode = mode
+        self.clock = clock
+        self.price_cache = {}  # (시작일, 종료일) -> DataFrame, 종가 업데이트 시 초기화
         self.load_config(config_path)
         self.setup_directories()
         self.setup_logging()
-        self.kis = KISApi()
-        self.nyse = mcal.get_calendar('NYSE')
+        self.tracer = Tracer(f'{self.log_base_dir}/traces')
+        self.events = EventLog(f'{self.log_base_dir}/events', self.mode)
+        with self.tracer.span('load_calendar'):
+            self.calendar = load_calendar()
+        if kis is None:
+            kis = KISApi(tracer=self.tracer)
+            if mode == 'paper':
+                from paper_exchange import PaperExchange
+                kis = PaperExchange(self.initial_funds, self.fee, clock=self.now, calendar=self.calendar,
+                                    quotes=kis)
+        self.kis = kis
         
     def setup_directories(self):
         """모드별 디렉토리 구조 생성"""
@@ -35,13 +52,12 @@ class DailyTrader:
         os.makedirs('data', exist_ok=True)
         
         # 모드별 파일 경로
-        self.history_log_path = f'{self.log_base_dir}/trading_history_{datetime.now().year}.log'
+        self.history_log_path = f'{self.log_base_dir}/trading_history_{self.local_now().year}.log'
         self.orders_history_path = f'{self.log_base_dir}/orders_history.txt'
-        self.buy_records_path = f'data/{self.mode}_buy_records.pkl'
         
     def setup_logging(self):
         """로깅 설정 - 날짜별 상세 로그"""
-        log_filename = f'{self.log_daily_dir}/trading_{datetime.now().strftime("%Y%m%d")}.log'
+        log_filename = f'{self.log_daily_dir}/trading_{self.local_now().strftime("%Y%m%d")}.log'
         
         # 기존 핸들러 제거
         logger = logging.getLogger()
@@ -73,22 +89,36 @@ class DailyTrader:
         self.welfare = self.config['trading'].get('welfare', True)
         self.start_date = self.config['trading']['start_date']
     
+    def now(self):
+        """현재 시각 (tz-aware) - clock 주입 시 가상 시각"""
+        return self.clock() if self.clock else datetime.now(utc)
+    
+    def local_now(self):
+        """실행 환경 시간대의 현재 시각 - 로그 파일 이름/실행 시각 표시용 (clock 주입 시 가상 시각)"""
+        return self.now().astimezone()
+    
     def get_us_date(self):
         """미국 동부시간 기준 날짜 반환"""
         et = timezone('US/Eastern')
-        return datetime.now(et).date()
+        return self.now().astimezone(et).date()
     
     def get_kr_datetime(self):
         """한국시간 반환"""
         kst = timezone('Asia/Seoul')
-        return datetime.now(kst)
+        return self.now().astimezone(kst)
     
+    @traced('is_trading_day')
     def is_trading_day(self, date=None):
         """거래일 확인"""
         if date is None:
             date = self.get_us_date()
         
-        schedule = self.nyse.schedule(start_date=date, end_date=date)
+        if self.calendar.covers(date):
+            return self.calendar.is_trading_day(date)
+        
+        # 비트맵 범위 밖이면 거래소 캘린더로 직접 확인
+        import pandas_market_calendars as mcal
+        schedule = mcal.get_calendar('NYSE').schedule(start_date=date, end_date=date)
         return not schedule.empty
     
     def get_weekday_kr(self, date):
@@ -101,7 +131,7 @@ class DailyTrader:
         if os.path.exists(self.history_log_path) and os.path.getsize(self.history_log_path) > 0:
             return  # 이미 존재하면 스킵
         
-        mode_display = "DRY-RUN MODE" if self.mode == 'dry-run' else "🚀 LIVE MODE"
+        mode_display = {'dry-run': "DRY-RUN MODE", 'paper': "PAPER MODE"}.get(self.mode, "🚀 LIVE MODE")
         
         header = f"""================================================================================
 🚀 떨사오팔 자동매매 시스템 ({mode_display})
@@ -142,125 +172,220 @@ class DailyTrader:
         with open(self.orders_history_path, 'a', encoding='utf-8') as f:
             f.write(content)
     
-    def calculate_orders(self):
-        """백테스트 로직으로 주문 계산"""
-        end_date = self.get_us_date() - timedelta(days=1)
-        
-        # 시작일 30일 전의 날짜
+    def load_prices(self, start, end):
+        """가격 조회 - 같은 구간은 메모리 캐시 재사용 (daemon 모드)"""
+        key = (str(start), str(end))
+        if key not in self.price_cache:
+            self.price_cache[key] = get_data(ticker=self.symbol, start=start, end=end)
+        return self.price_cache[key]
+    
+    def config_key(self):
+        return make_config_key(self.start_date, self.initial_funds, self.buy_portion, self.fee, self.welfare)
+    
+    def history_start(self):
+        """가격 이력 시작일 - 시작일 30일 전 (첫 거래일의 전날 종가 확보용)"""
         start_date_dt = datetime.strptime(self.start_date, '%Y-%m-%d')
-        start_date_before_30 = start_date_dt - timedelta(days=30)
-        start_date_before_30 = start_date_before_30.strftime('%Y-%m-%d')
-
-        # 30일 전 데이터부터 입력
-        df = get_data(ticker=self.symbol, start=start_date_before_30, end=end_date)
-        if df is None or df.empty:
-            logging.error("가격 데이터 조회 실패")
-            return None, None, None, None, None
-            
-        df_length = len(df) - len(get_data(ticker=self.symbol, start=self.start_date, end=end_date))
-
-        # 오늘 투자 금액 계산
-        buyToday, buyQty, funds, holdings, buy_records, sellToday = infinite_buy_today(
-            df, self.initial_funds, self.buy_portion, df_length, len(df)-1-df_length, self.fee, self.welfare)
-        
-        # buy_records 저장 (모드별 분리)
-        with open(self.buy_records_path, 'wb') as f:
-            pickle.dump(buy_records, f)
-        
-        logging.info(f"Order Calculation - Holdings: {holdings}, Funds: ${funds:.2f}")
-        
-        return buyToday, buyQty, funds, holdings, sellToday
+        return (start_date_dt - timedelta(days=30)).strftime('%Y-%m-%d')
     
-    def log_morning_history(self, is_trading_day, buyPrice=None, buyQty=None, 
-                           sellOrders=None, holdings=None, funds=None, error_msg=None):
-        """Morning Task 통합 로그 기록"""
-        kr_now = self.get_kr_datetime()
-        us_date = self.get_us_date()
-        weekday = self.get_weekday_kr(us_date)
+    def price_version(self, end_date):
+        """시뮬레이션에 쓰인 가격 이력 (history_start ~ end_date) 해시 - 과거 종가 수정/추가 감지"""
+        return data_version(self.symbol, self.history_start(), str(end_date))
+    
+    @traced('calculate_orders')
+    def calculate_orders(self, as_of=None):
+        """백테스트 로직으로 주문 계산 - 원장 스냅샷이 있으면 이후 구간만 진행
         
-        content = f"""================================================================================
-📅 {us_date} ({weekday}) - Morning Task ({kr_now.strftime('%H:%M')} KST)
-================================================================================
-"""
+        Args:
+            as_of: 이 날짜 종가까지 반영 (기본: 미국 기준 전날)
+        """
+        end_date = as_of or self.get_us_date() - timedelta(days=1)
+        config_key = self.config_key()
         
-        if error_msg:
-            content += f"🚨 에러 발생: {error_msg}\n"
-        elif not is_trading_day:
-            content += "🚫 미국 시장 휴장일\n"
-        else:
-            content += "✅ 미국 시장 개장일\n\n"
-            content += "📊 주문 내역:\n"
+        ledger = Ledger()
+        try:
+            # 1. 원장의 최근 스냅샷 + 보유 회차에서 이어서 진행
+            with self.tracer.span('load_ledger') as span:
+                state, df, save = self.load_ledger_state(ledger, config_key, end_date)
+                span['resumed'] = state is not None
             
-            # 매수 주문
-            if buyQty and buyQty > 0:
-                content += f"  • LOC 매수: {buyQty}주 @ ${buyPrice:.2f}\n"
+            events = []  # 거래 저널 이벤트
+            if state is not None:
+                start_idx, simulation_period = 1, len(df) - 2
             else:
-                content += "  • LOC 매수: 없음\n"
+                # 2. 스냅샷이 없거나 무효 -> 시작일부터 전체 재계산
+                # 시작일 30일 전 데이터부터 입력
+                with self.tracer.span('get_data'):
+                    df = self.load_prices(self.history_start(), end_date)
+                    if df is None or df.empty:
+                        logging.error("가격 데이터 조회 실패")
+                        return None, None, None, None, None
+                        
+                    since_start = self.load_prices(self.start_date, end_date)
+                    df_length = len(df) - (0 if since_start is None else len(since_start))
+                state = new_state(self.initial_funds)
+                start_idx, simulation_period = df_length, len(df)-1-df_length
+                # 시작일 전 (첫 세션 주문 계산) - 진행할 거래일 없이 초기 상태로 주문 생성, 원장 기록은 다음부터
+                if start_idx < len(df):
+                    events.append({'date': df.index[start_idx], 'type': 'deposit',
+                                   'amount': to_cents(self.initial_funds)})
             
-            # 매도 주문 (여러건 가능)
-            if sellOrders and len(sellOrders) > 0:
-                for order_type, price, qty in sellOrders:
-                    if order_type == 'LOC':
-                        content += f"  • LOC 매도: {qty}주 @ ${price:.2f}\n"
-                    else:
-                        content += f"  • MOC 매도: {qty}주 (손절)\n"
-            else:
-                content += "  • 매도: 없음\n"
+            # 오늘 투자 금액 계산
+            trade_history, snapshots = [], []
+            with self.tracer.span('infinite_buy_today', rows=simulation_period + 1):
+                buyToday, buyQty, funds, holdings, buy_records, sellToday = infinite_buy_today(
+                    df, self.initial_funds, self.buy_portion, start_idx, simulation_period, self.fee, self.welfare,
+                    state=state, trade_history=trade_history, snapshots=snapshots, events=events)
             
-            content += f"""
-💼 포트폴리오:
-  • 보유 주식: {holdings}주
-  • 남은 잔고: ${funds:.2f}
-"""
+            # 원장/거래 저널 기록 (모드별 분리, 단일 트랜잭션)
+            if save:
+                with self.tracer.span('save_ledger'):
+                    data_hash = self.price_version(snapshots[-1][0]) if snapshots else None
+                    ledger.save(self.mode, self.symbol, state, trade_history, snapshots, config_key, events=events,
+                                data_hash=data_hash)
+        finally:
+            ledger.close()
         
-        content += "\n--------------------------------------------------------------------------------\n\n"
+        logging.info(f"Order Calculation - Holdings: {holdings}, Funds: ${funds:.2f}")
         
-        self.write_history_log(content)
+        return buyToday, buyQty, funds, holdings, sellToday
     
-    def log_evening_history(self, is_trading_day, close_price=None, error_msg=None):
-        """Evening Task 통합 로그 기록"""
-        kr_now = self.get_kr_datetime()
-        us_date = self.get_us_date()
-        weekday = self.get_weekday_kr(us_date)
+    def load_ledger_state(self, ledger, config_key, end_date):
+        """원장 스냅샷에서 이어서 진행할 상태 로드
         
-        content = f"""================================================================================
-📅 {us_date} ({weekday}) - Evening Task ({kr_now.strftime('%H:%M')} KST)
-================================================================================
-"""
-        
-        if error_msg:
-            content += f"🚨 에러 발생: {error_msg}\n"
-        elif not is_trading_day:
-            content += "🚫 미국 시장 휴장일 - 종가 업데이트 없음\n"
-        else:
-            content += f"📈 종가 업데이트 완료: ${close_price:.2f}\n"
+        Returns:
+            (state, df, save) - state가 None이면 전체 재계산 필요, save는 결과를 원장에 기록할지 여부
+        """
+        snapshot = ledger.latest_snapshot(self.mode, self.symbol)
+        if snapshot is None:
+            return None, None, True
+        
+        # 과거 날짜 기준 재계산은 원장을 건드리지 않음
+        if snapshot['date'] > str(end_date):
+            return None, None, False
+        
+        # 거래 저널이 원장과 같은 날짜까지 기록되어 있어야 이어서 진행 (저널 도입 전 원장은 재계산)
+        # 스냅샷 날짜까지의 가격 이력이 스냅샷 저장 때와 같아야 함 (과거 종가 수정 시 재계산, 해시 없는 원장도 재계산)
+        journal_date = Journal(conn=ledger.conn).last_date(self.mode, 'infinite_buy', self.symbol)
+        if snapshot['config_key'] == config_key and journal_date == snapshot['date'] \
+                and snapshot['data_hash'] == self.price_version(snapshot['date']):
+            # 스냅샷 당일 종가부터 조회 (첫 행은 다음 날의 전날 종가로만 사용)
+            df = self.load_prices(snapshot['date'], end_date)
+            if df is not None and str(df.index[0]) == snapshot['date']:
+                logging.info(f"Resuming from ledger snapshot {snapshot['date']}")
+                return ledger.load_state(self.mode, self.symbol, snapshot), df, True
+        
+        # 파라미터 변경 또는 가격 이력 변경 -> 원장 초기화 후 재계산
+        logging.info("Ledger snapshot invalid (config or price history changed) - rebuilding")
+        ledger.reset(self.mode, self.symbol)
+        return None, None, True
+    
+    @traced('prepare_order_plan')
+    def prepare_order_plan(self, us_date):
+        """장 마감 후 다음 거래일 주문 계획을 미리 계산해 저장"""
+        session_date = self.calendar.next_session(us_date)
+        buyPrice, buyQty, funds, holdings, sellOrders = self.calculate_orders(as_of=us_date)
+        if buyPrice is None:
+            return None
         
-        content += "\n--------------------------------------------------------------------------------\n\n"
+        ledger = Ledger()
+        try:
+            ledger.save_plan(self.mode, self.symbol, session_date, us_date, self.config_key(),
+                             buyPrice, buyQty, sellOrders, funds, holdings, data_hash=self.price_version(us_date))
+        finally:
+            ledger.close()
+        
+        self.events.append('plan', session_date, symbol=self.symbol, based_on=str(us_date),
+                           holdings=holdings, funds=funds,
+                           orders=self.to_order_list(buyPrice, buyQty, sellOrders))
+        logging.info(f"Order plan saved for {session_date} (based on {us_date} close)")
+        return session_date
+    
+    @traced('load_order_plan')
+    def load_order_plan(self, us_today):
+        """evening task에서 저장한 주문 계획 검증 후 반환 (무효면 None)"""
+        ledger = Ledger()
+        try:
+            plan = ledger.load_plan(self.mode, self.symbol, us_today)
+            if plan is None:
+                return None
+            
+            # 계획 이후 파라미터가 바뀌었거나 종가가 추가/수정되었으면 다시 계산
+            last_close_date = ledger.last_price_date(self.symbol, us_today)
+            snapshot = ledger.latest_snapshot(self.mode, self.symbol)
+        finally:
+            ledger.close()
+        
+        if plan['config_key'] != self.config_key():
+            logging.info("Order plan ignored - config changed")
+            return None
+        if plan['based_on_date'] != last_close_date or snapshot is None \
+                or snapshot['date'] != plan['based_on_date']:
+            logging.info(f"Order plan ignored - based on {plan['based_on_date']}, latest close {last_close_date}")
+            return None
+        if plan['data_hash'] != self.price_version(plan['based_on_date']):
+            logging.info(f"Order plan ignored - price history up to {plan['based_on_date']} changed")
+            return None
         
-        self.write_history_log(content)
+        logging.info(f"Using order plan prepared at {plan['created_at']} (based on {plan['based_on_date']})")
+        return plan['buy_price'], plan['buy_qty'], plan['funds'], plan['holdings'], plan['sell_orders']
+    
+    def to_order_list(self, buyPrice, buyQty, sellOrders):
+        """주문 튜플 -> 이벤트 기록용 주문 목록"""
+        orders = []
+        if buyQty and buyQty > 0:
+            orders.append({'side': 'BUY', 'order_type': 'LOC', 'price': buyPrice, 'qty': buyQty})
+        for order_type, price, qty in sellOrders or []:
+            orders.append({'side': 'SELL', 'order_type': order_type,
+                           'price': price if order_type == 'LOC' else 0, 'qty': qty})
+        return orders
+    
+    def log_morning_history(self, is_trading_day, buyPrice=None, buyQty=None, 
+                           sellOrders=None, holdings=None, funds=None, error_msg=None):
+        """Morning Task 이벤트 기록 (통합 로그는 flush_events에서 렌더링)"""
+        payload = {'is_trading_day': is_trading_day, 'error': error_msg}
+        if is_trading_day and not error_msg:
+            payload.update(holdings=holdings, funds=funds, buy_price=buyPrice,
+                           orders=self.to_order_list(buyPrice, buyQty, sellOrders))
+        self.events.append('morning', self.get_us_date(), symbol=self.symbol,
+                           kst=self.get_kr_datetime().isoformat(timespec='seconds'), **payload)
+    
+    def log_evening_history(self, is_trading_day, close_price=None, error_msg=None):
+        """Evening Task 이벤트 기록 (통합 로그는 flush_events에서 렌더링)"""
+        self.events.append('evening', self.get_us_date(), symbol=self.symbol,
+                           kst=self.get_kr_datetime().isoformat(timespec='seconds'),
+                           is_trading_day=is_trading_day, close=close_price, error=error_msg)
     
     def log_orders_to_history(self, buyPrice, buyQty, sellOrders):
-        """주문 내역 통합 파일에 기록"""
-        kr_now = self.get_kr_datetime()
+        """주문별 이벤트 기록 (주문 내역 파일은 morning 이벤트에서 렌더링)"""
         us_date = self.get_us_date()
-        
-        content = f"""[{us_date}] {kr_now.strftime('%H:%M:%S')} KST - Mode: {self.mode.upper()}
-"""
-        
-        if buyQty and buyQty > 0:
-            content += f"  BUY (LOC): {buyQty} shares @ ${buyPrice:.2f}\n"
-        
-        if sellOrders:
-            for order_type, price, qty in sellOrders:
-                if order_type == 'LOC':
-                    content += f"  SELL (LOC): {qty} shares @ ${price:.2f}\n"
-                else:
-                    content += f"  SELL (MOC): {qty} shares\n"
-        
-        content += "\n"
-        
-        self.write_orders_history(content)
+        for order in self.to_order_list(buyPrice, buyQty, sellOrders):
+            self.events.append('order', us_date, symbol=self.symbol, **order)
+    
+    def log_fills(self):
+        """당일 체결 내역 이벤트 기록 (실거래/모의 거래소 모드)"""
+        us_date = self.get_us_date()
+        for item in self.kis.get_orders():
+            ccld_qty = int(float(item.get('ft_ccld_qty') or 0))
+            if ccld_qty <= 0:
+                continue
+            self.events.append('fill', us_date, symbol=item.get('pdno'),
+                               side='BUY' if item.get('sll_buy_dvsn_cd') == '02' else 'SELL',
+                               order_no=item.get('odno'), qty=ccld_qty,
+                               price=float(item.get('ft_ccld_unpr3') or 0),
+                               order_qty=int(float(item.get('ft_ord_qty') or 0)),
+                               status=item.get('prcs_stat_name'))
+    
+    @traced('flush_events')
+    def flush_events(self):
+        """구조화 이벤트 기록 후 사람이 읽는 로그(통합 로그/주문 내역)를 렌더링"""
+        events = self.events.flush()
+        history, orders = render_history(events)
+        if history:
+            self.write_history_log(history)
+        if orders:
+            self.write_orders_history(orders)
     
+    @traced('submit_orders')
     def submit_orders(self, buyPrice, buyQty, sellOrders):
         """한투 API로 주문 제출"""
         results = []
@@ -281,12 +406,18 @@ class DailyTrader:
                 result = self.kis.place_order('MOC_SELL', self.symbol, qty, 0)
             results.append(('SELL', result))
         
+        for side, result in results:
+            self.events.append('order_result', self.get_us_date(), symbol=self.symbol, side=side,
+                               success=bool(result.get('success')), msg=result.get('msg'),
+                               order_no=(result.get('data') or {}).get('ODNO'))
+        
         # 결과 요약
         success = sum(1 for _, r in results if r.get('success'))
         logging.info(f"Order Results: {success}/{len(results)} successful")
         
         return results
     
+    @traced('update_price_data')
     def update_price_data(self, target_date):
         """종가 데이터 업데이트"""
         logging.info(f"Updating price for {target_date}")
@@ -318,15 +449,26 @@ class DailyTrader:
         
         conn.commit()
         conn.close()
+        self.price_cache.clear()
         
         logging.info(f"Price updated: {target_date} - Close: ${close_price:.2f}")
         return close_price
     
     def run_morning_task(self):
         """00:30 실행 - 주문 계산 및 제출"""
+        self.tracer.start_run('morning')
+        try:
+            with self.tracer.span('morning_task'):
+                self._run_morning_task()
+        finally:
+            self.flush_events()
+            self.tracer.finish()
+            self.kis.metrics.flush()
+    
+    def _run_morning_task(self):
         logging.info("="*60)
         logging.info("MORNING TASK START")
-        logging.info(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logging.info(f"Time: {self.local_now().strftime('%Y-%m-%d %H:%M:%S')}")
         logging.info(f"Mode: {self.mode.upper()}")
         logging.info("="*60)
         
@@ -344,9 +486,13 @@ class DailyTrader:
         
         logging.info(f"US Market Open on {us_today}")
         
-        # 2. 주문 계산
+        # 2. 주문 계산 (evening task에서 미리 계산한 계획이 유효하면 그대로 사용)
         try:
-            buyPrice, buyQty, funds, holdings, sellOrders = self.calculate_orders()
+            plan = self.load_order_plan(us_today)
+            if plan is not None:
+                buyPrice, buyQty, funds, holdings, sellOrders = plan
+            else:
+                buyPrice, buyQty, funds, holdings, sellOrders = self.calculate_orders()
             
             if buyPrice is None:
                 error_msg = "Order calculation failed - no price data"
@@ -367,9 +513,11 @@ class DailyTrader:
             # 4. 주문 내역 기록
             self.log_orders_to_history(buyPrice, buyQty, sellOrders)
             
-            # 5. 실거래 모드일 때만 제출
-            if self.mode == 'live':
+            # 5. 실거래/모의 거래소 모드일 때만 제출 (제출 전후로 이벤트를 바로 기록 - 타임아웃으로 종료돼도 남도록)
+            if self.mode in ('live', 'paper'):
+                self.flush_events()
                 self.submit_orders(buyPrice, buyQty, sellOrders)
+                self.flush_events()
             else:
                 logging.info(f"{self.mode.upper()} mode - Orders not submitted")
                 
@@ -380,9 +528,19 @@ class DailyTrader:
     
     def run_evening_task(self):
         """10:00 실행 - 종가 업데이트"""
+        self.tracer.start_run('evening')
+        try:
+            with self.tracer.span('evening_task'):
+                self._run_evening_task()
+        finally:
+            self.flush_events()
+            self.tracer.finish()
+            self.kis.metrics.flush()
+    
+    def _run_evening_task(self):
         logging.info("="*60)
         logging.info("EVENING TASK START")
-        logging.info(f"실행시간 Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logging.info(f"실행시간 Time: {self.local_now().strftime('%Y-%m-%d %H:%M:%S')}")
         logging.info("="*60)
         
         # 통합 로그 헤더 확인/생성
@@ -400,8 +558,16 @@ class DailyTrader:
         # 종가 업데이트
         try:
             close_price = self.update_price_data(us_date)
+            if self.mode in ('live', 'paper'):
+                self.log_fills()
+                self.flush_events()
             if close_price:
                 self.log_evening_history(is_trading_day=True, close_price=close_price)
+                # 다음 거래일 주문 계획 미리 계산 (실패해도 morning task에서 다시 계산)
+                try:
+                    self.prepare_order_plan(us_date)
+                except Exception as e:
+                    logging.error(f"Failed to prepare order plan: {e}", exc_info=True)
             else:
                 self.log_evening_history(is_trading_day=True, error_msg="종가 데이터 없음")
         except Exception as e:
@@ -0,0 +1,211 @@
+# db_delta.py
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from init_db import DB_PATH, ensure_schema
+
+'''
+trading.db 텍스트 변경분 저장소 (git 커밋용)
+
+trading.db는 git에 올리지 않고, 실행 때마다 바뀐 행만 날짜별 JSON Lines 파일에 덧붙인다.
+
+    data/delta/{YYYY}/{YYYY-MM-DD}.jsonl   (내보낸 날짜 기준, 같은 날 여러 번 내보내면 이어 붙임)
+
+- 한 줄 = 한 행: {"table":..., "upsert": {컬럼: 값}} 또는 {"table":..., "delete": {키 컬럼: 값}}
+- 파일 이름 순 -> 줄 순서대로 재생하면 trading.db가 된다 (rebuild)
+- export는 변경분 파일로 재생한 DB와 현재 trading.db를 비교해 차이만 기록 (변경 없으면 파일을 만들지 않음)
+- backtest_cache는 다시 계산할 수 있는 캐시라 제외
+
+    python db_delta.py rebuild    # 체크아웃 직후 - 변경분 -> data/trading.db
+    python db_delta.py export     # 실행 후 - data/trading.db 변경분 -> 오늘 파일
+'''
+
+DELTA_DIR = 'data/delta'
+
+TABLES = [
+    'prices',
+    'symbols',
+    'strategy_lots',
+    'portfolio_snapshots',
+    'order_plans',
+    'journal_events',
+    'journal_snapshots',
+    'paper_accounts',
+    'paper_positions',
+    'paper_orders',
+]
+
+
+def delta_path(date, base_dir=DELTA_DIR):
+    return os.path.join(base_dir, date[:4], f'{date}.jsonl')
+
+
+def list_deltas(base_dir=DELTA_DIR):
+    """변경분 파일 경로 (재생 순서)"""
+    return sorted(glob.glob(os.path.join(base_dir, '*', '*.jsonl')))
+
+
+def _columns(conn, table, schema='main'):
+    """(전체 컬럼, 키 컬럼) - 키는 PRIMARY KEY 순서"""
+    info = conn.execute(f'PRAGMA {schema}.table_info({table})').fetchall()
+    columns = [row[1] for row in info]
+    keys = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0]
+    return columns, keys
+
+
+def apply_deltas(conn, paths):
+    """변경분 파일을 순서대로 반영 (같은 종류의 연속된 줄은 executemany 한 번으로)
+
+    Returns:
+        반영한 줄 수
+    """
+    statements = {}
+    batch_sql, batch = None, []
+    count = 0
+
+    def flush():
+        if batch:
+            conn.executemany(batch_sql, batch)
+            batch.clear()
+
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                table = record['table']
+                op = 'upsert' if 'upsert' in record else 'delete'
+                row = record[op]
+                columns = tuple(row)
+                sql = statements.get((table, op, columns))
+                if sql is None:
+                    names = ', '.join(columns)
+                    if op == 'upsert':
+                        sql = (f'INSERT OR REPLACE INTO {table} ({names}) '
+                               f'VALUES ({", ".join("?" * len(columns))})')
+                    else:
+                        sql = f'DELETE FROM {table} WHERE ' + ' AND '.join(f'{c} = ?' for c in columns)
+                    statements[(table, op, columns)] = sql
+                if sql != batch_sql:
+                    flush()
+                    batch_sql = sql
+                batch.append(tuple(row.values()))
+                count += 1
+    flush()
+    return count
+
+
+def rebuild(db_path=DB_PATH, base_dir=DELTA_DIR):
+    """변경분 전체를 재생해 db_path를 새로 만든다 (임시 파일에 한 트랜잭션으로 쓰고 교체)"""
+    started = time.perf_counter()
+    paths = list_deltas(base_dir)
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        ensure_schema(conn)
+        with conn:
+            count = apply_deltas(conn, paths)
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    print(f"Rebuilt {db_path} from {len(paths)} delta files ({count:,} rows) "
+          f"in {time.perf_counter() - started:.2f}s")
+    return count
+
+
+def diff(db_path=DB_PATH, base_dir=DELTA_DIR):
+    """변경분 재생 결과(메모리 DB)와 db_path의 차이
+
+    Returns:
+        [(테이블, 'delete'|'upsert', {컬럼: 값})] - 테이블 순, 테이블 안에서는 삭제 -> 추가/수정, 키 순
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found (run: python db_delta.py rebuild)")
+    conn = sqlite3.connect(':memory:')
+    try:
+        ensure_schema(conn)
+        apply_deltas(conn, list_deltas(base_dir))
+        conn.execute('ATTACH DATABASE ? AS cur', (db_path,))
+        current_tables = {row[0] for row in conn.execute(
+            "SELECT name FROM cur.sqlite_master WHERE type = 'table'")}
+
+        changes = []
+        for table in TABLES:
+            if table not in current_tables:
+                continue
+            columns, keys = _columns(conn, table)
+            current = set(_columns(conn, table, 'cur')[0])
+            columns = [c for c in columns if c in current]
+            names, key_names = ', '.join(columns), ', '.join(keys)
+            deleted = conn.execute(f'''
+                SELECT {key_names} FROM main.{table}
+                EXCEPT SELECT {key_names} FROM cur.{table}
+                ORDER BY {key_names}
+            ''').fetchall()
+            changes.extend((table, 'delete', dict(zip(keys, row))) for row in deleted)
+            upserted = conn.execute(f'''
+                SELECT {names} FROM cur.{table}
+                EXCEPT SELECT {names} FROM main.{table}
+                ORDER BY {key_names}
+            ''').fetchall()
+            changes.extend((table, 'upsert', dict(zip(columns, row))) for row in upserted)
+    finally:
+        conn.close()
+    return changes
+
+
+def export(db_path=DB_PATH, base_dir=DELTA_DIR, date=None):
+    """db_path의 변경분을 date(기본 오늘) 파일에 덧붙인다
+
+    Returns:
+        {테이블: 기록한 줄 수}
+    """
+    started = time.perf_counter()
+    changes = diff(db_path, base_dir)
+    counts = {}
+    if changes:
+        path = delta_path(date or datetime.now().strftime('%Y-%m-%d'), base_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for table, op, row in changes:
+                f.write(json.dumps({'table': table, op: row}, ensure_ascii=False, separators=(',', ':')) + '\n')
+                counts[table] = counts.get(table, 0) + 1
+        print(f"Exported {len(changes):,} rows to {path} in {time.perf_counter() - started:.2f}s: "
+              + ', '.join(f"{table} {n}" for table, n in counts.items()))
+    else:
+        print(f"No changes in {db_path}")
+    return counts
+
+
+if __name__ == "__main__":
+    # python db_delta.py rebuild         - 변경분 -> data/trading.db (기존 파일 교체)
+    # python db_delta.py export [날짜]   - data/trading.db 변경분 -> data/delta/YYYY/날짜.jsonl
+    # python db_delta.py status          - 아직 내보내지 않은 변경 행 수
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+
+    if command == 'rebuild':
+        rebuild()
+    elif command == 'export':
+        export(date=sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        changes = diff()
+        paths = list_deltas()
+        print(f"{len(paths)} delta files, {sum(os.path.getsize(p) for p in paths) / 1e3:.1f}KB")
+        counts = {}
+        for table, op, _ in changes:
+            counts[(table, op)] = counts.get((table, op), 0) + 1
+        for (table, op), n in counts.items():
+            print(f"- {table} {op}: {n}")
+        print(f"{len(changes)} unexported changes in {DB_PATH}")
+        sys.exit(1 if changes else 0)
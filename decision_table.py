@@ -0,0 +1,182 @@
+# decision_table.py
+import sys
+from bisect import bisect_right
+import numpy as np
+from backtest_today import buy_quantity
+from ledger import Ledger
+from money import PPM, to_cents, to_dollars, fee_ppm, sell_target_cents
+from utils import load_config
+
+
+class DecisionTable:
+    """다음 거래일 종가별 결과표 (떨사오팔 LOC 주문 기준)
+
+    결과는 종가 구간별로 일정하므로(매도되는 회차, 매수 체결 여부) 구간 경계(센트)만 저장하고,
+    예수금은 조회 시 해당 종가로 정수 센트 계산한다 (infinite_buy_step 과 동일한 반올림).
+    """
+
+    def __init__(self, state, prev_close, initial_funds, buy_portion, fee, welfare):
+        """
+        Args:
+            state: infinite_buy_today 상태 (센트 단위) - 전날 종가까지 반영
+            prev_close: 전날 종가 ($, LOC 매수 기준가)
+            initial_funds: 초기 자금 ($)
+            fee: 수수료(%)
+        """
+        self.state = state
+        self.prev_close = to_cents(prev_close)
+        self.fee = fee_ppm(fee)
+        self.welfare = welfare
+
+        records = state['buy_records']
+        self.lot_ids = np.array([r['id'] for r in records], dtype=np.int64)
+        self.lot_qty = np.array([r['quantity'] for r in records], dtype=np.int64)
+        # 다음 날 보유일 >= 40 이면 가격과 무관하게 손절(MOC) 매도
+        self.lot_stop = np.array([r['days'] + 1 >= 40 for r in records], dtype=bool)
+        self.lot_sell_cents = np.array([sell_target_cents(r['buy_price'], self.fee) for r in records],
+                                       dtype=np.int64)
+
+        # 매수 수량은 전날 기준으로 이미 정해짐 (infinite_buy_step 과 동일)
+        self.buy_qty = buy_quantity(state['funds'], len(records), self.prev_close, to_cents(initial_funds),
+                                    buy_portion, welfare)
+        self.buy_max_cents = self.prev_close  # price <= prev_close
+
+        self._build()
+
+    # ---------------------------------------------------------------- 벡터 평가
+    def evaluate_cents(self, cents):
+        """종가(센트) 배열에 대한 결과 (정수 벡터 연산)
+
+        Returns:
+            dict of arrays - sold(가격 x 회차 bool), sold_qty, buy_fill, funds(센트), holdings, T
+        """
+        cents = np.asarray(cents, dtype=np.int64)
+        sold = (cents[:, None] >= self.lot_sell_cents[None, :]) | self.lot_stop[None, :]
+        if self.state['holdings'] <= 0:  # 보유 주식이 없으면 매도 로직 자체를 건너뜀 (infinite_buy_step 과 동일)
+            sold[:] = False
+        sold_qty = (sold * self.lot_qty[None, :]).sum(axis=1)
+
+        # 회차별 체결금액 - 수수료 (건별 0.5센트 올림)
+        amount = self.lot_qty[None, :] * cents[:, None]
+        net = amount - (amount * self.fee + PPM // 2) // PPM
+        funds = self.state['funds'] + (net * sold).sum(axis=1)
+
+        buy_amount = self.buy_qty * cents
+        cost = buy_amount + (buy_amount * self.fee + PPM // 2) // PPM
+        buy_fill = (cents <= self.buy_max_cents) & (funds >= cost)
+        funds = funds - np.where(buy_fill, cost, 0)
+
+        return {
+            'sold': sold,
+            'sold_qty': sold_qty,
+            'buy_fill': buy_fill,
+            'funds': funds,
+            'holdings': self.state['holdings'] - sold_qty + np.where(buy_fill, self.buy_qty, 0),
+            'T': len(self.lot_ids) - sold.sum(axis=1) + buy_fill,
+        }
+
+    def evaluate(self, prices):
+        """종가($) 배열에 대한 결과 - 예수금은 달러"""
+        result = self.evaluate_cents(np.floor(np.asarray(prices, dtype=np.float64) * 100 + 0.5 + 1e-9))
+        result['funds'] = result['funds'] / 100
+        return result
+
+    def _build(self):
+        """구간 경계 계산 후 인접한 같은 결과 구간 병합"""
+        candidates = {1, self.buy_max_cents + 1}
+        candidates.update(int(c) for c in self.lot_sell_cents)
+        breaks = np.array(sorted(c for c in candidates if c >= 1), dtype=np.int64)
+
+        # 매수 가능 구간 안에서 예수금 부족으로 매수가 막히는 지점(단조)을 이분 탐색으로 추가
+        extra = []
+        uppers = np.append(breaks[1:] - 1, max(int(breaks[-1]), self.buy_max_cents))
+        for lo, hi in zip(breaks, uppers):
+            hi = min(int(hi), self.buy_max_cents)
+            if lo > hi:
+                continue
+            fill = self.evaluate_cents([lo, hi])['buy_fill']
+            if fill[0] != fill[1]:
+                a, b = int(lo), int(hi)  # fill(a) != fill(b), fill(b) 구간의 시작점 탐색
+                while b - a > 1:
+                    mid = (a + b) // 2
+                    if self.evaluate_cents([mid])['buy_fill'][0] == fill[0]:
+                        a = mid
+                    else:
+                        b = mid
+                extra.append(b)
+        if extra:
+            breaks = np.unique(np.concatenate([breaks, np.array(extra, dtype=np.int64)]))
+
+        result = self.evaluate_cents(breaks)
+        keys = np.column_stack([result['sold'], result['buy_fill']])
+        keep = np.ones(len(breaks), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+
+        self.breaks = breaks[keep]
+        self.sold = result['sold'][keep]
+        self.sold_qty = result['sold_qty'][keep]
+        self.buy_fill = result['buy_fill'][keep]
+        self.holdings = result['holdings'][keep]
+        self.T = result['T'][keep]
+        self.funds_start = result['funds'][keep]  # 구간 시작가 기준 예수금 (센트)
+
+    # ---------------------------------------------------------------- 조회
+    def lookup(self, price):
+        """종가 1개에 대한 결과 - 구간 이분 탐색 O(log n)"""
+        cents = to_cents(price)
+        k = max(bisect_right(self.breaks, cents) - 1, 0)
+        return {
+            'price': price,
+            'sold_lots': self.lot_ids[self.sold[k]].tolist(),
+            'sold_qty': int(self.sold_qty[k]),
+            'buy_fill': bool(self.buy_fill[k]),
+            'buy_qty': self.buy_qty if self.buy_fill[k] else 0,
+            'funds': to_dollars(int(self.evaluate_cents([cents])['funds'][0])),
+            'holdings': int(self.holdings[k]),
+            'T': int(self.T[k]),
+        }
+
+    def rows(self):
+        """구간표 [(시작가, 끝가 또는 None, 매도 회차, 매수 체결, 보유 주식 수, T, 시작가 기준 예수금)]"""
+        table = []
+        for k, start in enumerate(self.breaks):
+            end = (self.breaks[k + 1] - 1) / 100 if k + 1 < len(self.breaks) else None
+            table.append((start / 100, end, self.lot_ids[self.sold[k]].tolist(), bool(self.buy_fill[k]),
+                          int(self.holdings[k]), int(self.T[k]), to_dollars(int(self.funds_start[k]))))
+        return table
+
+
+def from_ledger(mode, symbol, initial_funds, buy_portion, fee, welfare, db_path=None):
+    """원장의 최근 스냅샷 기준 결과표"""
+    ledger = Ledger(db_path) if db_path else Ledger()
+    try:
+        snapshot = ledger.latest_snapshot(mode, symbol)
+        if snapshot is None:
+            return None, None
+        state = ledger.load_state(mode, symbol, snapshot)
+    finally:
+        ledger.close()
+    return DecisionTable(state, snapshot['close'], initial_funds, buy_portion, fee, welfare), snapshot
+
+
+if __name__ == "__main__":
+    # python decision_table.py [dry-run|live] [가격 ...]  - 원장 기준 다음 거래일 종가별 결과
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
+    config = load_config()['trading']
+    table, snapshot = from_ledger(mode, config['symbol'], config['initial_funds'], config['buy_portion'],
+                                  config['fee_rate'], config.get('welfare', True))
+    if table is None:
+        print("원장 스냅샷이 없습니다. morning/evening task를 먼저 실행하세요.")
+        sys.exit(1)
+
+    print('=' * 80)
+    print(f"{snapshot['date']} 종가 ${snapshot['close']:.2f} 기준 다음 거래일 종가별 결과")
+    print(f"예수금 ${snapshot['funds']:.2f} / 보유 {snapshot['holdings']}주 / LOC 매수 {table.buy_qty}주")
+    print('=' * 80)
+    for start, end, sold_lots, buy_fill, holdings, T, funds in table.rows():
+        price_range = f"${start:.2f} ~ " + (f"${end:.2f}" if end is not None else "")
+        print(f"{price_range:<22} 매도회차:{str(sold_lots):<16} 매수:{'O' if buy_fill else 'X'} "
+              f"보유:{holdings:>5}주 T:{T} 시작가 기준 예수금:${funds:,.2f}")
+
+    for price in sys.argv[2:]:
+        print(table.lookup(float(price)))
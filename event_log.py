@@ -0,0 +1,243 @@
+# event_log.py
+import json
+import os
+import sys
+from datetime import datetime
+
+WEEKDAYS_KR = ['월', '화', '수', '목', '금', '토', '일']
+SEPARATOR = "=" * 80
+DIVIDER = "-" * 80
+
+
+class EventLog:
+    """모드별 구조화 이벤트 로그 (JSONL) + 날짜/이벤트 타입 인덱스
+
+    파일 구성 (logs/{mode}/events/)
+        events.jsonl : 이벤트 1건당 1줄, append-only
+        index.json   : {'size': events.jsonl 크기, 'dates': {날짜: {타입: [[offset, length], ...]}}}
+    """
+
+    def __init__(self, event_dir, mode):
+        self.event_dir = event_dir
+        self.mode = mode
+        self.events_path = f'{event_dir}/events.jsonl'
+        self.index_path = f'{event_dir}/index.json'
+        self.buffer = []
+
+    def append(self, event_type, date, **payload):
+        """이벤트 추가 (flush 전까지 메모리 버퍼에만 보관)"""
+        event = {
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'date': str(date),
+            'type': event_type,
+            'mode': self.mode,
+        }
+        event.update(payload)
+        self.buffer.append(event)
+        return event
+
+    def flush(self):
+        """버퍼의 이벤트를 한 번에 기록하고 인덱스 갱신. 기록된 이벤트 목록 반환"""
+        events, self.buffer = self.buffer, []
+        if not events:
+            return events
+
+        os.makedirs(self.event_dir, exist_ok=True)
+        index = self.load_index()
+        with open(self.events_path, 'ab') as f:
+            offset = f.tell()
+            chunks = []
+            for event in events:
+                line = (json.dumps(event, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+                chunks.append(line)
+                by_type = index['dates'].setdefault(event['date'], {})
+                by_type.setdefault(event['type'], []).append([offset, len(line)])
+                offset += len(line)
+            f.write(b''.join(chunks))
+
+        index['size'] = offset
+        self._save_index(index)
+        return events
+
+    # ---------------------------------------------------------------- 인덱스
+    def load_index(self):
+        """인덱스 로드 - 없거나 이벤트 파일 크기와 다르면 재생성"""
+        size = os.path.getsize(self.events_path) if os.path.exists(self.events_path) else 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('size') == size:
+                return index
+        return self.rebuild_index()
+
+    def rebuild_index(self):
+        """이벤트 파일 전체를 읽어 인덱스 재생성"""
+        index = {'size': 0, 'dates': {}}
+        if os.path.exists(self.events_path):
+            offset = 0
+            with open(self.events_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        event = json.loads(line)
+                        by_type = index['dates'].setdefault(event['date'], {})
+                        by_type.setdefault(event['type'], []).append([offset, len(line)])
+                    offset += len(line)
+            index['size'] = offset
+        if index['dates']:
+            self._save_index(index)
+        return index
+
+    def _save_index(self, index):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(index, ensure_ascii=False, sort_keys=True))  # json.dump(f)는 C 인코더를 쓰지 않음
+        os.replace(tmp_path, self.index_path)
+
+    # ---------------------------------------------------------------- 조회
+    def query(self, start=None, end=None, event_types=None):
+        """날짜 범위/이벤트 타입으로 조회 (인덱스의 offset만 읽음)"""
+        index = self.load_index()
+        locations = []
+        for date in sorted(index['dates']):
+            if (start and date < str(start)) or (end and date > str(end)):
+                continue
+            for event_type, entries in index['dates'][date].items():
+                if event_types is None or event_type in event_types:
+                    locations.extend(entries)
+        locations.sort()
+
+        events = []
+        if locations:
+            with open(self.events_path, 'rb') as f:
+                for offset, length in locations:
+                    f.seek(offset)
+                    events.append(json.loads(f.read(length)))
+        return events
+
+
+# ---------------------------------------------------------------- 사람이 읽는 로그 렌더링
+def _task_header(event, task_name):
+    date = datetime.strptime(event['date'], '%Y-%m-%d').date()
+    kst_time = event['kst'][11:16]
+    return f"""{SEPARATOR}
+📅 {date} ({WEEKDAYS_KR[date.weekday()]}) - {task_name} ({kst_time} KST)
+{SEPARATOR}
+"""
+
+
+def render_morning(event):
+    """morning 이벤트 -> 통합 로그(trading_history) 텍스트"""
+    content = _task_header(event, 'Morning Task')
+
+    if event.get('error'):
+        content += f"🚨 에러 발생: {event['error']}\n"
+    elif not event['is_trading_day']:
+        content += "🚫 미국 시장 휴장일\n"
+    else:
+        content += "✅ 미국 시장 개장일\n\n"
+        content += "📊 주문 내역:\n"
+
+        orders = event.get('orders') or []
+        buys = [o for o in orders if o['side'] == 'BUY' and o['qty'] > 0]
+        sells = [o for o in orders if o['side'] == 'SELL']
+
+        # 매수 주문
+        if buys:
+            for order in buys:
+                content += f"  • LOC 매수: {order['qty']}주 @ ${order['price']:.2f}\n"
+        else:
+            content += "  • LOC 매수: 없음\n"
+
+        # 매도 주문 (여러건 가능)
+        if sells:
+            for order in sells:
+                if order['order_type'] == 'LOC':
+                    content += f"  • LOC 매도: {order['qty']}주 @ ${order['price']:.2f}\n"
+                else:
+                    content += f"  • MOC 매도: {order['qty']}주 (손절)\n"
+        else:
+            content += "  • 매도: 없음\n"
+
+        content += f"""
+💼 포트폴리오:
+  • 보유 주식: {event['holdings']}주
+  • 남은 잔고: ${event['funds']:.2f}
+"""
+
+    content += f"\n{DIVIDER}\n\n"
+    return content
+
+
+def render_evening(event):
+    """evening 이벤트 -> 통합 로그(trading_history) 텍스트"""
+    content = _task_header(event, 'Evening Task')
+
+    if event.get('error'):
+        content += f"🚨 에러 발생: {event['error']}\n"
+    elif not event['is_trading_day']:
+        content += "🚫 미국 시장 휴장일 - 종가 업데이트 없음\n"
+    else:
+        content += f"📈 종가 업데이트 완료: ${event['close']:.2f}\n"
+
+    content += f"\n{DIVIDER}\n\n"
+    return content
+
+
+def render_orders(event):
+    """morning 이벤트의 주문 목록 -> 주문 내역(orders_history) 텍스트"""
+    content = f"[{event['date']}] {event['kst'][11:19]} KST - Mode: {event['mode'].upper()}\n"
+
+    for order in event.get('orders') or []:
+        if order['side'] == 'BUY':
+            if order['qty'] > 0:
+                content += f"  BUY (LOC): {order['qty']} shares @ ${order['price']:.2f}\n"
+        elif order['order_type'] == 'LOC':
+            content += f"  SELL (LOC): {order['qty']} shares @ ${order['price']:.2f}\n"
+        else:
+            content += f"  SELL (MOC): {order['qty']} shares\n"
+
+    content += "\n"
+    return content
+
+
+def render_history(events):
+    """이벤트 목록 -> (통합 로그 텍스트, 주문 내역 텍스트)"""
+    history = []
+    orders = []
+    for event in events:
+        if event['type'] == 'morning':
+            history.append(render_morning(event))
+            if event.get('orders') is not None:
+                orders.append(render_orders(event))
+        elif event['type'] == 'evening':
+            history.append(render_evening(event))
+    return ''.join(history), ''.join(orders)
+
+
+if __name__ == "__main__":
+    '''
+    python event_log.py [dry-run|live] 시작일 [종료일] [이벤트타입,...]
+        예) python event_log.py dry-run 2025-12-15                 -> 해당일 전체 이벤트
+            python event_log.py dry-run 2025-12-01 2025-12-31 order -> 기간 내 주문
+    python event_log.py [dry-run|live] render 시작일 [종료일]     -> 통합 로그 형식으로 출력
+    '''
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
+    args = sys.argv[2:]
+    render = bool(args) and args[0] == 'render'
+    if render:
+        args = args[1:]
+
+    start = args[0] if len(args) > 0 else None
+    end = args[1] if len(args) > 1 else start
+    event_types = set(args[2].split(',')) if len(args) > 2 else None
+
+    log = EventLog(f'logs/{mode}/events', mode)
+    events = log.query(start, end, event_types)
+
+    if render:
+        history, _ = render_history(events)
+        print(history, end='')
+    else:
+        for event in events:
+            print(json.dumps(event, ensure_ascii=False))
+        print(f"# {len(events)} events", file=sys.stderr)
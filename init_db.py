@@ -2,12 +2,20 @@
 import sqlite3
 import os
 
-def create_tables():
-    """DB 테이블 생성"""
-    os.makedirs('data', exist_ok=True)
-    conn = sqlite3.connect('data/trading.db')
+DB_PATH = 'data/trading.db'
+
+
+def _add_column(cursor, table, column, declaration):
+    """기존 DB에 없는 컬럼 추가 (CREATE TABLE IF NOT EXISTS는 컬럼을 추가하지 않음)"""
+    columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+
+def ensure_schema(conn):
+    """테이블/인덱스가 없으면 생성"""
     cursor = conn.cursor()
-    
+
     # 가격 데이터 테이블
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS prices (
@@ -21,16 +29,198 @@ def create_tables():
             PRIMARY KEY (symbol, date)
         )
     ''')
-    
+
     # 인덱스 생성 (조회 성능)
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_prices_date 
+        CREATE INDEX IF NOT EXISTS idx_prices_date
         ON prices(symbol, date)
     ''')
-    
+
+    # 매수 회차(lot) 테이블 - 보유 중(open) / 청산(closed)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS strategy_lots (
+            mode TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            lot_id INTEGER NOT NULL,
+            buy_date DATE NOT NULL,
+            buy_price REAL NOT NULL,
+            quantity INTEGER NOT NULL,
+            days INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            sell_date DATE,
+            sell_price REAL,
+            sell_type TEXT,
+            return_pct REAL,
+            PRIMARY KEY (mode, symbol, lot_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_lots_status
+        ON strategy_lots(mode, symbol, status)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_lots_sell_date
+        ON strategy_lots(mode, symbol, sell_date)
+    ''')
+
+    # 일별 포트폴리오 스냅샷
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+            mode TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            date DATE NOT NULL,
+            close REAL NOT NULL,
+            funds REAL NOT NULL,
+            holdings INTEGER NOT NULL,
+            open_lots INTEGER NOT NULL,
+            equity REAL NOT NULL,
+            next_lot_id INTEGER NOT NULL,
+            config_key TEXT NOT NULL,
+            data_hash TEXT,
+            PRIMARY KEY (mode, symbol, date)
+        )
+    ''')
+    # data_hash: 이 날짜까지의 가격 이력 해시 (utils.data_version) - 원장 이어서 진행 시 과거 종가 수정 감지
+    _add_column(cursor, 'portfolio_snapshots', 'data_hash', 'TEXT')
+
+    # 다음 거래일 주문 계획 (evening task에서 미리 계산)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_plans (
+            mode TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            session_date DATE NOT NULL,
+            based_on_date DATE NOT NULL,
+            config_key TEXT NOT NULL,
+            buy_price REAL NOT NULL,
+            buy_qty INTEGER NOT NULL,
+            sell_orders TEXT NOT NULL,
+            funds REAL NOT NULL,
+            holdings INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            data_hash TEXT,
+            PRIMARY KEY (mode, symbol, session_date)
+        )
+    ''')
+    # data_hash: based_on_date까지의 가격 이력 해시 - 계획 저장 후 종가가 수정되면 계획 무효
+    _add_column(cursor, 'order_plans', 'data_hash', 'TEXT')
+
+    # 거래 이벤트 저널 (append-only) - 종가(mark), 입금(deposit), 매수(buy), 매도(sell/stop), 금액은 센트
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS journal_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            mode TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            date DATE NOT NULL,
+            type TEXT NOT NULL,
+            lot_id INTEGER,
+            price INTEGER,
+            quantity INTEGER,
+            amount INTEGER,
+            fee INTEGER,
+            created_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_journal_date
+        ON journal_events(mode, strategy, symbol, date, seq)
+    ''')
+
+    # 저널 스냅샷 - 해당일 마감 시점 상태 (seq까지 반영)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS journal_snapshots (
+            mode TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            date DATE NOT NULL,
+            seq INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            PRIMARY KEY (mode, strategy, symbol, date)
+        )
+    ''')
+
+    # 백테스트 결과 캐시 - (전략, 종목, 시작일, 파라미터)별 마지막 상태와 요약
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backtest_cache (
+            strategy TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            start_date DATE NOT NULL,
+            params TEXT NOT NULL,
+            last_date DATE NOT NULL,
+            data_hash TEXT NOT NULL,
+            state TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (strategy, symbol, start_date, params)
+        )
+    ''')
+
+    # 종목 마스터 (symbol_master.py) - 주문 거래소 코드 (NASD/NYSE/AMEX)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symbols (
+            symbol TEXT PRIMARY KEY,
+            exchange TEXT NOT NULL,
+            name TEXT,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+    # 모의 거래소 (paper_exchange.py) - 계좌 예수금/실현손익 (센트)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS paper_accounts (
+            account TEXT PRIMARY KEY,
+            cash INTEGER NOT NULL,
+            realized INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+    ''')
+
+    # 모의 거래소 보유 종목 - 매입금액은 매수 수수료 포함 (센트)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS paper_positions (
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            cost INTEGER NOT NULL,
+            PRIMARY KEY (account, symbol)
+        )
+    ''')
+
+    # 모의 거래소 주문 - status: open(접수) / filled / unfilled / rejected, 가격은 센트
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS paper_orders (
+            order_no INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL,
+            session_date DATE NOT NULL,
+            symbol TEXT NOT NULL,
+            side TEXT NOT NULL,
+            order_type TEXT NOT NULL,
+            price INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            filled_qty INTEGER NOT NULL DEFAULT 0,
+            fill_price INTEGER,
+            fee INTEGER NOT NULL DEFAULT 0,
+            reason TEXT,
+            created_at TEXT NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_paper_orders_session
+        ON paper_orders(account, session_date)
+    ''')
+
     conn.commit()
+
+
+def create_tables(db_path=DB_PATH):
+    """DB 테이블 생성"""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
     conn.close()
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    create_tables()
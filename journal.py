@@ -0,0 +1,219 @@
+# journal.py
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from init_db import DB_PATH, ensure_schema
+from money import to_dollars
+from utils import load_config, round_half_up_to_two
+
+'''
+이벤트 소싱 거래 저널 (journal_events / journal_snapshots)
+
+(모드, 전략, 종목)별로 모든 거래를 append-only 이벤트로 기록하고, SNAPSHOT_INTERVAL 거래일마다
+마감 시점 상태를 스냅샷으로 남긴다. 과거 시점의 보유 현황/평가액 곡선/보유 회차는
+그 이전 마지막 스냅샷 + 이후 이벤트 재생으로 계산한다 (시뮬레이션 재실행 없음).
+
+이벤트 (금액은 센트)
+    deposit : 입금 (amount)
+    mark    : 거래일 종가 (price) - 보유 주식이 있으면 보유 회차의 보유일 +1
+    sell    : 수익 실현 매도 (lot_id, price, quantity, amount, fee)
+    stop    : 보유기간 초과 손절 (sell과 같은 필드)
+    buy     : LOC 매수 (lot_id, price, quantity, amount, fee)
+'''
+
+SNAPSHOT_INTERVAL = 20  # 거래일
+
+
+def empty_state():
+    return {'date': None, 'close': 0, 'funds': 0, 'holdings': 0, 'lots': [], 'trade_id': 1, 'seq': 0}
+
+
+def apply_event(state, event):
+    """이벤트 1건 반영 (infinite_buy_step 과 같은 순서/규칙)"""
+    kind = event['type']
+    if kind == 'mark':
+        if state['holdings'] > 0:
+            for lot in state['lots']:
+                lot['days'] += 1
+        state['date'] = str(event['date'])
+        state['close'] = event['price']
+    elif kind == 'deposit':
+        state['funds'] += event['amount']
+    elif kind in ('sell', 'stop'):
+        state['funds'] += event['amount'] - event['fee']
+        state['holdings'] -= event['quantity']
+        state['lots'] = [lot for lot in state['lots'] if lot['id'] != event['lot_id']]
+    elif kind == 'buy':
+        state['funds'] -= event['amount'] + event['fee']
+        state['holdings'] += event['quantity']
+        state['lots'].append({'id': event['lot_id'], 'buy_date': str(event['date']), 'buy_price': event['price'],
+                              'quantity': event['quantity'], 'days': 1})
+        state['trade_id'] = event['lot_id'] + 1
+    else:
+        raise ValueError(f"Unknown journal event type: {kind}")
+    if 'seq' in event:
+        state['seq'] = event['seq']
+    return state
+
+
+def equity_cents(state):
+    return state['funds'] + state['close'] * state['holdings']
+
+
+class Journal:
+    """거래 이벤트 저널 - 기록과 시점별 조회"""
+
+    def __init__(self, db_path=DB_PATH, conn=None):
+        """
+        Args:
+            conn: 기존 연결 사용 (Ledger 트랜잭션 안에서 함께 기록할 때)
+        """
+        self.own_conn = conn is None
+        self.conn = conn or sqlite3.connect(db_path)
+        if self.own_conn:
+            ensure_schema(self.conn)
+
+    def close(self):
+        if self.own_conn:
+            self.conn.close()
+
+    def reset(self, mode, symbol, strategy=None):
+        """저널 초기화 (원장 재계산 시) - 트랜잭션은 호출자 관리"""
+        where, params = 'mode = ? AND symbol = ?', [mode, symbol]
+        if strategy:
+            where, params = where + ' AND strategy = ?', params + [strategy]
+        self.conn.execute(f'DELETE FROM journal_events WHERE {where}', params)
+        self.conn.execute(f'DELETE FROM journal_snapshots WHERE {where}', params)
+
+    # ---------------------------------------------------------------- 조회
+    def last_date(self, mode, strategy, symbol):
+        """마지막 이벤트 날짜 (원장 스냅샷과 맞는지 확인용)"""
+        row = self.conn.execute('''
+            SELECT MAX(date) FROM journal_events WHERE mode = ? AND strategy = ? AND symbol = ?
+        ''', (mode, strategy, symbol)).fetchone()
+        return row[0]
+
+    def _latest_snapshot(self, mode, strategy, symbol, as_of=None):
+        row = self.conn.execute('''
+            SELECT state FROM journal_snapshots
+            WHERE mode = ? AND strategy = ? AND symbol = ? AND date <= COALESCE(?, '9999-12-31')
+            ORDER BY date DESC LIMIT 1
+        ''', (mode, strategy, symbol, None if as_of is None else str(as_of))).fetchone()
+        return json.loads(row[0]) if row else empty_state()
+
+    def _events_after(self, mode, strategy, symbol, seq, end=None):
+        cursor = self.conn.execute('''
+            SELECT seq, date, type, lot_id, price, quantity, amount, fee FROM journal_events
+            WHERE mode = ? AND strategy = ? AND symbol = ? AND seq > ?
+              AND date <= COALESCE(?, '9999-12-31')
+            ORDER BY seq
+        ''', (mode, strategy, symbol, seq, None if end is None else str(end)))
+        columns = [c[0] for c in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    def state_at(self, mode, strategy, symbol, as_of=None):
+        """as_of 마감 시점 상태 (센트) - 마지막 스냅샷 + 이후 이벤트 재생"""
+        state = self._latest_snapshot(mode, strategy, symbol, as_of)
+        for event in self._events_after(mode, strategy, symbol, state['seq'], as_of):
+            apply_event(state, event)
+        return state
+
+    def position_at(self, mode, strategy, symbol, as_of=None):
+        """as_of 기준 보유 현황 (달러) - 예수금, 보유 주식 수, 평가액, 보유 회차"""
+        state = self.state_at(mode, strategy, symbol, as_of)
+        return {
+            'date': state['date'],
+            'close': to_dollars(state['close']),
+            'funds': to_dollars(state['funds']),
+            'holdings': state['holdings'],
+            'equity': to_dollars(equity_cents(state)),
+            'open_lots': [dict(lot, buy_price=to_dollars(lot['buy_price'])) for lot in state['lots']],
+        }
+
+    def equity_curve(self, mode, strategy, symbol, start=None, end=None):
+        """일별 마감 평가액 [(날짜, 평가액($))] - start 이전 마지막 스냅샷부터 재생"""
+        state = self._latest_snapshot(mode, strategy, symbol, start) if start else empty_state()
+        curve = []
+        for event in self._events_after(mode, strategy, symbol, state['seq'], end):
+            if event['type'] == 'mark' and state['date'] is not None and state['date'] != str(event['date']):
+                curve.append((state['date'], to_dollars(equity_cents(state))))
+            apply_event(state, event)
+        if state['date'] is not None:
+            curve.append((state['date'], to_dollars(equity_cents(state))))
+        return [(date, equity) for date, equity in curve if start is None or date >= str(start)]
+
+    # ---------------------------------------------------------------- 기록
+    def append(self, mode, strategy, symbol, events, snapshot_interval=SNAPSHOT_INTERVAL):
+        """이벤트 추가 + 주기적 스냅샷 - 트랜잭션은 호출자 관리 (with journal.conn / Ledger.save)
+
+        Args:
+            events: infinite_buy_step events 형식 [{'date', 'type', ...}] (날짜순)
+        """
+        if not events:
+            return
+        # 현재 상태 = 마지막 스냅샷 + 이후 이벤트 (스냅샷 주기 이내)
+        state = self._latest_snapshot(mode, strategy, symbol)
+        snapshot_date = state['date']
+        days_since = 0
+        for event in self._events_after(mode, strategy, symbol, state['seq']):
+            if event['type'] == 'mark':
+                days_since += 1
+            apply_event(state, event)
+
+        created_at = datetime.now().isoformat(timespec='seconds')
+        for event in events:
+            # 새 거래일 시작 전에 직전 거래일 마감 상태를 스냅샷
+            if event['type'] == 'mark' and days_since >= snapshot_interval and state['date'] != snapshot_date:
+                self._save_snapshot(mode, strategy, symbol, state)
+                snapshot_date, days_since = state['date'], 0
+            cursor = self.conn.execute('''
+                INSERT INTO journal_events
+                (mode, strategy, symbol, date, type, lot_id, price, quantity, amount, fee, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (mode, strategy, symbol, str(event['date'])[:10], event['type'], event.get('lot_id'),
+                  event.get('price'), event.get('quantity'), event.get('amount'), event.get('fee'), created_at))
+            apply_event(state, dict(event, date=str(event['date'])[:10], seq=cursor.lastrowid))
+            if event['type'] == 'mark':
+                days_since += 1
+
+    def _save_snapshot(self, mode, strategy, symbol, state):
+        self.conn.execute('''
+            INSERT OR REPLACE INTO journal_snapshots (mode, strategy, symbol, date, seq, state)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (mode, strategy, symbol, state['date'], state['seq'], json.dumps(state)))
+
+
+if __name__ == "__main__":
+    # python journal.py [dry-run|live] 날짜           - 해당일 마감 기준 보유 현황/보유 회차
+    # python journal.py [dry-run|live] curve [시작일] [종료일]  - 일별 평가액
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
+    config = load_config()
+    symbol = config['trading']['symbol']
+    initial_funds = config['trading']['initial_funds']
+
+    journal = Journal()
+    try:
+        if len(sys.argv) > 2 and sys.argv[2] == 'curve':
+            start = sys.argv[3] if len(sys.argv) > 3 else None
+            end = sys.argv[4] if len(sys.argv) > 4 else None
+            for date, equity in journal.equity_curve(mode, 'infinite_buy', symbol, start, end):
+                print(f"{date}  ${equity:,.2f}  ({round_half_up_to_two((equity / initial_funds - 1) * 100)}%)")
+        else:
+            as_of = sys.argv[2] if len(sys.argv) > 2 else None
+            position = journal.position_at(mode, 'infinite_buy', symbol, as_of)
+            print('='*80)
+            print(f"{position['date']} 기준 <포트폴리오> ({mode}, {symbol})")
+            print('='*80)
+            print(f"종가: ${position['close']:.2f}")
+            print(f"예수금: ${position['funds']:,.2f}")
+            print(f"보유수량: {position['holdings']}")
+            print(f"평가금액: ${position['equity']:,.2f}")
+            print(f"초기자금: ${initial_funds}")
+            print("<보유 회차>")
+            for lot in position['open_lots']:
+                print(f"- {lot['id']}회차: {lot['buy_date']} ${lot['buy_price']:.2f} x {lot['quantity']}주 "
+                      f"(보유 {lot['days']}일)")
+    finally:
+        journal.close()
@@ -6,23 +6,40 @@ import pickle
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
+import threading
 import time
 from dotenv import load_dotenv
+from tracing import Tracer, traced
+from api_metrics import EndpointMetrics
+from symbol_master import DEFAULT_EXCHANGE, load_master, quote_code, search_exchange, save_master
 
 load_dotenv()
 
 class KISApi:
     """한국투자증권 Open API 래퍼 - 실거래 전용"""
     
-    def __init__(self):
-        """실거래 전용 초기화"""
+    def __init__(self, tracer=None, base_url=None):
+        """실거래 전용 초기화
+
+        Args:
+            tracer: 단계별 소요시간 기록용 Tracer (없으면 기록하지 않음)
+            base_url: API 서버 주소 (기본: 환경변수 KIS_BASE_URL 또는 실거래 서버, 벤치마크 시 스텁 서버)
+        """
+        self.tracer = tracer or Tracer()
+        self.metrics = EndpointMetrics()
+        self.exchanges = {}  # 종목 -> 주문 거래소 코드 (symbol_master 캐시)
+        # 초당 요청 수 제한 (여러 스레드 공용, 한투 실거래 계좌 기준 초당 20건)
+        self.min_interval = 1 / float(os.getenv('KIS_MAX_RPS', 15))
+        self._rate_lock = threading.Lock()
+        self._next_request = 0.0
+        self._token_lock = threading.Lock()  # 동시 요청 시 토큰 중복 발급 방지
         self.app_key = os.getenv('APP_KEY')
         self.app_secret = os.getenv('APP_SECRET')
         self.account_number = os.getenv('ACCOUNT_NUMBER')
         self.account_code = os.getenv('ACCOUNT_CODE', '01')
         
         # 실거래 서버만 사용
-        self.base_url = "https://openapi.koreainvestment.com:9443"
+        self.base_url = base_url or os.getenv('KIS_BASE_URL', "https://openapi.koreainvestment.com:9443")
         
         self.access_token = None
         self.token_expired = None
@@ -72,6 +89,7 @@ class KISApi:
         
         return False
     
+    @traced('kis.token')
     def _load_or_refresh_token(self):
         """저장된 토큰 로드 또는 새로 발급"""
         if not self._load_token():
@@ -94,11 +112,12 @@ class KISApi:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                res = requests.post(url, headers=headers, data=json.dumps(body))
+                res, data = self._request('POST', url, headers, tr_id='tokenP',
+                                          retry=attempt > 0, data=json.dumps(body))
                 
                 if res.status_code == 200:
-                    data = res.json()
-                    
+                    if not data:
+                        raise Exception(f"Failed to get access token: empty or invalid response {res.text!r}")
                     # 에러 응답 체크
                     if 'error_code' in data:
                         if 'EGW00133' in data.get('error_code', ''):
@@ -116,7 +135,7 @@ class KISApi:
                     return
                     
                 else:
-                    error_data = res.json() if res.text else {}
+                    error_data = data if isinstance(data, dict) else {}
                     if 'EGW00133' in error_data.get('error_code', ''):
                         logging.warning(f"Token rate limit. Waiting 60 seconds... (attempt {attempt+1}/{max_retries})")
                         time.sleep(60)
@@ -133,12 +152,111 @@ class KISApi:
         
         raise Exception("Failed to get access token after all retries")
     
+    @traced('kis.approval_key')
+    def get_approval_key(self) -> str:
+        """실시간(웹소켓) 접속키 발급"""
+        path = "/oauth2/Approval"
+        url = self.base_url + path
+        
+        headers = {"content-type": "application/json; utf-8"}
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": self.app_key,
+            "secretkey": self.app_secret
+        }
+        
+        res, data = self._request('POST', url, headers, tr_id='Approval', data=json.dumps(body))
+        
+        if res.status_code == 200 and data and data.get('approval_key'):
+            return data['approval_key']
+        raise Exception(f"Failed to get approval key: {res.text}")
+    
+    @traced('kis.token_check')
     def _check_token(self):
-        """토큰 유효성 확인 및 갱신"""
-        if not self.access_token or datetime.now() >= self.token_expired:
-            logging.info("Token expired or not exists, refreshing...")
-            self._get_access_token()
-            self._save_token()
+        """토큰 유효성 확인 및 갱신 (실제 발급은 kis.token span으로 따로 기록)"""
+        with self._token_lock:
+            if not self.access_token or datetime.now() >= self.token_expired:
+                logging.info("Token expired or not exists, refreshing...")
+                with self.tracer.span('kis.token'):
+                    self._get_access_token()
+                    self._save_token()
+    
+    def _request(self, method: str, url: str, headers: Dict, tr_id: str = None,
+                 retry: bool = False, **kwargs):
+        """HTTP 요청 + TR_ID별 지연시간/상태코드/rt_cd 기록
+
+        Returns:
+            (response, JSON 본문 또는 None)
+        """
+        tr_id = tr_id or headers.get('tr_id', url.rsplit('/', 1)[-1])
+        self._throttle()
+        t0 = time.perf_counter()
+        try:
+            res = requests.request(method, url, headers=headers, **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.observe(tr_id, (time.perf_counter() - t0) * 1000, retry=retry, network_error=True)
+            raise
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        try:
+            data = res.json() if res.text else None
+        except ValueError:
+            data = None
+        rt_cd = data.get('rt_cd') if isinstance(data, dict) else None
+        self.metrics.observe(tr_id, elapsed_ms, status=res.status_code, rt_cd=rt_cd, retry=retry)
+        return res, data
+    
+    def _throttle(self):
+        """요청 간격 유지 (동시 요청 시 순서대로 슬롯 배정)"""
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+    
+    def exchange(self, symbol: str) -> str:
+        """종목의 주문 거래소 코드 (NASD/NYSE/AMEX) - 종목 마스터 조회, 없으면 API로 찾아 등록"""
+        if symbol not in self.exchanges:
+            exchange = load_master([symbol]).get(symbol)
+            if exchange is None:
+                found = search_exchange(self, symbol)
+                if found is None:  # 이번 실행 동안만 기본값 사용 (마스터에는 등록하지 않음)
+                    logging.warning(f"Exchange not found for {symbol} - using {DEFAULT_EXCHANGE}")
+                    exchange = DEFAULT_EXCHANGE
+                else:
+                    exchange = found[0]
+                    save_master([(symbol, exchange, found[1])])
+            self.exchanges[symbol] = exchange
+        return self.exchanges[symbol]
+    
+    @traced('kis.search_info')
+    def search_info(self, symbol: str, product_type: str) -> Dict:
+        """해외주식 상품기본정보 (product_type: 512 나스닥, 513 뉴욕, 529 아멕스)"""
+        self._check_token()
+        
+        path = "/uapi/overseas-price/v1/quotations/search-info"
+        url = self.base_url + path
+        
+        headers = {
+            "content-type": "application/json",
+            "authorization": f"Bearer {self.access_token}",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret,
+            "tr_id": "CTPF1702R",
+            "custtype": "P"
+        }
+        
+        params = {
+            "PRDT_TYPE_CD": product_type,
+            "PDNO": symbol
+        }
+        
+        res, data = self._request('GET', url, headers, params=params)
+        
+        if res.status_code == 200 and data and data.get('rt_cd') == '0':
+            return data.get('output') or {}
+        return {}
     
     def _make_hash(self, data: Dict) -> str:
         """해시값 생성 (실거래 주문용)"""
@@ -146,9 +264,12 @@ class KISApi:
         hash_obj = hashlib.sha256(data_str.encode())
         return hash_obj.hexdigest()
     
-    def get_overseas_price_daily(self, symbol: str, start_date: str, end_date: str) -> List[Dict]:
-        """해외 주식 일봉 조회"""
+    @traced('kis.get_overseas_price_daily')
+    def get_overseas_price_daily(self, symbol: str, start_date: str, end_date: str,
+                                 exchange: str = None) -> List[Dict]:
+        """해외 주식 일봉 조회 (exchange: 주문 거래소 코드, 기본: 종목 마스터)"""
         self._check_token()
+        excd = quote_code(exchange or self.exchange(symbol))
         
         path = "/uapi/overseas-price/v1/quotations/dailyprice"
         url = self.base_url + path
@@ -167,20 +288,18 @@ class KISApi:
         while current_end >= start_date:
             params = {
                 "AUTH": "",
-                "EXCD": "AMS",  # AMEX
+                "EXCD": excd,
                 "SYMB": symbol,
                 "GUBN": "0",  # 일봉
                 "BYMD": current_end,  # 조회 종료일
                 "MODP": "0"  # 수정주가 반영
             }
             
-            res = requests.get(url, headers=headers, params=params)
+            res, data = self._request('GET', url, headers, params=params)
             
             if res.status_code == 200:
-                data = res.json()
-                
-                if data['rt_cd'] != '0':
-                    logging.error(f"API Error: {data.get('msg1', 'Unknown error')}")
+                if not data or data.get('rt_cd') != '0':
+                    logging.error(f"API Error: {data.get('msg1', 'Unknown error') if data else 'empty response'}")
                     break
                 
                 output2 = data.get('output2', [])
@@ -224,10 +343,83 @@ class KISApi:
         
         logging.info(f"Loaded {len(all_data)} days of price data for {symbol}")
         return all_data
-    
-    def get_current_price(self, symbol: str = "SOXL") -> Dict:
+
+    @traced('kis.get_overseas_minute_bars')
+    def get_overseas_minute_bars(self, symbol: str, since: str = None, nmin: int = 1,
+                                 exchange: str = None, max_pages: int = None) -> List[Dict]:
+        """해외 주식 분봉 조회 - 최근 분봉부터 과거로 페이지 조회 (한투 제공 범위까지)
+
+        Args:
+            since: 이 시각(현지, 'YYYYMMDDHHMMSS') 이후 분봉만 (도달하면 조회 중단)
+            nmin: 분 간격
+
+        Returns:
+            [{'xymd', 'xhms'(현지 기준), 'open', 'high', 'low', 'close', 'volume'}] (오래된 순)
+        """
+        self._check_token()
+        excd = quote_code(exchange or self.exchange(symbol))
+
+        path = "/uapi/overseas-price/v1/quotations/inquire-time-itemchartprice"
+        url = self.base_url + path
+
+        headers = {
+            "content-type": "application/json; charset=utf-8",
+            "authorization": f"Bearer {self.access_token}",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret,
+            "tr_id": "HHDFS76950200",  # 해외주식 분봉 조회
+            "custtype": "P"
+        }
+
+        bars = {}
+        next_key, pages = "", 0
+        while max_pages is None or pages < max_pages:
+            params = {
+                "AUTH": "",
+                "EXCD": excd,
+                "SYMB": symbol,
+                "NMIN": str(nmin),
+                "PINC": "1",  # 전일 포함
+                "NEXT": "1" if next_key else "",
+                "NREC": "120",  # 페이지당 최대 건수
+                "FILL": "",
+                "KEYB": next_key
+            }
+
+            res, data = self._request('GET', url, headers, params=params)
+            if res.status_code != 200 or not data or data.get('rt_cd') != '0':
+                logging.error(f"Failed to get minute bars: {data.get('msg1') if data else res.text}")
+                break
+
+            output2 = data.get('output2') or []
+            pages += 1
+            for item in output2:
+                key = item['xymd'] + item['xhms']
+                if since is None or key > since:
+                    bars[key] = {
+                        'xymd': item['xymd'],
+                        'xhms': item['xhms'],
+                        'open': float(item['open']),
+                        'high': float(item['high']),
+                        'low': float(item['low']),
+                        'close': float(item['last']),
+                        'volume': int(item.get('evol') or 0)
+                    }
+
+            # 가장 오래된 분봉을 다음 조회 키로 (진행이 없거나 since 도달 시 종료)
+            oldest = min((item['xymd'] + item['xhms'] for item in output2), default=None)
+            if oldest is None or oldest == next_key or (since is not None and oldest <= since):
+                break
+            next_key = oldest
+
+        logging.info(f"Loaded {len(bars)} minute bars for {symbol} ({pages} pages)")
+        return [bars[key] for key in sorted(bars)]
+
+    @traced('kis.get_current_price')
+    def get_current_price(self, symbol: str = "SOXL", exchange: str = None) -> Dict:
         """현재가 조회"""
         self._check_token()
+        excd = quote_code(exchange or self.exchange(symbol))
         
         path = "/uapi/overseas-price/v1/quotations/price"
         url = self.base_url + path
@@ -242,25 +434,25 @@ class KISApi:
         
         params = {
             "AUTH": "",
-            "EXCD": "AMS",
+            "EXCD": excd,
             "SYMB": symbol
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res, data = self._request('GET', url, headers, params=params)
         
         if res.status_code == 200:
-            data = res.json()
-            if data['rt_cd'] == '0':
+            if data and data.get('rt_cd') == '0':
                 return data.get('output', {})
             else:
-                logging.error(f"API Error: {data.get('msg1')}")
+                logging.error(f"API Error: {data.get('msg1') if data else 'empty response'}")
                 return {}
         else:
             logging.error(f"Failed to get current price: {res.text}")
             return {}
     
-    def get_account_balance(self) -> Dict:
-        """계좌 잔고 조회"""
+    @traced('kis.get_account_balance')
+    def get_account_balance(self, exchange: str = "NASD") -> Dict:
+        """계좌 잔고 조회 (NASD는 미국 전체)"""
         self._check_token()
         
         path = "/uapi/overseas-stock/v1/trading/inquire-balance"
@@ -277,28 +469,28 @@ class KISApi:
         params = {
             "CANO": self.account_number,
             "ACNT_PRDT_CD": self.account_code,
-            "OVRS_EXCG_CD": "NASD",
+            "OVRS_EXCG_CD": exchange,
             "TR_CRCY_CD": "USD",
             "CTX_AREA_FK200": "",
             "CTX_AREA_NK200": ""
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res, data = self._request('GET', url, headers, params=params)
         
         if res.status_code == 200:
-            data = res.json()
-            if data['rt_cd'] == '0':
+            if data and data.get('rt_cd') == '0':
                 return data.get('output2', {})
             else:
-                logging.error(f"API Error: {data.get('msg1')}")
+                logging.error(f"API Error: {data.get('msg1') if data else 'empty response'}")
                 return {}
         else:
             logging.error(f"Failed to get account balance: {res.text}")
             return {}
     
+    @traced('kis.place_order', fail_on_unsuccessful=True)
     def place_order(self, order_type: str, symbol: str, quantity: int, 
-                   price: float = 0) -> Dict:
-        """주문 제출"""
+                   price: float = 0, exchange: str = None) -> Dict:
+        """주문 제출 (exchange: 주문 거래소 코드, 기본: 종목 마스터)"""
         self._check_token()
         
         path = "/uapi/overseas-stock/v1/trading/order"
@@ -323,7 +515,7 @@ class KISApi:
         body = {
             "CANO": self.account_number,
             "ACNT_PRDT_CD": self.account_code,
-            "OVRS_EXCG_CD": "AMEX",
+            "OVRS_EXCG_CD": exchange or self.exchange(symbol),
             "PDNO": symbol,
             "ORD_QTY": str(quantity),
             "OVRS_ORD_UNPR": str(price) if price > 0 else "0",
@@ -341,20 +533,21 @@ class KISApi:
             "hashkey": self._make_hash(body)  # 실거래는 항상 해시 필요
         }
         
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res, data = self._request('POST', url, headers, data=json.dumps(body))
         
         if res.status_code == 200:
-            data = res.json()
-            if data['rt_cd'] == '0':
+            if data and data.get('rt_cd') == '0':
                 logging.info(f"Order placed successfully: {order_type} {quantity} {symbol}")
                 return {'success': True, 'data': data.get('output', {})}
             else:
-                logging.error(f"Order failed: {data.get('msg1')}")
-                return {'success': False, 'msg': data.get('msg1')}
+                msg = data.get('msg1') if data else f"empty response {res.text!r}"
+                logging.error(f"Order failed: {msg}")
+                return {'success': False, 'msg': msg}
         else:
             logging.error(f"Order request failed: {res.text}")
             return {'success': False, 'msg': res.text}
     
+    @traced('kis.get_orders')
     def get_orders(self) -> List[Dict]:
         """당일 주문 내역 조회"""
         self._check_token()
@@ -382,14 +575,13 @@ class KISApi:
             "CTX_AREA_NK200": ""
         }
         
-        res = requests.get(url, headers=headers, params=params)
+        res, data = self._request('GET', url, headers, params=params)
         
         if res.status_code == 200:
-            data = res.json()
-            if data['rt_cd'] == '0':
+            if data and data.get('rt_cd') == '0':
                 return data.get('output', [])
             else:
-                logging.error(f"Failed to get orders: {data.get('msg1')}")
+                logging.error(f"Failed to get orders: {data.get('msg1') if data else 'empty response'}")
                 return []
         else:
             logging.error(f"Failed to get orders: {res.text}")
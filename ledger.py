@@ -0,0 +1,216 @@
+# ledger.py
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from init_db import DB_PATH, ensure_schema
+from journal import Journal
+from money import to_cents, to_dollars
+from utils import load_config, round_half_up_to_two
+
+
+def make_config_key(start_date, initial_funds, buy_portion, fee, welfare):
+    """전략 파라미터 식별자 - 바뀌면 기존 원장은 무효"""
+    return f"start={start_date}|funds={initial_funds}|portion={buy_portion}|fee={fee}|welfare={int(bool(welfare))}"
+
+
+def _to_date(value):
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+class Ledger:
+    """trading.db 기반 전략 원장 - 매수 회차, 청산 거래, 일별 포트폴리오 스냅샷"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        ensure_schema(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def latest_snapshot(self, mode, symbol):
+        """가장 최근 스냅샷 (보유 회차 테이블은 항상 이 시점 기준)"""
+        row = self.conn.execute('''
+            SELECT * FROM portfolio_snapshots
+            WHERE mode = ? AND symbol = ?
+            ORDER BY date DESC LIMIT 1
+        ''', (mode, symbol)).fetchone()
+        return dict(row) if row else None
+
+    def load_open_lots(self, mode, symbol):
+        """보유 중인 회차만 로드 (infinite_buy_today의 buy_records 형식)"""
+        rows = self.conn.execute('''
+            SELECT lot_id, buy_date, buy_price, quantity, days FROM strategy_lots
+            WHERE mode = ? AND symbol = ? AND status = 'open'
+            ORDER BY lot_id
+        ''', (mode, symbol)).fetchall()
+        return [{
+            'id': row['lot_id'],
+            'buy_date': _to_date(row['buy_date']),
+            'buy_price': row['buy_price'],
+            'quantity': row['quantity'],
+            'days': row['days'],
+            'type': 'LOC 매수',
+        } for row in rows]
+
+    def load_state(self, mode, symbol, snapshot):
+        """스냅샷 + 보유 회차 -> 시뮬레이션 상태 (센트 단위)"""
+        return {
+            'funds': to_cents(snapshot['funds']),
+            'holdings': snapshot['holdings'],
+            'buy_records': [dict(record, buy_price=to_cents(record['buy_price']))
+                            for record in self.load_open_lots(mode, symbol)],
+            'trade_id': snapshot['next_lot_id'],
+        }
+
+    def reset(self, mode, symbol):
+        """원장 초기화 (파라미터 변경/가격 이력 변경 시) - 거래 저널 포함"""
+        with self.conn:
+            self.conn.execute('DELETE FROM strategy_lots WHERE mode = ? AND symbol = ?', (mode, symbol))
+            self.conn.execute('DELETE FROM portfolio_snapshots WHERE mode = ? AND symbol = ?', (mode, symbol))
+            Journal(conn=self.conn).reset(mode, symbol)
+
+    def save(self, mode, symbol, state, trade_history, snapshots, config_key, events=None, strategy='infinite_buy',
+             data_hash=None):
+        """시뮬레이션 진행 결과를 하나의 트랜잭션으로 기록
+
+        Args:
+            state: 진행 후 상태 (funds, holdings, buy_records, trade_id) - 센트 단위
+            trade_history: 이번 진행에서 청산된 회차 (infinite_buy_step 형식, 센트 단위)
+            snapshots: 이번 진행의 일별 (날짜, 종가, 예수금, 보유 주식 수, 보유 회차 수, 다음 회차 ID) - 달러
+            events: 이번 진행의 거래 이벤트 (선택, 거래 저널에 추가)
+            data_hash: 마지막 스냅샷 날짜까지의 가격 이력 해시 (마지막 스냅샷에만 기록)
+        """
+        with self.conn:
+            if events:
+                Journal(conn=self.conn).append(mode, strategy, symbol, events)
+
+            lot_rows = [(mode, symbol, r['id'], str(r['buy_date']), to_dollars(r['buy_price']), r['quantity'],
+                         r['days'], 'open', None, None, None, None)
+                        for r in state['buy_records']]
+            lot_rows += [(mode, symbol, t['id'], str(t['buy_date']), to_dollars(t['buy_price']), t['quantity'],
+                          t['days'], 'closed', str(t['sell_date']), to_dollars(t['sell_price']), t['sell_type'],
+                          round_half_up_to_two((t['sell_price'] / t['buy_price'] - 1) * 100))
+                         for t in trade_history]
+            self.conn.executemany('''
+                INSERT INTO strategy_lots
+                (mode, symbol, lot_id, buy_date, buy_price, quantity, days, status,
+                 sell_date, sell_price, sell_type, return_pct)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(mode, symbol, lot_id) DO UPDATE SET
+                    days = excluded.days, status = excluded.status,
+                    sell_date = excluded.sell_date, sell_price = excluded.sell_price,
+                    sell_type = excluded.sell_type, return_pct = excluded.return_pct
+            ''', lot_rows)
+
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO portfolio_snapshots
+                (mode, symbol, date, close, funds, holdings, open_lots, equity, next_lot_id, config_key, data_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(mode, symbol, str(date), close, funds, holdings, open_lots, funds + close * holdings,
+                   next_lot_id, config_key, data_hash if i == len(snapshots) - 1 else None)
+                  for i, (date, close, funds, holdings, open_lots, next_lot_id) in enumerate(snapshots)])
+
+    # ---------------------------------------------------------------- 주문 계획
+    def save_plan(self, mode, symbol, session_date, based_on_date, config_key,
+                  buy_price, buy_qty, sell_orders, funds, holdings, data_hash=None):
+        """다음 거래일 주문 계획 저장 (같은 세션은 덮어씀)
+
+        Args:
+            data_hash: based_on_date까지의 가격 이력 해시 (utils.data_version)
+        """
+        with self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO order_plans
+                (mode, symbol, session_date, based_on_date, config_key, buy_price, buy_qty,
+                 sell_orders, funds, holdings, created_at, data_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (mode, symbol, str(session_date), str(based_on_date), config_key, buy_price, buy_qty,
+                  json.dumps([list(order) for order in sell_orders]), funds, holdings,
+                  datetime.now().isoformat(timespec='seconds'), data_hash))
+
+    def load_plan(self, mode, symbol, session_date):
+        """주문 계획 로드 (sell_orders는 (유형, 가격, 수량) 튜플 목록으로 복원)"""
+        row = self.conn.execute('''
+            SELECT * FROM order_plans WHERE mode = ? AND symbol = ? AND session_date = ?
+        ''', (mode, symbol, str(session_date))).fetchone()
+        if row is None:
+            return None
+        plan = dict(row)
+        plan['sell_orders'] = [tuple(order) for order in json.loads(plan['sell_orders'])]
+        return plan
+
+    def last_price_date(self, symbol, before):
+        """before 이전 마지막 가격 날짜"""
+        row = self.conn.execute(
+            'SELECT MAX(date) FROM prices WHERE symbol = ? AND date < ?', (symbol, str(before))).fetchone()
+        return row[0]
+
+    # ---------------------------------------------------------------- 리포트
+    def trade_stats(self, mode, symbol, start=None, end=None):
+        """청산 거래 통계 (기간은 매도일 기준)"""
+        row = self.conn.execute('''
+            SELECT COUNT(*) AS trades,
+                   AVG(days) AS avg_days,
+                   AVG(return_pct) AS avg_return,
+                   SUM(CASE WHEN return_pct > 0 THEN 1 ELSE 0 END) AS wins,
+                   SUM(CASE WHEN sell_type = 'MOC' THEN 1 ELSE 0 END) AS stops
+            FROM strategy_lots
+            WHERE mode = ? AND symbol = ? AND status = 'closed'
+              AND sell_date BETWEEN COALESCE(?, '0000-00-00') AND COALESCE(?, '9999-12-31')
+        ''', (mode, symbol, start, end)).fetchone()
+        return dict(row)
+
+    def equity_curve(self, mode, symbol, start=None, end=None):
+        """일별 평가액 [(날짜, 평가액)]"""
+        return [tuple(row) for row in self.conn.execute('''
+            SELECT date, equity FROM portfolio_snapshots
+            WHERE mode = ? AND symbol = ?
+              AND date BETWEEN COALESCE(?, '0000-00-00') AND COALESCE(?, '9999-12-31')
+            ORDER BY date
+        ''', (mode, symbol, start, end))]
+
+
+if __name__ == "__main__":
+    # python ledger.py [dry-run|live] [시작일] [종료일]  - 원장 기준 리포트 (시뮬레이션 재실행 없음)
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
+    start = sys.argv[2] if len(sys.argv) > 2 else None
+    end = sys.argv[3] if len(sys.argv) > 3 else None
+    config = load_config()
+    symbol = config['trading']['symbol']
+    initial_funds = config['trading']['initial_funds']
+
+    ledger = Ledger()
+    stats = ledger.trade_stats(mode, symbol, start, end)
+    curve = ledger.equity_curve(mode, symbol, start, end)
+    open_lots = ledger.load_open_lots(mode, symbol)
+    ledger.close()
+
+    print('\n' + '='*80)
+    print(f"매매 통계 ({mode}, {symbol})")
+    print('='*80)
+    print(f"총 매매 횟수: {stats['trades']} 회 (손절 {stats['stops'] or 0} 회)")
+    if stats['trades']:
+        print(f"평균 보유기간: {stats['avg_days']:.1f} 일")
+        print(f"평균 수익률: {stats['avg_return']:.2f}%")
+        print(f"승률: {stats['wins'] / stats['trades'] * 100:.2f}%")
+
+    if curve:
+        peak = curve[0][1]
+        mdd = 0.0
+        for _, equity in curve:
+            peak = max(peak, equity)
+            mdd = min(mdd, (equity - peak) / peak * 100)
+        print('\n' + '='*80)
+        print(f"{curve[0][0]} ~ {curve[-1][0]} 동안의 자산 변동 결과")
+        print('='*80)
+        print(f"최초 보유 금액: ${initial_funds:,.2f}")
+        print(f"최종 보유 금액: ${curve[-1][1]:,.2f}")
+        print(f"원금 변화율: {round_half_up_to_two((curve[-1][1] / initial_funds - 1) * 100)}%")
+        print(f"MDD: {mdd:.2f}%")
+
+    print('\n<보유회차>')
+    for record in open_lots:
+        print(f"{record['id']}회차 - 매수일:{record['buy_date']} 매수가:{record['buy_price']} "
+              f"수량:{record['quantity']} 보유기간:{record['days']}")
@@ -1,7 +1,12 @@
 # load_data.py
+import logging
 import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from init_db import DB_PATH, ensure_schema
 from kis_api import KISApi
+from symbol_master import resolve
 import sys
 
 def load_historical_data(symbol, start_date, end_date):
@@ -20,6 +25,8 @@ def load_historical_data(symbol, start_date, end_date):
         symbol, start_yyyymmdd, end_yyyymmdd
     )
     
+    kis.metrics.flush()
+    
     if not price_data:
         print("No data received")
         return False
@@ -42,12 +49,83 @@ def load_historical_data(symbol, start_date, end_date):
     print(f"Saved {len(price_data)} days of data")
     return True
 
+
+def load_bulk(symbols, start_date, end_date, workers=4, db_path=DB_PATH, kis=None):
+    """여러 종목 일봉 일괄 적재 - 거래소 확인 -> 동시 다운로드 (KISApi 초당 요청 수 제한 공유) -> 한 트랜잭션 저장
+
+    Returns:
+        {종목: 적재 행 수} (거래소/데이터를 찾지 못한 종목은 0)
+    """
+    kis = kis or KISApi()
+    started = time.perf_counter()
+    start_yyyymmdd = start_date.replace('-', '')
+    end_yyyymmdd = end_date.replace('-', '')
+
+    exchanges = resolve(kis, symbols, db_path, workers)
+    targets = [symbol for symbol in symbols if symbol in exchanges]
+    print(f"Resolved {len(targets)}/{len(symbols)} symbols: "
+          + ', '.join(f"{symbol}({exchanges[symbol]})" for symbol in targets))
+
+    def fetch(symbol):
+        try:
+            return kis.get_overseas_price_daily(symbol, start_yyyymmdd, end_yyyymmdd, exchanges[symbol])
+        except Exception as e:
+            logging.error(f"Failed to load {symbol}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(zip(targets, pool.map(fetch, targets)))
+    kis.metrics.flush()
+
+    rows = [(symbol, data['date'].isoformat(), data['open'], data['high'], data['low'], data['close'],
+             data['volume'])
+            for symbol, price_data in results.items() for data in price_data]
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_schema(conn)
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO prices (symbol, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    finally:
+        conn.close()
+
+    counts = {symbol: len(results.get(symbol, [])) for symbol in symbols}
+    print(f"Saved {len(rows)} rows for {sum(1 for n in counts.values() if n)} symbols "
+          f"in {time.perf_counter() - started:.1f}s")
+    for symbol, n in counts.items():
+        if n == 0:
+            print(f"- {symbol}: no data")
+    return counts
+
+
+def read_symbols(arg):
+    """'SOXL,TQQQ' 또는 '@파일' (한 줄에 한 종목, # 주석)"""
+    if arg.startswith('@'):
+        with open(arg[1:], 'r', encoding='utf-8') as f:
+            items = [line.split('#')[0] for line in f]
+    else:
+        items = arg.split(',')
+    return list(dict.fromkeys(item.strip().upper() for item in items if item.strip()))
+
+
 if __name__ == "__main__":
-    # 2년치 데이터 로드
+    # python load_data.py                                          - SOXL 2년치
+    # python load_data.py 종목1,종목2,...|@종목파일 [시작일] [종료일] [동시요청수]  - 여러 종목 일괄 적재
     end_date = datetime.now().strftime('%Y-%m-%d')
     start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
-    
+
+    if len(sys.argv) > 1:
+        logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+        symbols = read_symbols(sys.argv[1])
+        start_date = sys.argv[2] if len(sys.argv) > 2 else start_date
+        end_date = sys.argv[3] if len(sys.argv) > 3 else end_date
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+        counts = load_bulk(symbols, start_date, end_date, workers)
+        sys.exit(0 if all(counts.values()) else 1)
+
     if load_historical_data('SOXL', start_date, end_date):
         print("Data loading complete!")
     else:
-        print("Data loading failed!")
\ No newline at end of file
+        print("Data loading failed!")
@@ -0,0 +1,214 @@
+# market_calendar.py
+import base64
+import json
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+from pytz import timezone
+
+CALENDAR_PATH = 'data/nyse_calendar.json'
+CALENDAR_VERSION = 1
+CALENDAR_START = date(2015, 1, 1)  # 기본 생성 시작일
+CALENDAR_YEARS_AHEAD = 2           # 올해 이후 생성할 연도 수
+STALE_MARGIN_DAYS = 180            # 남은 기간이 이보다 짧으면 재생성
+
+REGULAR_OPEN = time(9, 30)   # 정규장 시작 (ET)
+REGULAR_CLOSE = time(16, 0)  # 정규장 마감 (ET)
+
+ET = timezone('US/Eastern')
+KST = timezone('Asia/Seoul')
+
+
+def _to_date(d):
+    """문자열/datetime/date -> date"""
+    if isinstance(d, datetime):
+        return d.date()
+    if isinstance(d, date):
+        return d
+    return datetime.strptime(str(d)[:10], '%Y-%m-%d').date()
+
+
+class TradingCalendar:
+    """NYSE 거래일 비트맵 - 거래일/다음·이전 거래일/거래일 수를 O(1)로 조회"""
+
+    def __init__(self, start, end, session_bits, special_times=None, generated_at=None):
+        """
+        Args:
+            start, end: 비트맵이 커버하는 기간 (양끝 포함)
+            session_bits: 하루 1비트, start부터 순서대로 (bytes)
+            special_times: 정규 시간과 다른 세션 {'YYYY-MM-DD': ['HH:MM', 'HH:MM']} (ET 개장/마감)
+        """
+        self.start = start
+        self.end = end
+        self.session_bits = session_bits
+        self.special_times = special_times or {}
+        self.generated_at = generated_at
+
+        num_days = (end - start).days + 1
+        flags = [(session_bits[o >> 3] >> (o & 7)) & 1 for o in range(num_days)]
+
+        # _cum[o] = start ~ (o-1)일까지의 거래일 수, _sessions[k] = k번째 거래일의 offset
+        self._cum = [0] + list(accumulate(flags))
+        self._sessions = [o for o, flag in enumerate(flags) if flag]
+
+    # ---------------------------------------------------------------- 생성/저장
+    @classmethod
+    def build(cls, start=CALENDAR_START, end=None):
+        """pandas_market_calendars로 비트맵 생성"""
+        import pandas_market_calendars as mcal
+
+        start = _to_date(start)
+        if end is None:
+            end = date(date.today().year + CALENDAR_YEARS_AHEAD, 12, 31)
+        end = _to_date(end)
+
+        schedule = mcal.get_calendar('NYSE').schedule(start_date=start, end_date=end)
+
+        num_days = (end - start).days + 1
+        bits = bytearray((num_days + 7) // 8)
+        special_times = {}
+        for session, row in schedule.iterrows():
+            o = (session.date() - start).days
+            bits[o >> 3] |= 1 << (o & 7)
+
+            open_et = row['market_open'].tz_convert(ET).time()
+            close_et = row['market_close'].tz_convert(ET).time()
+            if open_et != REGULAR_OPEN or close_et != REGULAR_CLOSE:
+                special_times[session.date().isoformat()] = [
+                    open_et.strftime('%H:%M'), close_et.strftime('%H:%M')]
+
+        return cls(start, end, bytes(bits), special_times,
+                   generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def save(self, path=CALENDAR_PATH):
+        """JSON 아티팩트로 저장"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = {
+            'version': CALENDAR_VERSION,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'generated_at': self.generated_at,
+            'sessions': base64.b64encode(self.session_bits).decode('ascii'),
+            'special_times': self.special_times,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, path=CALENDAR_PATH):
+        """JSON 아티팩트 로드 (없거나 버전이 다르면 None)"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CALENDAR_VERSION:
+            return None
+        return cls(_to_date(data['start']), _to_date(data['end']),
+                   base64.b64decode(data['sessions']), data.get('special_times', {}),
+                   generated_at=data.get('generated_at'))
+
+    def is_stale(self, today=None, margin_days=STALE_MARGIN_DAYS):
+        """커버 기간이 오늘 + margin 보다 짧으면 stale"""
+        today = _to_date(today) if today else date.today()
+        return self.end < today + timedelta(days=margin_days)
+
+    def covers(self, *dates):
+        return all(self.start <= _to_date(d) <= self.end for d in dates)
+
+    # ---------------------------------------------------------------- 조회
+    def _offset(self, d):
+        d = _to_date(d)
+        if not self.start <= d <= self.end:
+            raise ValueError(f"{d} is outside calendar range {self.start} ~ {self.end}")
+        return (d - self.start).days
+
+    def _session_date(self, k):
+        if not 0 <= k < len(self._sessions):
+            return None
+        return self.start + timedelta(days=self._sessions[k])
+
+    def is_trading_day(self, d):
+        """거래일 여부"""
+        o = self._offset(d)
+        return self._cum[o + 1] > self._cum[o]
+
+    def next_session(self, d, inclusive=False):
+        """d 이후 첫 거래일 (inclusive=True면 d 포함)"""
+        o = self._offset(d)
+        return self._session_date(self._cum[o] if inclusive else self._cum[o + 1])
+
+    def previous_session(self, d, inclusive=False):
+        """d 이전 마지막 거래일 (inclusive=True면 d 포함)"""
+        o = self._offset(d)
+        return self._session_date((self._cum[o + 1] if inclusive else self._cum[o]) - 1)
+
+    def sessions_between(self, start, end):
+        """start ~ end (양끝 포함) 거래일 수"""
+        a, b = self._offset(start), self._offset(end)
+        if b < a:
+            return 0
+        return self._cum[b + 1] - self._cum[a]
+
+    def sessions(self, start, end):
+        """start ~ end (양끝 포함) 거래일 목록"""
+        a, b = self._offset(start), self._offset(end)
+        if b < a:
+            return []
+        return [self.start + timedelta(days=self._sessions[k]) for k in range(self._cum[a], self._cum[b + 1])]
+
+    def add_sessions(self, d, n):
+        """d에서 n 거래일 이동한 날짜 (휴장일이면 n=1이 다음 거래일, n=-1이 이전 거래일)"""
+        o = self._offset(d)
+        k = self._cum[o]  # d 당일 또는 d 이후 첫 거래일의 순번
+        if n > 0 and not self.is_trading_day(d):
+            k -= 1
+        return self._session_date(k + n)
+
+    def is_early_close(self, d):
+        """조기 폐장일 여부"""
+        times = self.special_times.get(_to_date(d).isoformat())
+        return times is not None and times[1] < REGULAR_CLOSE.strftime('%H:%M')
+
+    def _session_time(self, d, which):
+        d = _to_date(d)
+        if not self.is_trading_day(d):
+            return None
+        times = self.special_times.get(d.isoformat())
+        if times:
+            t = datetime.strptime(times[which], '%H:%M').time()
+        else:
+            t = REGULAR_OPEN if which == 0 else REGULAR_CLOSE
+        return ET.localize(datetime.combine(d, t))
+
+    def session_open(self, d, tz=ET):
+        """개장 시각 (기본 ET, tz=KST로 한국시간)"""
+        dt = self._session_time(d, 0)
+        return dt.astimezone(tz) if dt else None
+
+    def session_close(self, d, tz=ET):
+        """마감 시각 (기본 ET, tz=KST로 한국시간)"""
+        dt = self._session_time(d, 1)
+        return dt.astimezone(tz) if dt else None
+
+
+def load_calendar(path=CALENDAR_PATH, today=None):
+    """캐시된 거래일 비트맵 로드, 없거나 오래되면 재생성"""
+    calendar = TradingCalendar.load(path)
+    if calendar is None or calendar.is_stale(today):
+        calendar = TradingCalendar.build()
+        calendar.save(path)
+    return calendar
+
+
+if __name__ == "__main__":
+    # python market_calendar.py [시작일 종료일]  - 비트맵 재생성
+    start = sys.argv[1] if len(sys.argv) > 1 else CALENDAR_START
+    end = sys.argv[2] if len(sys.argv) > 2 else None
+    calendar = TradingCalendar.build(start, end)
+    calendar.save()
+
+    num_sessions = calendar.sessions_between(calendar.start, calendar.end)
+    early = sum(1 for d in calendar.special_times if calendar.is_early_close(d))
+    print(f"Calendar saved: {CALENDAR_PATH}")
+    print(f"기간: {calendar.start} ~ {calendar.end} / 거래일 {num_sessions}일 / 조기폐장 {early}일")
@@ -0,0 +1,224 @@
+# minute_bars.py
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from init_db import DB_PATH
+from market_calendar import ET
+
+'''
+분봉 저장소 (trading.db 밖, 종목/월별 Parquet 파티션)
+
+    data/minute/{종목}/{YYYY-MM}.parquet   (월은 미국 동부시간 기준)
+
+- 컬럼: ts(UTC, 초), open, high, low, close, volume - ts 순 정렬, 중복 ts 없음
+- zstd 압축, ROW_GROUP_ROWS 단위 row group (ts 통계로 구간 밖 row group은 읽지 않음)
+- 적재는 월 파티션 단위 병합 후 임시 파일 -> 교체 (재실행/중복 적재 안전)
+- 조회는 구간에 걸친 월 파일만 골라 pyarrow dataset으로 한 번에 스캔
+'''
+
+MINUTE_DIR = 'data/minute'
+ROW_GROUP_ROWS = 4096  # 정규장 약 10거래일
+
+BAR_SCHEMA = pa.schema([
+    ('ts', pa.timestamp('s', tz='UTC')),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('volume', pa.int64()),
+])
+
+
+def partition_path(symbol, month, base_dir=MINUTE_DIR):
+    return os.path.join(base_dir, symbol, f'{month}.parquet')
+
+
+def list_partitions(symbol, base_dir=MINUTE_DIR):
+    """[(월, 경로)] 오래된 순"""
+    paths = sorted(glob.glob(os.path.join(base_dir, symbol, '*.parquet')))
+    return [(os.path.basename(path)[:7], path) for path in paths]
+
+
+def _to_utc(value):
+    """날짜/시각 문자열 또는 datetime -> UTC Timestamp (시간대 없으면 미국 동부시간)"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(ET)
+    return ts.tz_convert('UTC')
+
+
+def bars_to_table(bars):
+    """KISApi.get_overseas_minute_bars 결과 (현지 시각) -> Arrow 테이블"""
+    frame = pd.DataFrame(bars)
+    local = pd.to_datetime(frame['xymd'] + frame['xhms'], format='%Y%m%d%H%M%S')
+    frame['ts'] = local.dt.tz_localize(ET).dt.tz_convert('UTC')
+    return pa.Table.from_pandas(frame[BAR_SCHEMA.names], schema=BAR_SCHEMA, preserve_index=False)
+
+
+def write_bars(symbol, table, base_dir=MINUTE_DIR):
+    """분봉 테이블을 월 파티션에 병합 (같은 ts는 새 값으로 교체)
+
+    Returns:
+        {월: 파티션 행 수}
+    """
+    if table.num_rows == 0:
+        return {}
+    table = table.cast(BAR_SCHEMA)
+    months = pc.strftime(table['ts'].cast(pa.timestamp('s', tz=str(ET))), format='%Y-%m')
+    os.makedirs(os.path.join(base_dir, symbol), exist_ok=True)
+
+    written = {}
+    for month in pc.unique(months).to_pylist():
+        new = table.filter(pc.equal(months, month))
+        path = partition_path(symbol, month, base_dir)
+        if os.path.exists(path):
+            old = pq.read_table(path, schema=BAR_SCHEMA)
+            old = old.filter(pc.invert(pc.is_in(old['ts'], value_set=new['ts'])))
+            new = pa.concat_tables([old, new])
+        new = new.sort_by('ts')
+        # 새 배치 안의 중복 ts는 마지막 값 유지
+        ts = new['ts'].cast(pa.int64()).to_numpy()
+        if len(ts) > 1 and (ts[1:] == ts[:-1]).any():
+            new = new.filter(pa.array(np.append(ts[1:] != ts[:-1], True)))
+
+        tmp_path = path + '.tmp'
+        pq.write_table(new, tmp_path, compression='zstd', row_group_size=ROW_GROUP_ROWS)
+        os.replace(tmp_path, path)
+        written[month] = new.num_rows
+    return written
+
+
+def last_timestamp(symbol, base_dir=MINUTE_DIR):
+    """저장된 마지막 분봉 시각 (UTC Timestamp, 없으면 None) - 마지막 파티션의 row group 통계만 읽음"""
+    partitions = list_partitions(symbol, base_dir)
+    if not partitions:
+        return None
+    metadata = pq.ParquetFile(partitions[-1][1]).metadata
+    column = BAR_SCHEMA.get_field_index('ts')
+    stats = [metadata.row_group(i).column(column).statistics for i in range(metadata.num_row_groups)]
+    latest = pd.Timestamp(max(s.max for s in stats if s is not None and s.has_min_max))
+    return latest.tz_localize('UTC') if latest.tzinfo is None else latest.tz_convert('UTC')
+
+
+def read_bars(symbol, start=None, end=None, columns=None, base_dir=MINUTE_DIR, as_table=False):
+    """start ~ end (양끝 포함) 분봉 - 구간에 걸친 월 파일만 스캔
+
+    Args:
+        start, end: 날짜/시각 (시간대 없으면 미국 동부시간, 날짜만 주면 end는 그날 마지막 분봉까지)
+        as_table: True면 Arrow 테이블 그대로 반환 (pandas 변환 생략)
+
+    Returns:
+        DataFrame (ts 인덱스, 미국 동부시간) 또는 Arrow 테이블
+    """
+    start_ts = _to_utc(start) if start is not None else None
+    end_ts = None
+    if end is not None:
+        end_ts = _to_utc(end)
+        if isinstance(end, str) and len(end) <= 10:  # 날짜만 -> 다음날 0시 전까지
+            end_ts = _to_utc(pd.Timestamp(end) + pd.Timedelta(days=1)) - pd.Timedelta(seconds=1)
+
+    first = start_ts.tz_convert(ET).strftime('%Y-%m') if start_ts is not None else '0000-00'
+    last = end_ts.tz_convert(ET).strftime('%Y-%m') if end_ts is not None else '9999-99'
+    paths = [path for month, path in list_partitions(symbol, base_dir) if first <= month <= last]
+    if not paths:
+        table = BAR_SCHEMA.empty_table()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        condition = None
+        if start_ts is not None:
+            condition = ds.field('ts') >= pa.scalar(start_ts, BAR_SCHEMA.field('ts').type)
+        if end_ts is not None:
+            upper = ds.field('ts') <= pa.scalar(end_ts, BAR_SCHEMA.field('ts').type)
+            condition = upper if condition is None else condition & upper
+        table = ds.dataset(paths, schema=BAR_SCHEMA, format='parquet').to_table(columns=columns, filter=condition)
+
+    if as_table:
+        return table
+    frame = table.to_pandas()
+    if 'ts' in frame.columns:
+        frame['ts'] = frame['ts'].dt.tz_convert(ET)
+        frame = frame.set_index('ts')
+    return frame
+
+
+def ingest(symbols, workers=4, base_dir=MINUTE_DIR, kis=None, db_path=DB_PATH):
+    """종목별 마지막 저장 분봉 이후를 한투 API로 받아 파티션에 병합 (종목 단위 동시 실행)
+
+    Returns:
+        {종목: 새로 받은 분봉 수}
+    """
+    from kis_api import KISApi
+    from symbol_master import resolve
+
+    kis = kis or KISApi()
+    started = time.perf_counter()
+    exchanges = resolve(kis, symbols, db_path, workers)
+
+    def run(symbol):
+        if symbol not in exchanges:
+            return 0
+        last = last_timestamp(symbol, base_dir)
+        since = last.tz_convert(ET).strftime('%Y%m%d%H%M%S') if last is not None else None
+        try:
+            bars = kis.get_overseas_minute_bars(symbol, since=since, exchange=exchanges[symbol])
+        except Exception as e:
+            logging.error(f"Failed to load minute bars for {symbol}: {e}")
+            return 0
+        if bars:
+            write_bars(symbol, bars_to_table(bars), base_dir)
+        return len(bars)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = dict(zip(symbols, pool.map(run, symbols)))
+    kis.metrics.flush()
+    print(f"Ingested {sum(counts.values())} minute bars for {len(symbols)} symbols "
+          f"in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def storage_info(symbols=None, base_dir=MINUTE_DIR):
+    """종목/월별 행 수와 파일 크기 (Parquet 메타데이터만 읽음)"""
+    if symbols is None:
+        symbols = sorted(os.listdir(base_dir)) if os.path.isdir(base_dir) else []
+    rows = []
+    for symbol in symbols:
+        for month, path in list_partitions(symbol, base_dir):
+            metadata = pq.ParquetFile(path).metadata
+            rows.append({'symbol': symbol, 'month': month, 'rows': metadata.num_rows,
+                         'row_groups': metadata.num_row_groups, 'bytes': os.path.getsize(path)})
+    return pd.DataFrame(rows, columns=['symbol', 'month', 'rows', 'row_groups', 'bytes'])
+
+
+if __name__ == "__main__":
+    # python minute_bars.py ingest 종목1,종목2,...|@종목파일 [동시요청수]  - 마지막 저장 이후 분봉 적재
+    # python minute_bars.py read 종목 시작 [종료]                         - 구간 분봉 요약
+    # python minute_bars.py info [종목1,종목2,...]                        - 파티션별 행 수/크기
+    command = sys.argv[1] if len(sys.argv) > 1 else 'info'
+
+    if command == 'ingest':
+        from load_data import read_symbols
+        logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+        ingest(read_symbols(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else 4)
+    elif command == 'read':
+        started = time.perf_counter()
+        bars = read_bars(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+        elapsed = time.perf_counter() - started
+        print(bars)
+        print(f"{len(bars):,} bars in {elapsed * 1000:.1f}ms")
+    else:
+        info = storage_info(sys.argv[2].split(',') if len(sys.argv) > 2 else None)
+        if info.empty:
+            print(f"No minute data in {MINUTE_DIR}")
+        else:
+            print(info.to_string(index=False))
+            print(f"Total: {info['rows'].sum():,} bars, {info['bytes'].sum() / 1e6:.1f}MB")
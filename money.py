@@ -0,0 +1,51 @@
+# money.py
+import math
+
+'''
+정수 센트 금액 연산 (엔진/주문 생성 공용)
+
+- 가격/예수금: 정수 센트 (1$ = 100)
+- 수수료율: 정수 ppm (0.25% = 2500)
+
+반올림 규칙
+- 달러 -> 센트: 0.5센트 올림 (round half up)
+- 수수료: 체결 건별 체결금액 x 수수료율, 0.5센트 올림
+- 매도 목표가: 매수가 x (1 + 수수료율 x 2) 이상인 첫 호가 (0.01$ 단위 올림)
+- 매수 수량: 내림
+'''
+
+PPM = 1_000_000
+
+
+def to_cents(dollars):
+    """달러 -> 센트 (0.5센트 올림, float 오차 보정)"""
+    return int(math.floor(dollars * 100 + 0.5 + 1e-9))
+
+
+def to_dollars(cents):
+    return cents / 100
+
+
+def fee_ppm(fee_percent):
+    """수수료(%) -> ppm (0.25 -> 2500)"""
+    return int(round(fee_percent * 10_000))
+
+
+def fee_cents(amount_cents, ppm):
+    """체결금액 수수료 (0.5센트 올림)"""
+    return (amount_cents * ppm + PPM // 2) // PPM
+
+
+def sell_target_cents(buy_cents, ppm):
+    """매수가 + 왕복 수수료 이상인 첫 호가"""
+    return -(-buy_cents * (PPM + 2 * ppm) // PPM)
+
+
+def buy_qty(budget_cents, price_cents):
+    """예산으로 살 수 있는 수량 (내림)"""
+    return budget_cents // price_cents if price_cents > 0 else 0
+
+
+def rate_ppm(rate):
+    """배수 -> ppm (1.06 -> 1_060_000)"""
+    return int(round(rate * PPM))
@@ -3,7 +3,7 @@ from daily_run import DailyTrader
 import sys
 
 if __name__ == "__main__":
-    # python morning_task.py [dry-run|live]
+    # python morning_task.py [dry-run|live|paper]
     mode = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
     trader = DailyTrader(mode=mode)
     trader.run_morning_task()
\ No newline at end of file
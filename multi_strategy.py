@@ -0,0 +1,106 @@
+# multi_strategy.py
+import sys
+from datetime import datetime, timedelta
+from strategies import STRATEGIES
+from streaming import TeeSink, iter_prices, run_strategies
+from utils import load_config, data_version
+
+
+class TradeStatsSink:
+    """청산 거래 통계만 누적하는 sink (매매 횟수, 승률, 평균 보유기간/수익률)"""
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.total_days = 0
+        self.total_return = 0.0
+
+    def write_daily(self, row):
+        pass
+
+    def write_trade(self, trade):
+        self.trades += 1
+        self.wins += trade['수익률(%)'] > 0
+        self.total_days += trade['보유기간']
+        self.total_return += trade['수익률(%)']
+
+    def stats(self):
+        if not self.trades:
+            return {'win_rate': 0.0, 'avg_days': 0.0, 'avg_return': 0.0}
+        return {
+            'win_rate': self.wins / self.trades * 100,
+            'avg_days': self.total_days / self.trades,
+            'avg_return': self.total_return / self.trades,
+        }
+
+
+def compare_strategies(symbol, start_date, end_date, initial_funds, buy_portion, fee, welfare,
+                       names=None, result_dir=None, db_path=None):
+    """여러 전략을 같은 가격 데이터 한 번 순회로 실행
+
+    Args:
+        names: 실행할 전략 이름 목록 (기본: 전체)
+        result_dir: 전략별 일별 현황/청산 거래를 Parquet으로 기록할 디렉토리 (선택)
+
+    Returns:
+        전략별 [요약 + 거래 통계 dict]
+    """
+    names = names or list(STRATEGIES)
+    warmup_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+    price_kwargs = {'db_path': db_path} if db_path else {}
+
+    stats_sinks, writers, strategies = [], [], []
+    version = data_version(symbol, warmup_start, end_date, **price_kwargs) if result_dir else None
+    for name in names:
+        stats = TradeStatsSink()
+        writer = None
+        if result_dir:
+            from result_writer import ResultWriter
+            writer = ResultWriter(result_dir, run_id=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{name}",
+                                  params={'strategy': name, 'symbol': symbol, 'start_date': start_date,
+                                          'end_date': end_date, 'initial_funds': initial_funds,
+                                          'buy_portion': buy_portion, 'fee': fee, 'welfare': welfare},
+                                  data_version=version)
+            writers.append(writer)
+        stats_sinks.append(stats)
+        strategies.append(STRATEGIES[name](TeeSink(stats, writer), initial_funds, buy_portion, fee, welfare))
+
+    try:
+        summaries = run_strategies(iter_prices(symbol, warmup_start, end_date, **price_kwargs), strategies,
+                                   start_date=start_date)
+    finally:
+        for writer in writers:
+            writer.close()
+    return [dict(summary, **stats.stats()) for summary, stats in zip(summaries, stats_sinks)]
+
+
+def print_report(symbol, start_date, end_date, initial_funds, results):
+    print('\n' + '='*80)
+    print(f"{symbol} {start_date} ~ {end_date} 전략 비교 (최초 보유 금액 ${initial_funds:,.2f})")
+    print('='*80)
+    rows = [
+        ('최종 보유 금액', lambda r: f"${r['final_value']:,.2f}"),
+        ('원금 변화율', lambda r: f"{r['return_rate']}%"),
+        ('MDD', lambda r: f"{r['mdd']:.2f}%"),
+        ('총 매매 횟수', lambda r: f"{r['trades']} 회"),
+        ('승률', lambda r: f"{r['win_rate']:.2f}%"),
+        ('평균 보유기간', lambda r: f"{r['avg_days']:.1f} 일"),
+        ('평균 수익률', lambda r: f"{r['avg_return']:.2f}%"),
+        ('총 수수료', lambda r: f"${r['total_fee']:,.2f}"),
+    ]
+    print(f"{'':<16}" + ''.join(f"{r['strategy']:>22}" for r in results))
+    for label, fmt in rows:
+        print(f"{label:<16}" + ''.join(f"{fmt(r):>22}" for r in results))
+    print('='*80)
+
+
+if __name__ == "__main__":
+    # python multi_strategy.py 시작일 종료일 [결과디렉토리]  - config 종목으로 전체 전략 비교 (데이터 1회 순회)
+    trading = load_config()['trading']
+    start_date, end_date = sys.argv[1], sys.argv[2]
+    result_dir = sys.argv[3] if len(sys.argv) > 3 else None
+
+    results = compare_strategies(trading['symbol'], start_date, end_date, trading['initial_funds'],
+                                 trading['buy_portion'], trading['fee_rate'], trading.get('welfare', True),
+                                 result_dir=result_dir)
+    print_report(trading['symbol'], start_date, end_date, trading['initial_funds'], results)
@@ -0,0 +1,181 @@
+# optimizer.py
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from strategy_rules import PREVENT_DROWN_DOWN, load_closes, run_batch
+from utils import load_config
+
+'''
+침몰방지법 계수 탐색 (successive halving)
+
+후보를 무작위로 뽑아 짧은 기간(앞부분)으로 평가하고, 상위 1/eta만 남겨 기간을 eta배씩 늘려가며 다시 평가한다.
+마지막 단계만 전체 기간을 쓰므로 전체 그리드 대비 일부 시뮬레이션 비용으로 좋은 영역을 찾는다.
+각 단계의 후보는 작업자 프로세스별로 나눠 strategy_rules.run_batch로 한 번에 계산한다.
+
+    매수 : 전날 종가 x (buy_base - buy_step x min(T, t_cap))
+    매도 : 매수가 x (sell_base - sell_step x min(T, t_cap))
+    최대보유기간 : hold_base - hold_step x min(T, t_cap) 일
+'''
+
+RESULT_DIR = 'logs/optimizer'
+
+# 현재 침몰방지법 V2 계수
+DEFAULT_PARAMS = {'buy_base': 1.06, 'buy_step': 0.01, 'sell_base': 1.125, 'sell_step': 0.02,
+                  'hold_base': 30, 'hold_step': 3, 't_cap': 6}
+
+# 탐색 공간 (계수별 후보 값)
+SEARCH_SPACE = {
+    'buy_base': [1.0, 1.01, 1.02, 1.03, 1.04, 1.05, 1.06, 1.07, 1.08],
+    'buy_step': [0.0, 0.005, 0.01, 0.015, 0.02],
+    'sell_base': [1.05, 1.075, 1.1, 1.125, 1.15, 1.175, 1.2],
+    'sell_step': [0.0, 0.01, 0.02, 0.03],
+    'hold_base': [10, 15, 20, 25, 30, 35, 40],
+    'hold_step': [0, 1, 2, 3, 4],
+    't_cap': [3, 4, 5, 6, 7, 8],
+}
+
+# 평가 기준 (클수록 좋음)
+OBJECTIVES = {
+    'return': lambda r: r['return_rate'],
+    'calmar': lambda r: r['return_rate'] / max(abs(r['mdd']), 1.0),
+}
+
+
+def grid_size(space=SEARCH_SPACE):
+    return math.prod(len(values) for values in space.values())
+
+
+def make_spec(params):
+    """계수 -> strategy_rules 규칙 spec"""
+    cap = params['t_cap']
+    return dict(
+        PREVENT_DROWN_DOWN,
+        name='prevent_drown_down' + ''.join(f"_{params[key]}" for key in SEARCH_SPACE),
+        buy=f"{params['buy_base']} - {params['buy_step']}*min(T, {cap})",
+        sell=f"{params['sell_base']} - {params['sell_step']}*min(T, {cap})",
+        max_hold=f"{params['hold_base']} - {params['hold_step']}*min(T, {cap})",
+    )
+
+
+def sample_candidates(num_candidates, space=SEARCH_SPACE, seed=0):
+    """탐색 공간에서 중복 없이 후보 추출 (현재 계수 포함)"""
+    rng = random.Random(seed)
+    num_candidates = min(num_candidates, grid_size(space))
+    seen, candidates = {tuple(DEFAULT_PARAMS[key] for key in space)}, [dict(DEFAULT_PARAMS)]
+    while len(candidates) < num_candidates:
+        params = {key: rng.choice(values) for key, values in space.items()}
+        key = tuple(params.values())
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def _evaluate(task):
+    """작업자 프로세스 - 후보 묶음을 run_batch 한 번으로 평가"""
+    candidates, closes, prev_closes, trading, objective = task
+    result = run_batch([(make_spec(params), trading) for params in candidates], closes, prev_closes)
+    scores = []
+    for i in range(len(candidates)):
+        metrics = {'return_rate': float(result['return_rate'][i]), 'mdd': float(result['mdd'][i]),
+                   'trades': int(result['trades'][i])}
+        scores.append(dict(metrics, score=OBJECTIVES[objective](metrics)))
+    return scores
+
+
+def evaluate(candidates, closes, prev_closes, trading, objective, executor=None, workers=1):
+    """후보 평가 (작업자 수만큼 나눠 병렬)"""
+    chunk = max(1, math.ceil(len(candidates) / workers))
+    tasks = [(candidates[i:i + chunk], closes, prev_closes, trading, objective)
+             for i in range(0, len(candidates), chunk)]
+    results = executor.map(_evaluate, tasks) if executor else map(_evaluate, tasks)
+    return [score for scores in results for score in scores]
+
+
+def successive_halving(closes, prev_closes, trading, num_candidates=243, eta=3, min_days=120,
+                       objective='calmar', workers=None, seed=0, log=print):
+    """successive halving 탐색
+
+    Args:
+        trading: run_batch 파라미터 (initial_funds, buy_portion, fee)
+        eta: 단계마다 남기는 비율의 역수 (기간은 eta배씩 증가)
+        min_days: 첫 단계 평가 기간 (거래일)
+
+    Returns:
+        (마지막 단계 후보 [(params, metrics)] 점수순, 시뮬레이션 거래일 합)
+    """
+    total_days = len(closes)
+    workers = workers or os.cpu_count() or 1
+    candidates = sample_candidates(num_candidates, seed=seed)
+    # 첫 단계가 min_days 이상이 되도록 단계 수 제한 (마지막 단계에 여러 후보가 남을 수 있음)
+    rungs = min(math.ceil(math.log(max(len(candidates), 1), eta)),
+                max(0, int(math.log(max(total_days / min_days, 1), eta))))
+    cost = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for rung in range(rungs + 1):
+            days = total_days if rung == rungs else int(total_days / eta ** (rungs - rung))
+            scores = evaluate(candidates, closes[:days], prev_closes[:days], trading, objective, executor, workers)
+            cost += days * len(candidates)
+            ranked = sorted(zip(candidates, scores), key=lambda item: item[1]['score'], reverse=True)
+            best_params, best = ranked[0]
+            log(f"단계 {rung}: 후보 {len(candidates)}개 x {days}일 - 최고 {best['score']:.3f} "
+                f"(수익률 {best['return_rate']:.2f}%, MDD {best['mdd']:.2f}%) {best_params}")
+            if rung == rungs:
+                return ranked, cost
+            candidates = [params for params, _ in ranked[:max(1, len(ranked) // eta)]]
+    finally:
+        if executor:
+            executor.shutdown()
+
+
+def save_report(report, result_dir=RESULT_DIR):
+    os.makedirs(result_dir, exist_ok=True)
+    path = os.path.join(result_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    # python optimizer.py 시작일 종료일 [후보 수] [calmar|return] [작업자 수]  - config 종목/자금 기준
+    trading_config = load_config()['trading']
+    start_date, end_date = sys.argv[1], sys.argv[2]
+    num_candidates = int(sys.argv[3]) if len(sys.argv) > 3 else 243
+    objective = sys.argv[4] if len(sys.argv) > 4 else 'calmar'
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else None
+    if objective not in OBJECTIVES:
+        print(f"평가 기준은 {', '.join(OBJECTIVES)} 중 하나여야 합니다.")
+        sys.exit(2)
+
+    trading = {'initial_funds': trading_config['initial_funds'], 'buy_portion': trading_config['buy_portion'],
+               'fee': trading_config['fee_rate']}
+    closes, prev_closes = load_closes(trading_config['symbol'], start_date, end_date)
+    ranked, cost = successive_halving(closes, prev_closes, trading, num_candidates, objective=objective,
+                                      workers=workers)
+    baseline = _evaluate(([DEFAULT_PARAMS], closes, prev_closes, trading, objective))[0]
+    full_cost = grid_size() * len(closes)
+
+    print('\n' + '='*80)
+    print(f"{trading_config['symbol']} {start_date} ~ {end_date} ({len(closes)}일), 평가 기준 {objective}")
+    print(f"시뮬레이션 비용: {cost:,} 거래일 (전체 그리드 {full_cost:,}의 {cost / full_cost * 100:.3f}%)")
+    print('='*80)
+    print(f"{'현재 계수':<10} 점수 {baseline['score']:>8.3f}  수익률 {baseline['return_rate']:>8.2f}%  "
+          f"MDD {baseline['mdd']:>7.2f}%  {DEFAULT_PARAMS}")
+    for rank, (params, metrics) in enumerate(ranked[:10], 1):
+        print(f"{rank:>2}위{'':<7} 점수 {metrics['score']:>8.3f}  수익률 {metrics['return_rate']:>8.2f}%  "
+              f"MDD {metrics['mdd']:>7.2f}%  {params}")
+
+    path = save_report({
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'symbol': trading_config['symbol'], 'start_date': start_date, 'end_date': end_date,
+        'objective': objective, 'trading': trading, 'cost_days': cost, 'grid_days': full_cost,
+        'baseline': dict(baseline, params=DEFAULT_PARAMS),
+        'top': [dict(metrics, params=params) for params, metrics in ranked[:10]],
+    })
+    print(f"-> {path}")
@@ -0,0 +1,419 @@
+# paper_exchange.py
+import glob
+import logging
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from api_metrics import EndpointMetrics
+from init_db import DB_PATH, ensure_schema
+from market_calendar import ET, KST, load_calendar
+from money import fee_cents, fee_ppm, to_cents, to_dollars
+from utils import load_config
+
+'''
+로컬 모의 거래소 (paper 모드)
+
+KISApi 대신 DailyTrader에 주입해 place_order/get_orders/get_account_balance 트래픽을 받고,
+주문은 해당 세션 종가(prices 테이블)로 체결한다. 계좌/주문은 trading.db의 paper_* 테이블에 저장되므로
+morning/evening 작업이 별도 프로세스여도 이어진다.
+
+체결 규칙 (세션 마감 후, 종가가 prices에 있을 때)
+- 매도 먼저, 다음 매수 (당일 매도 대금으로 매수 가능 - 원장 엔진과 같은 순서)
+- LOC 매수: 종가 <= 지정가면 종가 체결 / LOC 매도: 종가 >= 지정가면 종가 체결 / MOC 매도: 항상 종가 체결
+- 수수료: 체결금액 x 수수료율 (money.fee_cents), 매수는 체결 시점 예수금이 (금액 + 수수료) 이상이어야 체결
+- 매도 주문은 접수 시 보유 수량(미체결 매도 포함)을 넘으면 거부
+- 종가 없이 이후 세션 종가가 들어오면 (임시 휴장 등) 당일 주문으로 보고 미체결 만료
+
+시각은 clock(tz-aware 현재 시각을 반환하는 callable)으로 주입 - replay는 가상 시계로 수년치 세션을 바로 진행
+'''
+
+MORNING_OFFSET = timedelta(minutes=60)   # daemon 기본값과 같은 작업 시각 (개장 후 / 마감 후)
+EVENING_OFFSET = timedelta(minutes=240)
+ORDER_TYPES = {
+    'LOC_BUY': ('BUY', 'LOC'),
+    'LOC_SELL': ('SELL', 'LOC'),
+    'MOC_SELL': ('SELL', 'MOC'),
+}
+STATUS_NAMES = {'open': '접수', 'filled': '완료', 'unfilled': '미체결', 'rejected': '거부'}
+
+
+class ReplayClock:
+    """재생용 가상 시계 - 호출하면 현재 가상 시각"""
+
+    def __init__(self, now=None):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class PaperExchange:
+    """KISApi와 같은 인터페이스의 모의 거래소 (LOC/MOC 종가 체결)"""
+
+    def __init__(self, initial_cash, fee, account='paper', db_path=DB_PATH, clock=None, calendar=None,
+                 quotes=None):
+        """
+        Args:
+            initial_cash: 계좌가 없을 때 만드는 최초 예수금 ($)
+            fee: 수수료(%)
+            clock: 현재 시각 callable (기본: 실제 시각)
+            quotes: 시세 조회를 넘길 KISApi (None이면 prices 테이블에서 마감된 세션만 제공)
+        """
+        self.account = account
+        self.fee = fee_ppm(fee)
+        self.clock = clock or (lambda: datetime.now(ET))
+        self.calendar = calendar or load_calendar()
+        self.quotes = quotes
+        self.metrics = quotes.metrics if quotes else EndpointMetrics()
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        ensure_schema(self.conn)
+        if self._account() is None:
+            self.reset(initial_cash)
+
+    def close(self):
+        self.conn.close()
+
+    def reset(self, initial_cash):
+        """계좌 초기화 - 주문/보유 종목 삭제 후 예수금만 남김"""
+        with self.conn:
+            self.conn.execute('DELETE FROM paper_orders WHERE account = ?', (self.account,))
+            self.conn.execute('DELETE FROM paper_positions WHERE account = ?', (self.account,))
+            self.conn.execute('''
+                INSERT OR REPLACE INTO paper_accounts (account, cash, realized, created_at)
+                VALUES (?, ?, 0, ?)
+            ''', (self.account, to_cents(initial_cash), datetime.now().isoformat(timespec='seconds')))
+
+    # ---------------------------------------------------------------- 시각/시세
+    def us_date(self):
+        return self.clock().astimezone(ET).date()
+
+    def is_closed(self, session_date):
+        """세션 마감 여부 (가상 시각 기준)"""
+        close_time = self.calendar.session_close(session_date)
+        return close_time is not None and self.clock() >= close_time
+
+    def session_close(self, symbol, session_date):
+        """세션 종가 (센트, 없으면 None)"""
+        row = self.conn.execute('SELECT close FROM prices WHERE symbol = ? AND date = ?',
+                                (symbol, str(session_date))).fetchone()
+        return to_cents(row['close']) if row else None
+
+    def last_close(self, symbol):
+        """마감된 마지막 세션 종가 (센트) - 평가금액용"""
+        session = self.calendar.previous_session(self.us_date(), inclusive=self.is_closed(self.us_date()))
+        row = self.conn.execute('SELECT close FROM prices WHERE symbol = ? AND date <= ? ORDER BY date DESC LIMIT 1',
+                                (symbol, str(session))).fetchone()
+        return to_cents(row['close']) if row else 0
+
+    def get_overseas_price_daily(self, symbol, start_date, end_date, exchange=None):
+        """일봉 조회 (KISApi 형식) - 가상 시각 이전에 마감된 세션만"""
+        if self.quotes:
+            return self.quotes.get_overseas_price_daily(symbol, start_date, end_date, exchange)
+        start = datetime.strptime(start_date, '%Y%m%d').date()
+        end = datetime.strptime(end_date, '%Y%m%d').date()
+        if not self.is_closed(end):
+            end = self.calendar.previous_session(end)
+        rows = self.conn.execute('''
+            SELECT date, open, high, low, close, volume FROM prices
+            WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date
+        ''', (symbol, str(start), str(end))).fetchall()
+        return [{'date': datetime.strptime(row['date'], '%Y-%m-%d').date(), 'open': row['open'],
+                 'high': row['high'], 'low': row['low'], 'close': row['close'], 'volume': row['volume'] or 0}
+                for row in rows]
+
+    def get_current_price(self, symbol, exchange=None):
+        if self.quotes:
+            return self.quotes.get_current_price(symbol, exchange)
+        return {'last': f"{to_dollars(self.last_close(symbol)):.4f}"}
+
+    # ---------------------------------------------------------------- 주문
+    def place_order(self, order_type, symbol, quantity, price=0, exchange=None):
+        """주문 접수 (KISApi.place_order 형식) - 체결은 세션 마감 후 settle"""
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Invalid order type: {order_type}")
+        side, kind = ORDER_TYPES[order_type]
+        quantity = int(quantity)
+        if quantity <= 0:
+            return {'success': False, 'msg': '주문수량 오류'}
+
+        session = self.us_date()
+        if not self.calendar.is_trading_day(session) or self.is_closed(session):
+            return {'success': False, 'msg': '주문 가능 시간이 아닙니다'}
+
+        with self.conn:
+            if side == 'SELL':
+                held = self._position(symbol)['quantity']
+                pending = self.conn.execute('''
+                    SELECT COALESCE(SUM(quantity), 0) FROM paper_orders
+                    WHERE account = ? AND symbol = ? AND side = 'SELL' AND status = 'open'
+                ''', (self.account, symbol)).fetchone()[0]
+                if pending + quantity > held:
+                    logging.error(f"Paper order rejected: {order_type} {quantity} {symbol} (sellable {held - pending})")
+                    return {'success': False, 'msg': '매도가능수량 부족'}
+
+            cursor = self.conn.execute('''
+                INSERT INTO paper_orders
+                (account, session_date, symbol, side, order_type, price, quantity, status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'open', ?)
+            ''', (self.account, str(session), symbol, side, kind, to_cents(price) if kind == 'LOC' else 0, quantity,
+                  self.clock().isoformat(timespec='seconds')))
+
+        logging.info(f"Paper order placed: {order_type} {quantity} {symbol}")
+        return {'success': True, 'data': {'ODNO': f'{cursor.lastrowid:010d}',
+                                          'ORD_TMD': self.clock().strftime('%H%M%S')}}
+
+    def settle(self):
+        """마감된 세션의 미체결 주문을 종가로 체결 (종가가 아직 없으면 대기)"""
+        pending = self.conn.execute('''
+            SELECT DISTINCT session_date, symbol FROM paper_orders
+            WHERE account = ? AND status = 'open' ORDER BY session_date
+        ''', (self.account,)).fetchall()
+
+        for session_date, symbol in pending:
+            if not self.is_closed(session_date):
+                continue
+            close = self.session_close(symbol, session_date)
+            if close is None and not self._has_later_close(symbol, session_date):
+                continue
+            with self.conn:
+                orders = self.conn.execute('''
+                    SELECT * FROM paper_orders
+                    WHERE account = ? AND session_date = ? AND symbol = ? AND status = 'open'
+                    ORDER BY side = 'BUY', order_no
+                ''', (self.account, session_date, symbol)).fetchall()
+                for order in orders:
+                    if close is None:  # 임시 휴장 등으로 종가 없이 다음 세션이 지나감 -> 당일 주문 만료
+                        self._finish(order, 'unfilled', reason='종가 없음')
+                    else:
+                        self._match(order, close)
+
+    def _has_later_close(self, symbol, session_date):
+        row = self.conn.execute('SELECT 1 FROM prices WHERE symbol = ? AND date > ? LIMIT 1',
+                                (symbol, str(session_date))).fetchone()
+        return row is not None
+
+    def _match(self, order, close):
+        account = self._account()
+        position = self._position(order['symbol'])
+        quantity = order['quantity']
+        amount = quantity * close
+        fee = fee_cents(amount, self.fee)
+
+        if order['side'] == 'SELL':
+            if order['order_type'] == 'LOC' and close < order['price']:
+                return self._finish(order, 'unfilled')
+            if quantity > position['quantity']:
+                return self._finish(order, 'rejected', reason='잔고 부족')
+            cost = position['cost'] * quantity // position['quantity']  # 평균단가 기준 매입금액 (매수 수수료 포함)
+            self._update_position(order['symbol'], position['quantity'] - quantity, position['cost'] - cost)
+            self._update_account(account['cash'] + amount - fee, account['realized'] + amount - fee - cost)
+        else:
+            if close > order['price']:
+                return self._finish(order, 'unfilled')
+            if account['cash'] < amount + fee:
+                return self._finish(order, 'rejected', reason='주문가능금액 부족')
+            self._update_position(order['symbol'], position['quantity'] + quantity, position['cost'] + amount + fee)
+            self._update_account(account['cash'] - amount - fee, account['realized'])
+        self._finish(order, 'filled', quantity, close, fee)
+
+    def _finish(self, order, status, filled_qty=0, fill_price=None, fee=0, reason=None):
+        self.conn.execute('''
+            UPDATE paper_orders SET status = ?, filled_qty = ?, fill_price = ?, fee = ?, reason = ?
+            WHERE order_no = ?
+        ''', (status, filled_qty, fill_price, fee, reason, order['order_no']))
+
+    def _account(self):
+        return self.conn.execute('SELECT * FROM paper_accounts WHERE account = ?', (self.account,)).fetchone()
+
+    def _position(self, symbol):
+        row = self.conn.execute('SELECT quantity, cost FROM paper_positions WHERE account = ? AND symbol = ?',
+                                (self.account, symbol)).fetchone()
+        return dict(row) if row else {'quantity': 0, 'cost': 0}
+
+    def _update_position(self, symbol, quantity, cost):
+        self.conn.execute('''
+            INSERT OR REPLACE INTO paper_positions (account, symbol, quantity, cost) VALUES (?, ?, ?, ?)
+        ''', (self.account, symbol, quantity, cost if quantity else 0))
+
+    def _update_account(self, cash, realized):
+        self.conn.execute('UPDATE paper_accounts SET cash = ?, realized = ? WHERE account = ?',
+                          (cash, realized, self.account))
+
+    # ---------------------------------------------------------------- 조회
+    def get_orders(self):
+        """당일(미국 기준) 주문 내역 (KISApi.get_orders / inquire-ccnl output 형식)"""
+        self.settle()
+        rows = self.conn.execute('''
+            SELECT * FROM paper_orders WHERE account = ? AND session_date = ? ORDER BY order_no
+        ''', (self.account, str(self.us_date()))).fetchall()
+        return [{
+            'ord_dt': row['session_date'].replace('-', ''),
+            'odno': f"{row['order_no']:010d}",
+            'pdno': row['symbol'],
+            'sll_buy_dvsn_cd': '02' if row['side'] == 'BUY' else '01',
+            'sll_buy_dvsn_cd_name': '매수' if row['side'] == 'BUY' else '매도',
+            'ft_ord_qty': str(row['quantity']),
+            'ft_ord_unpr3': f"{to_dollars(row['price']):.4f}",
+            'ft_ccld_qty': str(row['filled_qty']),
+            'ft_ccld_unpr3': f"{to_dollars(row['fill_price'] or 0):.4f}",
+            'ft_ccld_amt3': f"{to_dollars(row['filled_qty'] * (row['fill_price'] or 0)):.4f}",
+            'nccs_qty': str(row['quantity'] - row['filled_qty'] if row['status'] == 'open' else 0),
+            'prcs_stat_name': STATUS_NAMES[row['status']],
+            'rjct_rson_name': row['reason'] or '',
+        } for row in rows]
+
+    def balance(self):
+        """계좌 현황 (센트) - 예수금, 실현손익, 종목별 수량/매입금액/평가금액"""
+        self.settle()
+        account = self._account()
+        positions = {}
+        for row in self.conn.execute('SELECT symbol, quantity, cost FROM paper_positions '
+                                     'WHERE account = ? AND quantity > 0', (self.account,)):
+            value = row['quantity'] * self.last_close(row['symbol'])
+            positions[row['symbol']] = {'quantity': row['quantity'], 'cost': row['cost'], 'value': value}
+        return {
+            'cash': account['cash'],
+            'realized': account['realized'],
+            'positions': positions,
+            'equity': account['cash'] + sum(p['value'] for p in positions.values()),
+        }
+
+    def get_account_balance(self, exchange=None):
+        """계좌 잔고 (KISApi.get_account_balance / inquire-balance output2 형식 + 예수금)"""
+        balance = self.balance()
+        cost = sum(p['cost'] for p in balance['positions'].values())
+        value = sum(p['value'] for p in balance['positions'].values())
+        unrealized = value - cost
+        return {
+            'frcr_pchs_amt1': f"{to_dollars(cost):.2f}",
+            'ovrs_rlzt_pfls_amt': f"{to_dollars(balance['realized']):.2f}",
+            'ovrs_tot_pfls': f"{to_dollars(unrealized):.2f}",
+            'tot_evlu_pfls_amt': f"{to_dollars(value):.2f}",
+            'tot_pftrt': f"{unrealized / cost * 100:.2f}" if cost else "0.00",
+            'frcr_dncl_amt_2': f"{to_dollars(balance['cash']):.2f}",
+        }
+
+
+def replay(end_date=None, progress_every=60):
+    """설정 시작일부터 end_date까지 모든 세션의 morning/evening 작업을 모의 거래소로 재생
+
+    가상 시계를 작업 시각으로 옮기며 실제 live 경로(주문 계산 -> submit_orders -> 체결 기록 -> 다음 계획)를 그대로 실행.
+    paper 원장, 모의 계좌, paper 이벤트 로그와 이를 렌더링한 로그(통합 로그, 주문 내역, 날짜별 로그)는 처음에 초기화한다.
+
+    Returns:
+        (PaperExchange, DailyTrader)
+    """
+    from daily_run import DailyTrader
+    from ledger import Ledger
+
+    config = load_config()['trading']
+    clock = ReplayClock()
+    calendar = load_calendar()
+    exchange = PaperExchange(config['initial_funds'], config['fee_rate'], clock=clock, calendar=calendar)
+    exchange.reset(config['initial_funds'])
+    ledger = Ledger()
+    try:
+        ledger.reset('paper', config['symbol'])
+    finally:
+        ledger.close()
+
+    session = calendar.next_session(datetime.strptime(config['start_date'], '%Y-%m-%d').date(), inclusive=True)
+    clock.now = calendar.session_open(session, KST) + MORNING_OFFSET if session else datetime.now(KST)
+    trader = DailyTrader(mode='paper', kis=exchange, clock=clock)
+    trader.calendar = calendar
+    rendered = glob.glob(os.path.join(trader.log_base_dir, 'trading_history_*.log'))
+    rendered += glob.glob(os.path.join(trader.log_daily_dir, 'trading_*.log'))
+    for path in [trader.events.events_path, trader.events.index_path, trader.orders_history_path] + rendered:
+        if os.path.exists(path):
+            os.remove(path)
+
+    def start_job(run_at):
+        """가상 시계 이동 후 그 시각 기준 연도별/날짜별 로그 파일로 전환 (daemon.run_job 과 같은 순서)"""
+        clock.now = run_at
+        trader.setup_directories()
+        trader.setup_logging()
+        # 세션별 상세 로그는 파일에만 기록
+        for handler in logging.getLogger().handlers:
+            if not isinstance(handler, logging.FileHandler):
+                handler.setLevel(logging.WARNING)
+
+    if end_date is None:
+        row = exchange.conn.execute('SELECT MAX(date) FROM prices WHERE symbol = ?', (config['symbol'],)).fetchone()
+        end_date = row[0]
+    end = datetime.strptime(str(end_date), '%Y-%m-%d').date()
+    count = 0
+    while session is not None and session <= end:
+        start_job(calendar.session_open(session, KST) + MORNING_OFFSET)
+        trader.run_morning_task()
+        start_job(calendar.session_close(session, KST) + EVENING_OFFSET)
+        trader.run_evening_task()
+        count += 1
+        if progress_every and count % progress_every == 0:
+            print(f"{session}  평가금액 ${to_dollars(exchange.balance()['equity']):,.2f}")
+        session = calendar.next_session(session)
+    return exchange, trader
+
+
+def reconcile(exchange, symbol, mode='paper'):
+    """모의 계좌와 원장(거래 저널) 비교 - 예수금/보유 수량 차이 (센트, 주)"""
+    from journal import Journal
+
+    journal = Journal()
+    try:
+        state = journal.state_at(mode, 'infinite_buy', symbol)
+    finally:
+        journal.close()
+    balance = exchange.balance()
+    held = balance['positions'].get(symbol, {'quantity': 0})['quantity']
+    return {
+        'date': state['date'],
+        'ledger_cash': state['funds'],
+        'exchange_cash': balance['cash'],
+        'ledger_holdings': state['holdings'],
+        'exchange_holdings': held,
+        'cash_diff': balance['cash'] - state['funds'],
+        'holdings_diff': held - state['holdings'],
+    }
+
+
+def print_balance(exchange):
+    balance = exchange.balance()
+    print('='*80)
+    print(f"모의 계좌 ({exchange.account}) - {exchange.us_date()}")
+    print('='*80)
+    print(f"예수금: ${to_dollars(balance['cash']):,.2f}")
+    print(f"실현손익: ${to_dollars(balance['realized']):,.2f}")
+    for symbol, position in balance['positions'].items():
+        print(f"- {symbol}: {position['quantity']}주, 매입 ${to_dollars(position['cost']):,.2f}, "
+              f"평가 ${to_dollars(position['value']):,.2f}")
+    print(f"평가금액: ${to_dollars(balance['equity']):,.2f}")
+
+
+if __name__ == "__main__":
+    # python paper_exchange.py replay [종료일]  - 설정 시작일부터 모의 거래소로 live 경로 재생 후 원장과 대사
+    # python paper_exchange.py status          - 모의 계좌 잔고/당일 주문
+    # python paper_exchange.py reset           - 모의 계좌 초기화 (설정 초기 자금)
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    config = load_config()['trading']
+
+    if command == 'replay':
+        started = datetime.now()
+        exchange, trader = replay(sys.argv[2] if len(sys.argv) > 2 else None)
+        print_balance(exchange)
+        result = reconcile(exchange, config['symbol'])
+        print(f"원장 대사 ({result['date']}): 예수금 차이 ${to_dollars(result['cash_diff']):,.2f}, "
+              f"보유 수량 차이 {result['holdings_diff']}주")
+        print(f"소요시간: {(datetime.now() - started).total_seconds():.1f}초")
+    elif command == 'reset':
+        exchange = PaperExchange(config['initial_funds'], config['fee_rate'])
+        exchange.reset(config['initial_funds'])
+        print_balance(exchange)
+    else:
+        exchange = PaperExchange(config['initial_funds'], config['fee_rate'])
+        print_balance(exchange)
+        for order in exchange.get_orders():
+            print(f"{order['odno']} {order['sll_buy_dvsn_cd_name']} {order['pdno']} {order['ft_ord_qty']}주 "
+                  f"@ {order['ft_ord_unpr3']} -> {order['prcs_stat_name']} {order['ft_ccld_qty']}주 "
+                  f"@ {order['ft_ccld_unpr3']}")
@@ -0,0 +1,305 @@
+# quote_monitor.py
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from decision_table import from_ledger
+from init_db import DB_PATH
+from money import to_cents
+from symbol_master import DEFAULT_EXCHANGE, load_master, quote_code
+from utils import load_config
+
+KIS_WS_URL = 'ws://ops.koreainvestment.com:21000'
+TR_ID_OVERSEAS_TICK = 'HDFSCNT0'  # 해외주식 실시간지연체결가
+TICK_FIELDS = 26  # HDFSCNT0 레코드당 필드 수
+
+# HDFSCNT0 필드 위치
+F_SYMB, F_XHMS, F_OPEN, F_HIGH, F_LOW, F_LAST, F_EVOL = 1, 5, 8, 9, 10, 11, 19
+
+
+# ---------------------------------------------------------------- 전송 계층
+class KISWebSocketTransport:
+    """한투 실시간 웹소켓 (websockets 패키지 필요)"""
+
+    def __init__(self, kis, url=KIS_WS_URL, excd=None, record_path=None):
+        """
+        Args:
+            excd: 시세 거래소 코드 (tr_key = 'D' + excd + 종목, 기본: 종목 마스터)
+            record_path: 수신 원문을 저장할 파일 (ReplayTransport로 재생 가능)
+        """
+        self.kis = kis
+        self.url = url
+        self.excd = excd
+        self.record_path = record_path
+
+    def tr_excd(self, symbol):
+        return self.excd or quote_code(self.kis.exchange(symbol))
+
+    async def stream(self, symbols):
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("KIS 실시간 시세는 websockets 패키지가 필요합니다: pip install websockets")
+
+        approval_key = self.kis.get_approval_key()
+        record = open(self.record_path, 'a', encoding='utf-8') if self.record_path else None
+        try:
+            async with websockets.connect(self.url, ping_interval=None) as ws:
+                for symbol in symbols:
+                    await ws.send(json.dumps({
+                        'header': {'approval_key': approval_key, 'custtype': 'P',
+                                   'tr_type': '1', 'content-type': 'utf-8'},
+                        'body': {'input': {'tr_id': TR_ID_OVERSEAS_TICK,
+                                           'tr_key': f'D{self.tr_excd(symbol)}{symbol}'}},
+                    }))
+                async for message in ws:
+                    if message[0] in '01':  # 실시간 데이터 (0: 평문, 1: 암호문)
+                        if record:
+                            record.write(message + '\n')
+                        yield message
+                        continue
+
+                    control = json.loads(message)
+                    tr_id = control.get('header', {}).get('tr_id')
+                    if tr_id == 'PINGPONG':
+                        await ws.send(message)
+                    else:
+                        logging.info(f"WS {tr_id}: {control.get('body', {}).get('msg1', '')}")
+        finally:
+            if record:
+                record.close()
+
+
+class ReplayTransport:
+    """저장된 원문(한 줄에 메시지 1개)을 재생하는 로컬 피드"""
+
+    def __init__(self, path, speed=0.0):
+        """
+        Args:
+            speed: 재생 배속 (0이면 대기 없이 최대 속도)
+        """
+        self.path = path
+        self.speed = speed
+
+    async def stream(self, symbols):
+        wanted = set(symbols)
+        prev_seconds = None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                message = line.rstrip('\n')
+                if not message:
+                    continue
+                fields = message.split('|', 3)[3].split('^', F_XHMS + 1)
+                if fields[F_SYMB] not in wanted:
+                    continue
+
+                if self.speed > 0:
+                    hms = fields[F_XHMS]
+                    seconds = int(hms[:2]) * 3600 + int(hms[2:4]) * 60 + int(hms[4:6])
+                    if prev_seconds is not None and seconds > prev_seconds:
+                        await asyncio.sleep((seconds - prev_seconds) / self.speed)
+                    prev_seconds = seconds
+                yield message
+
+
+def make_replay_file(symbol, date, path, num_ticks=5000, seed=0, db_path=DB_PATH, excd=None):
+    """prices 테이블의 일봉(시가/고가/저가/종가)으로 장중 체결 원문 생성 (HDFSCNT0 형식)
+
+    Args:
+        excd: 시세 거래소 코드 (tr_key = 'D' + excd + 종목, 기본: 종목 마스터, 미등록이면 기본 거래소)
+    """
+    excd = excd or quote_code(load_master([symbol], db_path).get(symbol, DEFAULT_EXCHANGE))
+    conn = sqlite3.connect(db_path)
+    row = conn.execute('SELECT open, high, low, close FROM prices WHERE symbol = ? AND date = ?',
+                       (symbol, str(date))).fetchone()
+    conn.close()
+    if row is None:
+        raise ValueError(f"No price for {symbol} on {date}")
+    open_price, high, low, close = row
+
+    rng = random.Random(seed)
+    # 시가 -> 저가 -> 고가 -> 종가 (또는 고가 먼저) 경로를 구간별 선형 + 잡음으로 생성
+    waypoints = [open_price, low, high, close] if rng.random() < 0.5 else [open_price, high, low, close]
+    start = datetime.strptime(f'{date} 09:30:00', '%Y-%m-%d %H:%M:%S')
+    session_seconds = 6.5 * 3600
+    ymd = str(date).replace('-', '')
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(num_ticks):
+            t = i / (num_ticks - 1)
+            leg = min(int(t * 3), 2)
+            u = t * 3 - leg
+            price = waypoints[leg] + (waypoints[leg + 1] - waypoints[leg]) * u
+            if 0 < i < num_ticks - 1:
+                price += rng.gauss(0, (high - low) * 0.01)
+            price = round(min(max(price, low), high), 2)
+            ts = start + timedelta(seconds=session_seconds * t)
+
+            fields = [''] * TICK_FIELDS
+            fields[0] = f'D{excd}{symbol}'
+            fields[F_SYMB] = symbol
+            fields[3] = fields[4] = ymd
+            fields[F_XHMS] = ts.strftime('%H%M%S')
+            fields[F_OPEN], fields[F_HIGH], fields[F_LOW] = f'{open_price:.2f}', f'{high:.2f}', f'{low:.2f}'
+            fields[F_LAST] = f'{price:.2f}'
+            fields[F_EVOL] = str(rng.randint(1, 500))
+            f.write(f"0|{TR_ID_OVERSEAS_TICK}|001|{'^'.join(fields)}\n")
+
+
+# ---------------------------------------------------------------- 롤링 분봉
+class RollingBars:
+    """고정 크기 링버퍼 1분봉 - 틱마다 새 객체를 만들지 않고 배열 값만 갱신"""
+
+    def __init__(self, capacity=390):
+        self.capacity = capacity
+        self.minute = array('l', [0]) * capacity  # HHMM
+        self.open = array('d', [0.0]) * capacity
+        self.high = array('d', [0.0]) * capacity
+        self.low = array('d', [0.0]) * capacity
+        self.close = array('d', [0.0]) * capacity
+        self.volume = array('d', [0.0]) * capacity
+        self.head = -1
+        self.count = 0
+
+    def update(self, minute, price, volume):
+        h = self.head
+        if h < 0 or self.minute[h] != minute:
+            h = self.head = (h + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            self.minute[h] = minute
+            self.open[h] = self.high[h] = self.low[h] = self.close[h] = price
+            self.volume[h] = volume
+            return
+        if price > self.high[h]:
+            self.high[h] = price
+        if price < self.low[h]:
+            self.low[h] = price
+        self.close[h] = price
+        self.volume[h] += volume
+
+    def last(self, n=1):
+        """최근 n개 분봉 [(HHMM, 시가, 고가, 저가, 종가, 거래량)] (조회용)"""
+        bars = []
+        for k in range(min(n, self.count)):
+            i = (self.head - k) % self.capacity
+            bars.append((self.minute[i], self.open[i], self.high[i], self.low[i], self.close[i], self.volume[i]))
+        return bars[::-1]
+
+
+# ---------------------------------------------------------------- 모니터
+class QuoteMonitor:
+    """실시간 체결가로 오늘 주문 계획(결과표)을 계속 평가
+
+    현재가가 결과표의 다른 구간으로 넘어갈 때만 on_change를 호출한다.
+    """
+
+    def __init__(self, tables, bar_capacity=390, on_change=None):
+        """
+        Args:
+            tables: {종목: DecisionTable}
+            on_change: (종목, 현재가, 결과 dict) 콜백 - 기본은 로그 출력
+        """
+        self.tables = tables
+        self.breaks = {symbol: table.breaks.tolist() for symbol, table in tables.items()}
+        self.bars = {symbol: RollingBars(bar_capacity) for symbol in tables}
+        self.last_interval = {symbol: -1 for symbol in tables}
+        self.last_price = {symbol: 0.0 for symbol in tables}
+        self.ticks = 0
+        self.on_change = on_change or self.log_change
+
+    def on_message(self, message):
+        """HDFSCNT0 원문 처리 (한 메시지에 레코드 여러 개 가능)
+
+        분봉/구간 상태는 미리 할당한 배열을 제자리 갱신하지만, 원문 파싱에서 필드 문자열과 float는
+        틱마다 생성된다 (Python에서 피할 수 없음). 대부분인 레코드 1개 메시지는 필요한 필드까지만 나눈다.
+        """
+        if message[0] != '0':  # 암호화 메시지는 해외 체결가에 해당 없음
+            return
+        _, tr_id, count, body = message.split('|', 3)
+        if tr_id != TR_ID_OVERSEAS_TICK:
+            return
+        count = int(count)
+        if count == 1:
+            fields = body.split('^', F_EVOL + 1)
+            self.on_tick(fields[F_SYMB], fields[F_XHMS], float(fields[F_LAST]), float(fields[F_EVOL] or 0))
+            return
+        fields = body.split('^')
+        for k in range(count):
+            base = k * TICK_FIELDS
+            self.on_tick(fields[base + F_SYMB], fields[base + F_XHMS],
+                         float(fields[base + F_LAST]), float(fields[base + F_EVOL] or 0))
+
+    def on_tick(self, symbol, hhmmss, price, volume):
+        bars = self.bars.get(symbol)
+        if bars is None:
+            return
+        self.ticks += 1
+        self.last_price[symbol] = price
+        bars.update(int(hhmmss) // 100, price, volume)
+
+        interval = bisect_right(self.breaks[symbol], to_cents(price)) - 1
+        if interval != self.last_interval[symbol]:
+            self.last_interval[symbol] = interval
+            self.on_change(symbol, price, self.tables[symbol].lookup(price))
+
+    def log_change(self, symbol, price, outcome):
+        logging.info(f"[{symbol}] ${price:.2f} 마감 시 -> 매도회차 {outcome['sold_lots']} "
+                     f"매수 {'체결' if outcome['buy_fill'] else '미체결'} / 보유 {outcome['holdings']}주 "
+                     f"T={outcome['T']} 예수금 ${outcome['funds']:.2f}")
+
+    async def run(self, transport):
+        t0 = time.perf_counter()
+        async for message in transport.stream(list(self.tables)):
+            self.on_message(message)
+        elapsed = time.perf_counter() - t0
+        logging.info(f"Monitor finished: {self.ticks} ticks in {elapsed:.2f}s "
+                     f"({self.ticks / elapsed if elapsed else 0:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    '''
+    python quote_monitor.py [dry-run|live|paper] [kis] [원문저장파일] -> 한투 실시간 시세 (모드 생략 시 dry-run)
+    python quote_monitor.py [dry-run|live|paper] replay 파일 [배속] -> 저장된 원문 재생 (배속 0 = 최대 속도)
+    python quote_monitor.py make-replay 날짜 파일                    -> prices 일봉으로 재생 파일 생성
+    '''
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = load_config()
+    trading = config['trading']
+    symbol = trading['symbol']
+    command = sys.argv[1] if len(sys.argv) > 1 else 'dry-run'
+
+    if command == 'make-replay':
+        if len(sys.argv) < 4:
+            print("Usage: python quote_monitor.py make-replay 날짜 파일")
+            sys.exit(1)
+        make_replay_file(symbol, sys.argv[2], sys.argv[3])
+        print(f"Replay file written: {sys.argv[3]}")
+        sys.exit(0)
+
+    if command not in ('dry-run', 'live', 'paper'):
+        print(f"Unknown mode: {command} (dry-run|live|paper|make-replay)")
+        sys.exit(1)
+    mode = command
+    source = sys.argv[2] if len(sys.argv) > 2 else 'kis'
+
+    table, snapshot = from_ledger(mode, symbol, trading['initial_funds'], trading['buy_portion'],
+                                  trading['fee_rate'], trading.get('welfare', True))
+    if table is None:
+        print("원장 스냅샷이 없습니다. morning/evening task를 먼저 실행하세요.")
+        sys.exit(1)
+    logging.info(f"Plan based on {snapshot['date']} close ${snapshot['close']:.2f}")
+
+    if source == 'replay':
+        transport = ReplayTransport(sys.argv[3], float(sys.argv[4]) if len(sys.argv) > 4 else 0.0)
+    else:
+        from kis_api import KISApi
+        transport = KISWebSocketTransport(KISApi(), record_path=sys.argv[3] if len(sys.argv) > 3 else None)
+
+    monitor = QuoteMonitor({symbol: table})
+    asyncio.run(monitor.run(transport))
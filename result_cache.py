@@ -0,0 +1,138 @@
+# result_cache.py
+import hashlib
+import json
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from init_db import DB_PATH, ensure_schema
+from strategies import STRATEGIES
+from streaming import SummarySink, run_strategies, to_price_row
+from utils import load_config
+
+'''
+백테스트 결과 캐시 (backtest_cache 테이블)
+
+키: (전략, 종목, 시작일, 파라미터) / 값: 마지막 처리일, 그때까지의 가격 해시, 전략 상태, 요약
+- 같은 종료일 재실행: 저장된 요약 반환 (hit)
+- prices에 이후 날짜만 추가됨: 저장된 상태에서 새 거래일만 진행 (extended)
+- 처리했던 구간의 가격이 바뀜(수정/삭제/중간 추가): 처음부터 다시 계산 (invalidated)
+해시는 utils.data_version 과 같은 방식 (구간 행 repr의 sha1)이다.
+'''
+
+WARMUP_DAYS = 30  # 시작일 전 전날 종가 확보용
+STATE_VERSION = 2  # 저장된 전략 상태 형식 (2: 정수 센트) - 바뀌면 이전 캐시는 다시 계산
+
+
+def params_key(initial_funds, buy_portion, fee, welfare):
+    return json.dumps({'initial_funds': initial_funds, 'buy_portion': buy_portion, 'fee': fee,
+                       'welfare': bool(welfare), 'state_version': STATE_VERSION}, sort_keys=True)
+
+
+class ResultCache:
+    """전략 상태를 저장해 두고 새 종가만 이어서 계산하는 백테스트 캐시"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        ensure_schema(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def _load(self, strategy, symbol, start_date, params):
+        row = self.conn.execute('''
+            SELECT last_date, data_hash, state, summary FROM backtest_cache
+            WHERE strategy = ? AND symbol = ? AND start_date = ? AND params = ?
+        ''', (strategy, symbol, start_date, params)).fetchone()
+        return dict(row) if row else None
+
+    def _store(self, strategy, symbol, start_date, params, last_date, data_hash, state, summary):
+        with self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO backtest_cache
+                (strategy, symbol, start_date, params, last_date, data_hash, state, summary, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (strategy, symbol, start_date, params, str(last_date), data_hash, json.dumps(state),
+                  json.dumps(summary, default=str), datetime.now().isoformat(timespec='seconds')))
+
+    def run(self, strategy_name, symbol, start_date, end_date, initial_funds, buy_portion, fee, welfare):
+        """캐시를 이용한 백테스트
+
+        캐시된 마지막 처리일보다 이른 종료일은 캐시를 건드리지 않고 새로 계산한다.
+
+        Returns:
+            (요약 dict, 'hit' | 'extended' | 'miss' | 'invalidated')
+        """
+        params = params_key(initial_funds, buy_portion, fee, welfare)
+        warmup_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=WARMUP_DAYS)).strftime('%Y-%m-%d')
+        cached = self._load(strategy_name, symbol, start_date, params)
+
+        # 가격을 한 번 읽으며 전체 해시와 캐시 시점까지의 해시를 함께 계산
+        raw_rows = self.conn.execute('''
+            SELECT date, open, high, low, close
+            FROM prices
+            WHERE symbol = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        ''', (symbol, warmup_start, str(end_date))).fetchall()
+        digest = hashlib.sha1()
+        prefix_hash, prefix_len = None, 0
+        for i, row in enumerate(raw_rows):
+            digest.update(repr(tuple(row)).encode())
+            if cached and str(row['date'])[:10] == cached['last_date']:
+                prefix_hash, prefix_len = digest.hexdigest()[:16], i + 1
+        data_hash = digest.hexdigest()[:16]
+        if not raw_rows:
+            return None, 'miss'
+
+        strategy = STRATEGIES[strategy_name](SummarySink(), initial_funds, buy_portion, fee, welfare)
+        status = 'miss'
+        if cached and prefix_hash == cached['data_hash']:
+            if prefix_len == len(raw_rows):
+                return json.loads(cached['summary']), 'hit'
+            # 캐시 시점 행을 전날 종가로 두고 새 거래일만 진행
+            strategy.set_state(json.loads(cached['state']))
+            rows = [to_price_row(tuple(row)) for row in raw_rows[prefix_len - 1:]]
+            summary = run_strategies(rows, [strategy], start_date=str(rows[1][0]))[0]
+            status = 'extended'
+        else:
+            rows = [to_price_row(tuple(row)) for row in raw_rows]
+            summary = run_strategies(rows, [strategy], start_date=start_date)[0]
+            if cached and str(end_date) < cached['last_date']:
+                return summary, 'miss'
+            status = 'invalidated' if cached else 'miss'
+
+        self._store(strategy_name, symbol, start_date, params, rows[-1][0], data_hash, strategy.get_state(), summary)
+        return summary, status
+
+    def invalidate(self, symbol=None):
+        """캐시 삭제 (종목 지정 시 해당 종목만)"""
+        with self.conn:
+            if symbol:
+                self.conn.execute('DELETE FROM backtest_cache WHERE symbol = ?', (symbol,))
+            else:
+                self.conn.execute('DELETE FROM backtest_cache')
+
+
+if __name__ == "__main__":
+    # python result_cache.py [infinite_buy|prevent_drown_down] 종목 시작일 [종료일]  - config 자금 파라미터 기준
+    # python result_cache.py clear [종목]
+    cache = ResultCache()
+    try:
+        if sys.argv[1] == 'clear':
+            cache.invalidate(sys.argv[2] if len(sys.argv) > 2 else None)
+            print("Backtest cache cleared")
+        else:
+            strategy_name, symbol, start_date = sys.argv[1:4]
+            end_date = sys.argv[4] if len(sys.argv) > 4 else datetime.now().strftime('%Y-%m-%d')
+            trading = load_config()['trading']
+            summary, status = cache.run(strategy_name, symbol, start_date, end_date, trading['initial_funds'],
+                                        trading['buy_portion'], trading['fee_rate'], trading.get('welfare', True))
+            if summary is None:
+                print(f"No price data: {symbol} {start_date} ~ {end_date}")
+            else:
+                print(f"[{status}] {strategy_name} {symbol} {start_date} ~ {end_date}: "
+                      f"{summary['days']}일, 매매 {summary['trades']}회")
+                print(f"최종 보유 금액: ${summary['final_value']:,.2f} / 원금 변화율: {summary['return_rate']}% / "
+                      f"MDD: {summary['mdd']:.2f}%")
+    finally:
+        cache.close()
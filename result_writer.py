@@ -0,0 +1,205 @@
+# result_writer.py
+import json
+import os
+import sys
+from datetime import date, datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_CHUNK_ROWS = 10000
+
+# 일별 거래 현황 (backtest_all / 침몰방지법 df_res 컬럼의 합집합, 엔진에 없는 컬럼은 null)
+DAILY_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('날짜', pa.date32()),
+    ('시가', pa.float64()),
+    ('고가', pa.float64()),
+    ('종가', pa.float64()),
+    ('등락율', pa.float64()),
+    ('LOC 매수', pa.int64()),
+    ('수익 실현 매도', pa.int64()),
+    ('MOC 손절', pa.int64()),
+    ('보유 주식 수', pa.int64()),
+    ('예수금', pa.float64()),
+    ('총 평가액', pa.float64()),
+    ('수익율(%)', pa.float64()),
+    ('MDD', pa.float64()),
+    ('T값', pa.int64()),
+    ('모드', pa.string()),
+    ('총 수수료($)', pa.float64()),
+])
+
+# 청산 거래 (trade_history 형식)
+TRADE_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('회차', pa.int64()),
+    ('매수일', pa.date32()),
+    ('매수가', pa.float64()),
+    ('매수수량', pa.int64()),
+    ('매도일', pa.date32()),
+    ('매도가', pa.float64()),
+    ('매도수량', pa.int64()),
+    ('보유기간', pa.int64()),
+    ('수익률(%)', pa.float64()),
+])
+
+
+class _ChunkedParquet:
+    """행 dict를 컬럼 버퍼에 모았다가 chunk_rows마다 row group으로 기록"""
+
+    def __init__(self, path, schema, metadata, chunk_rows):
+        self.path = path
+        self.schema = schema.with_metadata(metadata)
+        self.chunk_rows = chunk_rows
+        self.columns = {name: [] for name in schema.names}
+        self.pending = 0
+        self.rows = 0
+        self.writer = None
+
+    def append(self, row):
+        for name, values in self.columns.items():
+            values.append(row.get(name))
+        self.pending += 1
+        if self.pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression='zstd')
+        self.writer.write_table(pa.Table.from_pydict(self.columns, schema=self.schema))
+        self.rows += self.pending
+        self.pending = 0
+        for values in self.columns.values():
+            values.clear()
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _to_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _to_int(value):
+    return None if value is None or value != value else int(value)
+
+
+class ResultWriter:
+    """백테스트 결과를 타입이 지정된 Parquet 파일로 스트리밍 기록
+
+    결과 디렉토리 하나에 여러 실행(run)을 누적한다 (스윕 결과 추가 기록).
+        {result_dir}/daily/{run_id}.parquet   일별 거래 현황
+        {result_dir}/trades/{run_id}.parquet  청산 거래
+        {result_dir}/runs.jsonl               실행별 파라미터/데이터 버전/행 수
+    """
+
+    def __init__(self, result_dir, run_id=None, params=None, data_version=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Args:
+            run_id: 실행 식별자 (기본: 생성 시각)
+            params: 실행 파라미터 (각 파일 메타데이터와 runs.jsonl에 기록)
+            data_version: 입력 가격 데이터 버전 (utils.data_version)
+        """
+        self.result_dir = result_dir
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        self.params = params or {}
+        self.data_version = data_version
+
+        for kind in ('daily', 'trades'):
+            os.makedirs(os.path.join(result_dir, kind), exist_ok=True)
+            if os.path.exists(os.path.join(result_dir, kind, f'{self.run_id}.parquet')):
+                raise ValueError(f"Run already exists: {self.run_id}")
+
+        metadata = {
+            'run_id': self.run_id,
+            'params': json.dumps(self.params, ensure_ascii=False, default=str),
+            'data_version': self.data_version or '',
+        }
+        self.daily = _ChunkedParquet(os.path.join(result_dir, 'daily', f'{self.run_id}.parquet'),
+                                     DAILY_SCHEMA, metadata, chunk_rows)
+        self.trades = _ChunkedParquet(os.path.join(result_dir, 'trades', f'{self.run_id}.parquet'),
+                                      TRADE_SCHEMA, metadata, chunk_rows)
+
+    def write_daily(self, row):
+        """일별 행 (df_res 컬럼명 dict)"""
+        self.daily.append({
+            **row,
+            'run_id': self.run_id,
+            '날짜': _to_date(row.get('날짜')),
+            'LOC 매수': _to_int(row.get('LOC 매수')),
+            '수익 실현 매도': _to_int(row.get('수익 실현 매도')),
+            'MOC 손절': _to_int(row.get('MOC 손절')),
+            '보유 주식 수': _to_int(row.get('보유 주식 수')),
+            'T값': _to_int(row.get('T값')),
+        })
+
+    def write_trade(self, trade):
+        """청산 거래 1건 (trade_history 형식)"""
+        self.trades.append({
+            **trade,
+            'run_id': self.run_id,
+            '매수일': _to_date(trade.get('매수일')),
+            '매도일': _to_date(trade.get('매도일')),
+        })
+
+    def close(self):
+        self.daily.close()
+        self.trades.close()
+        with open(os.path.join(self.result_dir, 'runs.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'run_id': self.run_id,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'params': self.params,
+                'data_version': self.data_version,
+                'daily_rows': self.daily.rows,
+                'trade_rows': self.trades.rows,
+            }, ensure_ascii=False, default=str) + '\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_runs(result_dir):
+    """runs.jsonl -> 실행 목록"""
+    path = os.path.join(result_dir, 'runs.jsonl')
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_results(result_dir, kind='daily', run_ids=None, columns=None):
+    """결과 로드 (pandas DataFrame) - 파싱 없이 컬럼 타입 그대로 복원
+
+    Args:
+        kind: 'daily' 또는 'trades'
+        run_ids: 특정 실행만 (기본: 전체)
+    """
+    schema = DAILY_SCHEMA if kind == 'daily' else TRADE_SCHEMA
+    filters = [('run_id', 'in', list(run_ids))] if run_ids else None
+    table = pq.read_table(os.path.join(result_dir, kind), schema=schema, columns=columns, filters=filters)
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    # python result_writer.py 결과디렉토리 [daily|trades] [run_id ...]  - 결과 요약
+    result_dir = sys.argv[1]
+    kind = sys.argv[2] if len(sys.argv) > 2 else 'daily'
+    run_ids = sys.argv[3:] or None
+
+    for run in load_runs(result_dir):
+        if run_ids is None or run['run_id'] in run_ids:
+            print(f"{run['run_id']}  data={run['data_version']}  daily={run['daily_rows']}  "
+                  f"trades={run['trade_rows']}  {run['params']}")
+    print(load_results(result_dir, kind, run_ids))
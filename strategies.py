@@ -0,0 +1,254 @@
+# strategies.py
+from abc import ABC, abstractmethod
+from datetime import datetime
+from money import PPM, buy_qty, fee_cents, fee_ppm, rate_ppm, sell_target_cents, to_cents, to_dollars
+from utils import round_half_up_to_two
+
+'''
+전략 객체 - 하루치 시세(on_day)를 받아 상태를 갱신하고 일별 현황/청산 거래를 sink로 보낸다.
+같은 데이터 순회(streaming.run_strategies)에 여러 전략을 함께 태울 수 있다.
+
+sink 프로토콜: write_daily(row), write_trade(trade) (result_writer.ResultWriter 와 동일)
+
+금액은 실거래/모의 체결과 같은 정수 센트(money.py)로 계산하고, sink/summary에는 달러로 내보낸다.
+'''
+
+
+class Strategy(ABC):
+    """공통 상태 (예수금, 보유 회차, running MDD) 와 일별 기록"""
+
+    name = None
+    # get_state/set_state 로 저장/복원하는 진행 상태 (결과 캐시 이어서 계산용)
+    state_fields = ('funds', 'holdings', 'buy_records', 'trade_id', 'total_fee', 'peak', 'mdd', 'days', 'trades',
+                    'last_close')
+
+    def __init__(self, sink, initial_funds, buy_portion, fee, welfare):
+        """
+        Args:
+            fee: 수수료(%)
+        """
+        self.sink = sink
+        self.initial_funds = initial_funds
+        self.initial_cents = to_cents(initial_funds)
+        self.buy_portion = buy_portion
+        self.fee = fee_ppm(fee) # 수수료 ppm
+        self.welfare = welfare
+        self.one_buy_amount = self.initial_cents // buy_portion # 회차별 매수금액 (센트)
+
+        self.funds = self.initial_cents # 예수금 (센트)
+        self.holdings = 0 # 보유 주식 수
+        self.buy_records = [] # 보유 회차 (buy_price: 센트)
+        self.trade_id = 1 # 매수 회차별 ID
+        self.total_fee = 0 # 총 수수료 (센트)
+
+        self.peak = None # running MDD
+        self.mdd = 0.0
+        self.days = 0
+        self.trades = 0
+        self.last_close = 0 # 센트
+
+    @abstractmethod
+    def on_day(self, current_date, open_price, high_price, price, return_val, prev_price):
+        """하루치 시세로 매도 -> 매수 -> 일별 기록 (가격은 달러)"""
+
+    def get_state(self):
+        """진행 상태 (JSON 직렬화 가능한 dict)"""
+        state = {field: getattr(self, field) for field in self.state_fields}
+        state['buy_records'] = [dict(record, buy_date=str(record['buy_date'])) for record in self.buy_records]
+        return state
+
+    def set_state(self, state):
+        """get_state 결과로 복원 - 이후 on_day는 중단 없이 진행한 것과 같은 결과"""
+        for field in self.state_fields:
+            setattr(self, field, state[field])
+        self.buy_records = [dict(record, buy_date=datetime.strptime(record['buy_date'], '%Y-%m-%d').date())
+                            for record in state['buy_records']]
+
+    def _sell(self, record, price):
+        """회차 청산 - 매도 금액에서 수수료 차감"""
+        amount = record['quantity'] * price
+        fee = fee_cents(amount, self.fee)
+        self.funds += amount - fee # 수수료 차감
+        self.total_fee += fee
+        self.holdings -= record['quantity']
+        self.trades += 1
+
+    def _buy(self, price, qty):
+        """매수 체결 - 매수 금액 + 수수료 차감"""
+        amount = qty * price
+        fee = fee_cents(amount, self.fee)
+        self.holdings += qty
+        self.funds -= amount + fee
+        self.total_fee += fee
+
+    def _trade(self, record, current_date, price, return_pct):
+        return {
+            '회차': record['id'],
+            '매수일': record['buy_date'],
+            '매수가': to_dollars(record['buy_price']),
+            '매수수량': record['quantity'],
+            '매도일': current_date,
+            '매도가': to_dollars(price),
+            '매도수량': record['quantity'],
+            '보유기간': record['days'],
+            '수익률(%)': return_pct,
+        }
+
+    def _new_lot(self, current_date, price, qty):
+        self.buy_records.append({'id': self.trade_id, 'buy_date': current_date, 'buy_price': price,
+                                 'quantity': qty, 'days': 0, 'type': 'LOC 매수'})
+        self.trade_id += 1
+
+    def _equity(self, price):
+        """평가액(센트) + running MDD 갱신"""
+        equity = self.funds + (price * self.holdings)
+        self.peak = equity if self.peak is None or equity > self.peak else self.peak
+        self.mdd = min(self.mdd, (equity - self.peak) / self.peak * 100)
+        self.days += 1
+        self.last_close = price
+        return equity
+
+    def summary(self):
+        final_value = self.funds + self.holdings * self.last_close
+        return {
+            'strategy': self.name,
+            'return_rate': round_half_up_to_two((final_value / self.initial_cents - 1) * 100),
+            'final_value': to_dollars(final_value),
+            'funds': to_dollars(self.funds),
+            'holdings': self.holdings,
+            'mdd': self.mdd,
+            'days': self.days,
+            'trades': self.trades,
+            'total_fee': to_dollars(self.total_fee),
+        }
+
+
+
+class InfiniteBuy(Strategy):
+    """떨사오팔 - 전날 종가 이하 LOC 매수, 왕복 수수료 이상 LOC 매도, 40일 경과 MOC 손절"""
+
+    name = 'infinite_buy'
+
+    def on_day(self, current_date, open_price, high_price, price, return_val, prev_price):
+        loc_buy = profit_sell = moc_sell = 0
+        close, prev_close = to_cents(price), to_cents(prev_price)
+
+        # 복리 투자 시
+        T = len(self.buy_records)
+        one_buy_welfare = self.funds // (self.buy_portion-T) if self.buy_portion>T else 0 # 복리투자 1회차 금액
+
+        # 매도 로직
+        if self.holdings > 0:
+            new_buy_records = []
+            for record in self.buy_records:
+                record['days'] += 1
+                sell_price = sell_target_cents(record['buy_price'], self.fee)
+
+                if close >= sell_price:  # 수익 실현 매도
+                    return_pct = round_half_up_to_two((close/record['buy_price'] - 1) * 100)
+                    profit_sell += record['quantity']
+                elif record['days'] >= 39:  # 40일 경과 시 손절
+                    return_pct = (close/record['buy_price'] - 1) * 100
+                    moc_sell = record['quantity']
+                else:
+                    new_buy_records.append(record)
+                    continue
+
+                self._sell(record, close)
+                self.sink.write_trade(self._trade(record, current_date, close, return_pct))
+            self.buy_records = new_buy_records
+
+        # 매수 로직
+        if close <= prev_close: # 전날 종가 LOC 매수
+            qty = buy_qty(one_buy_welfare if self.welfare else self.one_buy_amount, prev_close)
+            if T<self.buy_portion:
+                self._buy(close, qty)
+                self._new_lot(current_date, close, qty)
+                loc_buy = qty
+
+        equity = self._equity(close)
+        self.sink.write_daily({
+            '날짜': current_date, '시가': open_price, '고가': high_price, '종가': price, '등락율': return_val,
+            'LOC 매수': loc_buy, '수익 실현 매도': profit_sell, 'MOC 손절': moc_sell,
+            '보유 주식 수': self.holdings, '예수금': to_dollars(self.funds), '총 평가액': to_dollars(equity),
+            '수익율(%)': (equity / self.initial_cents - 1) * 100, 'MDD': self.mdd,
+        })
+
+
+class PreventDrownDown(Strategy):
+    """침몰방지법 V2 - T값(보유 회차 수)에 따라 매수/매도 기준과 최대 보유일이 달라짐 (T>=6 회복모드)
+
+    매수 : 전날 종가 x (1.06 - 0.01 x min(T,6))
+    매도 : 매수가 x (1.125 - 0.02 x min(T,6))
+    (기준 배수는 ppm 정수로 바꿔 센트 가격과 정확히 비교)
+    최대보유기간 : 30 - 3 x min(T,6) 일
+    """
+
+    name = 'prevent_drown_down'
+    state_fields = Strategy.state_fields + ('T',)
+
+    def __init__(self, sink, initial_funds, buy_portion, fee, welfare):
+        super().__init__(sink, initial_funds, buy_portion, fee, welfare)
+        self.T = 0 # T값 = 보유 회차 수
+
+    def on_day(self, current_date, open_price, high_price, price, return_val, prev_price):
+        loc_buy = profit_sell = moc_sell = 0
+        close, prev_close = to_cents(price), to_cents(prev_price)
+
+        maximumT=min(self.T,6) # T값 최대 6까지 적용
+        start_T=self.T # 매매체결전 기준 T값
+        loc_buy_rate = rate_ppm(1.06-0.01*maximumT) # 매수 기준 (ppm)
+        loc_sell_rate = rate_ppm(1.125-0.02*maximumT) # 매도 기준 (ppm)
+        one_buy_welfare = self.funds // (self.buy_portion-start_T) if self.buy_portion>start_T else self.funds
+        buy_order_price= prev_close*loc_buy_rate # 매수 주문 가격 x PPM
+
+        # 매도 로직
+        if self.holdings > 0:
+            new_buy_records = []
+            for record in self.buy_records:
+                record['days'] += 1
+                sell_price = record['buy_price'] * loc_sell_rate # x PPM
+
+                if close * PPM >= sell_price:  # 수익 실현 매도
+                    return_pct = round_half_up_to_two((close/record['buy_price'] - 1) * 100)
+                    profit_sell += record['quantity']
+                elif record['days'] >= (30-maximumT*3):  # 최대 보유일수 경과시 MOC 매도
+                    return_pct = (close/record['buy_price'] - 1) * 100
+                    moc_sell = record['quantity']
+                else:
+                    new_buy_records.append(record)
+                    continue
+
+                self._sell(record, close)
+                self.T-=1
+                trade = self._trade(record, current_date, close, return_pct)
+                trade['적용 모드'] = "투자모드" if (maximumT)<6 else "회복모드"
+                trade['적용 T'] = start_T
+                self.sink.write_trade(trade)
+            self.buy_records = new_buy_records
+
+        # 매수 로직
+        if close * PPM <= buy_order_price:
+            budget = one_buy_welfare if self.welfare else self.one_buy_amount
+            qty = buy_qty(budget * PPM, buy_order_price)
+            if self.funds >= qty * close + fee_cents(qty * close, self.fee):
+                self._buy(close, qty)
+                self.T +=1
+                self._new_lot(current_date, close, qty)
+                loc_buy = qty
+
+        equity = self._equity(close)
+        self.sink.write_daily({
+            '날짜': current_date, '시가': open_price, '고가': high_price, '종가': price, '등락율': return_val,
+            'LOC 매수': loc_buy, '수익 실현 매도': profit_sell, 'MOC 손절': moc_sell,
+            '보유 주식 수': self.holdings, '예수금': to_dollars(self.funds), '총 평가액': to_dollars(equity),
+            '수익율(%)': (equity / self.initial_cents - 1) * 100, 'MDD': self.mdd,
+            'T값': self.T, '모드': "회복" if self.T>=6 else "투자",
+            '총 수수료($)': to_dollars(self.total_fee),
+        })
+
+
+STRATEGIES = {
+    InfiniteBuy.name: InfiniteBuy,
+    PreventDrownDown.name: PreventDrownDown,
+}
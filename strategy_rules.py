@@ -0,0 +1,323 @@
+# strategy_rules.py
+import ast
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+import yaml
+from init_db import DB_PATH
+from money import PPM, fee_ppm, to_cents
+from streaming import iter_days, iter_prices
+from utils import load_config, round_half_up_to_two
+
+'''
+선언형 매매 규칙 -> 배치 NumPy 커널
+
+규칙(spec)은 T값(매매 체결 전 보유 회차 수)의 함수로 매수/매도 기준과 최대 보유일을 적는다.
+값은 숫자, T별 리스트(마지막 값이 이후 T에 계속 적용), 또는 식 문자열 (T, fee, min, max, + - * /).
+
+    name        규칙 이름
+    buy         LOC 매수 기준 - 전날 종가 x buy 이하로 마감하면 매수 (수량도 이 가격 기준)
+    sell        LOC 매도 기준 - 매수가 x sell 이상으로 마감하면 회차 청산
+    max_hold    최대 보유일 - 보유일 >= max_hold 이면 MOC 청산
+    stop_loss   손절 기준 (선택) - 매수가 x stop_loss 이하로 마감하면 MOC 청산
+    welfare     복리 투자 - 1회차 금액 = 예수금 / (분할 수 - T), 아니면 최초 자금 / 분할 수
+    cap_lots    T >= 분할 수이면 매수 중단 (False면 남은 예수금 전부로 1회차 매수)
+    funds_check 예수금이 (매수금액 + 수수료) 이상일 때만 매수
+
+컴파일된 규칙은 T별 룩업 테이블(매수/매도/손절 기준은 ppm 정수)이 되고, run_batch가 변형(규칙 x 자금 파라미터) 수 x 회차 슬롯 배열로
+하루씩 진행하므로 변형을 추가해도 새 루프 없이 한 번에 계산된다.
+금액은 strategies.py 엔진과 같은 정수 센트/ppm 연산(money.py)이라 결과가 엔진과 센트 단위까지 같다.
+'''
+
+T_TABLE_SIZE = 256 # 룩업 테이블 길이 (이 이상의 T는 마지막 값 사용)
+
+# strategies.InfiniteBuy 와 같은 규칙
+INFINITE_BUY = {
+    'name': 'infinite_buy',
+    'buy': 1,
+    'sell': '1 + 2*fee',
+    'max_hold': 39,
+    'welfare': True,
+    'cap_lots': True,
+    'funds_check': False,
+}
+
+# strategies.PreventDrownDown (침몰방지법 V2) 와 같은 규칙
+PREVENT_DROWN_DOWN = {
+    'name': 'prevent_drown_down',
+    'buy': '1.06 - 0.01*min(T, 6)',
+    'sell': '1.125 - 0.02*min(T, 6)',
+    'max_hold': '30 - 3*min(T, 6)',
+    'welfare': True,
+    'cap_lots': False,
+    'funds_check': True,
+}
+
+RULES = {
+    INFINITE_BUY['name']: INFINITE_BUY,
+    PREVENT_DROWN_DOWN['name']: PREVENT_DROWN_DOWN,
+}
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load, ast.Call,
+                  ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub, ast.UAdd)
+_ALLOWED_NAMES = {'T', 'fee', 'min', 'max'}
+
+
+def _compile_expr(expr):
+    """식 문자열 검증 후 컴파일 (T, fee, min, max, 사칙연산만 허용)"""
+    tree = ast.parse(str(expr), mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported rule expression: {expr}")
+        if isinstance(node, ast.Name) and node.id not in _ALLOWED_NAMES:
+            raise ValueError(f"Unknown name in rule expression: {node.id}")
+    return compile(tree, '<rule>', 'eval')
+
+
+def rule_table(value, fee, size=T_TABLE_SIZE):
+    """규칙 값 -> T별 룩업 테이블 (T = 0 .. size-1)
+
+    Args:
+        fee: 수수료 (비율, 0.25% = 0.0025)
+    """
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return np.array([float(value[min(t, len(value) - 1)]) for t in range(size)])
+    if isinstance(value, (int, float)):
+        return np.full(size, float(value))
+    code = _compile_expr(value)
+    # 엔진과 같은 배수가 나오도록 T별로 파이썬 연산
+    return np.array([float(eval(code, {'__builtins__': {}}, {'T': t, 'fee': fee, 'min': min, 'max': max}))
+                     for t in range(size)])
+
+
+def _ppm_table(table):
+    """배수 테이블 -> ppm 정수 (money.rate_ppm 과 같은 반올림)"""
+    return np.rint(table * PPM).astype(np.int64)
+
+
+def compile_variants(variants):
+    """(규칙, 파라미터) 목록 -> 변형 x T 룩업 테이블과 변형별 파라미터 배열
+
+    금액은 센트, 수수료와 매수/매도/손절 기준은 ppm 정수.
+
+    Args:
+        variants: [(spec, {'initial_funds', 'buy_portion', 'fee'(%)})]
+    """
+    count = len(variants)
+    compiled = {
+        'names': [],
+        'buy': np.empty((count, T_TABLE_SIZE), dtype=np.int64),
+        'sell': np.empty((count, T_TABLE_SIZE), dtype=np.int64),
+        'max_hold': np.empty((count, T_TABLE_SIZE)),
+        'stop_loss': np.zeros((count, T_TABLE_SIZE), dtype=np.int64),
+        'initial_funds': np.empty(count, dtype=np.int64),
+        'buy_portion': np.empty(count, dtype=np.int64),
+        'fee': np.empty(count, dtype=np.int64),
+        'welfare': np.empty(count, dtype=bool),
+        'cap_lots': np.empty(count, dtype=bool),
+        'funds_check': np.empty(count, dtype=bool),
+    }
+    for i, (spec, params) in enumerate(variants):
+        missing = {'buy', 'sell', 'max_hold'} - set(spec)
+        if missing:
+            raise ValueError(f"Rule spec missing {sorted(missing)}: {spec.get('name')}")
+        fee = fee_ppm(params['fee'])
+        compiled['names'].append(spec.get('name', f'rule_{i}'))
+        compiled['buy'][i] = _ppm_table(rule_table(spec['buy'], fee / PPM))
+        compiled['sell'][i] = _ppm_table(rule_table(spec['sell'], fee / PPM))
+        compiled['max_hold'][i] = rule_table(spec['max_hold'], fee / PPM)
+        if spec.get('stop_loss') is not None:
+            compiled['stop_loss'][i] = _ppm_table(rule_table(spec['stop_loss'], fee / PPM))
+        compiled['initial_funds'][i] = to_cents(params['initial_funds'])
+        compiled['buy_portion'][i] = params['buy_portion']
+        compiled['fee'][i] = fee
+        compiled['welfare'][i] = spec.get('welfare', True)
+        compiled['cap_lots'][i] = spec.get('cap_lots', True)
+        compiled['funds_check'][i] = spec.get('funds_check', False)
+    return compiled
+
+
+def _grow(lots, slots):
+    """회차 슬롯이 모자라면 두 배로 확장"""
+    return {key: np.concatenate([value, np.zeros((value.shape[0], slots), dtype=value.dtype)], axis=1)
+            for key, value in lots.items()}
+
+
+def _fee_cents(amount, fee):
+    """체결금액 배열 수수료 (money.fee_cents 와 같은 0.5센트 올림)"""
+    return (amount * fee + PPM // 2) // PPM
+
+
+def run_batch(variants, closes, prev_closes, record_equity=False, initial_slots=16):
+    """여러 규칙 변형을 같은 종가 데이터로 한 번에 백테스트
+
+    회차는 (변형 x 슬롯) 배열로 관리하고 하루씩 전 변형을 벡터 연산으로 진행한다.
+    체결 순서/조건과 센트 금액 연산(수수료는 회차별 체결 건마다)은 strategies.py 엔진과 같다.
+
+    Args:
+        variants: [(spec, params)] - params: initial_funds, buy_portion, fee(%)
+        closes, prev_closes: 거래일별 종가 / 전날 종가 (iter_days 기준, 달러)
+        record_equity: True면 일별 총 평가액 (거래일 x 변형) 포함
+
+    Returns:
+        dict of arrays (변형별, 금액은 달러) - final_value, return_rate, mdd, trades, wins, total_fee, funds,
+        holdings, T, exposure_days(보유 주식이 있던 거래일 수), traded(매수+매도 체결금액 합)
+    """
+    rules = compile_variants(variants)
+    count = len(variants)
+    rows = np.arange(count)
+    # money.to_cents 와 같은 반올림
+    closes = np.floor(np.asarray(closes, dtype=np.float64) * 100 + 0.5 + 1e-9).astype(np.int64)
+    prev_closes = np.floor(np.asarray(prev_closes, dtype=np.float64) * 100 + 0.5 + 1e-9).astype(np.int64)
+
+    fee = rules['fee']
+    portion = rules['buy_portion']
+    one_buy_amount = rules['initial_funds'] // portion # 회차별 매수금액
+
+    funds = rules['initial_funds'].copy()
+    holdings = np.zeros(count, dtype=np.int64)
+    total_fee = np.zeros(count, dtype=np.int64)
+    trades = np.zeros(count, dtype=np.int64)
+    wins = np.zeros(count, dtype=np.int64)
+    exposure_days = np.zeros(count, dtype=np.int64)
+    traded = np.zeros(count, dtype=np.int64)
+    peak = np.full(count, -1, dtype=np.int64) # -1: 아직 없음
+    mdd = np.zeros(count)
+    lots = {
+        'active': np.zeros((count, initial_slots), dtype=bool),
+        'price': np.zeros((count, initial_slots), dtype=np.int64),
+        'qty': np.zeros((count, initial_slots), dtype=np.int64),
+        'days': np.zeros((count, initial_slots), dtype=np.int64),
+    }
+    equity_curve = np.empty((len(closes), count), dtype=np.int64) if record_equity else None
+
+    for day, (price, prev_price) in enumerate(zip(closes.tolist(), prev_closes.tolist())):
+        T = lots['active'].sum(axis=1) # 매매체결전 기준 T값
+        t_idx = np.minimum(T, T_TABLE_SIZE - 1)
+        funds_start = funds
+
+        # 매도 로직 - 보유 주식이 있는 변형만 (엔진과 동일), 기준 비교는 x PPM 정수
+        holding = (holdings > 0)[:, None] & lots['active']
+        lots['days'] += holding
+        sell_price = lots['price'] * rules['sell'][rows, t_idx][:, None]
+        profit = holding & (price * PPM >= sell_price)
+        stop = holding & ~profit & ((lots['days'] >= rules['max_hold'][rows, t_idx][:, None])
+                                    | (price * PPM <= lots['price'] * rules['stop_loss'][rows, t_idx][:, None]))
+        sold = profit | stop
+        amount = np.where(sold, lots['qty'] * price, 0)
+        sell_fee = _fee_cents(amount, fee[:, None]).sum(axis=1)
+        amount = amount.sum(axis=1)
+        funds = funds + amount - sell_fee
+        total_fee += sell_fee
+        traded += amount
+        holdings -= np.where(sold, lots['qty'], 0).sum(axis=1)
+        trades += sold.sum(axis=1)
+        wins += (sold & (price > lots['price'])).sum(axis=1)
+        lots['active'] &= ~sold
+
+        # 매수 로직
+        buy_order_price = prev_price * rules['buy'][rows, t_idx] # x PPM
+        has_room = portion > T
+        budget = np.where(rules['welfare'],
+                          np.where(has_room, funds_start // np.where(has_room, portion - T, 1),
+                                   np.where(rules['cap_lots'], 0, funds_start)),
+                          one_buy_amount)
+        qty = np.where(buy_order_price > 0, budget * PPM // np.maximum(buy_order_price, 1), 0)
+        cost = qty * price
+        buy_fee = _fee_cents(cost, fee)
+        buy = ((price * PPM <= buy_order_price) & (has_room | ~rules['cap_lots'])
+               & (~rules['funds_check'] | (funds >= cost + buy_fee)))
+        if buy.any():
+            free = ~lots['active']
+            if not free[buy].any(axis=1).all():
+                lots = _grow(lots, lots['active'].shape[1])
+                free = ~lots['active']
+            slot = free.argmax(axis=1)
+            buyers = rows[buy]
+            lots['active'][buyers, slot[buy]] = True
+            lots['price'][buyers, slot[buy]] = price
+            lots['qty'][buyers, slot[buy]] = qty[buy]
+            lots['days'][buyers, slot[buy]] = 0
+            holdings = holdings + np.where(buy, qty, 0)
+            funds = funds - np.where(buy, cost + buy_fee, 0)
+            total_fee += np.where(buy, buy_fee, 0)
+            traded += np.where(buy, cost, 0)
+
+        # running MDD
+        exposure_days += holdings > 0
+        equity = funds + price * holdings
+        peak = np.where((peak < 0) | (equity > peak), equity, peak)
+        mdd = np.minimum(mdd, (equity - peak) / peak * 100)
+        if record_equity:
+            equity_curve[day] = equity
+
+    last_close = closes[-1] if len(closes) else 0
+    final_value = funds + holdings * last_close
+    result = {
+        'names': rules['names'],
+        'final_value': final_value / 100,
+        'return_rate': (final_value / rules['initial_funds'] - 1) * 100,
+        'mdd': mdd,
+        'trades': trades,
+        'wins': wins,
+        'total_fee': total_fee / 100,
+        'funds': funds / 100,
+        'holdings': holdings,
+        'T': lots['active'].sum(axis=1),
+        'exposure_days': exposure_days,
+        'traded': traded / 100,
+        'initial_funds': rules['initial_funds'] / 100,
+    }
+    if record_equity:
+        result['equity'] = equity_curve / 100
+    return result
+
+
+def load_closes(symbol, start_date, end_date, db_path=DB_PATH):
+    """시작일 이후 거래일별 (종가, 전날 종가) 배열 - 시작일 전 30일은 전날 종가 확보용"""
+    warmup_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+    days = [(close, prev) for _, _, _, close, _, prev in
+            iter_days(iter_prices(symbol, warmup_start, end_date, db_path), start_date)]
+    closes = np.array([close for close, _ in days], dtype=np.float64)
+    prev_closes = np.array([prev for _, prev in days], dtype=np.float64)
+    return closes, prev_closes
+
+
+def summaries(result):
+    """run_batch 결과 -> 변형별 요약 dict (strategies.Strategy.summary 와 같은 키)"""
+    return [{
+        'strategy': name,
+        'return_rate': round_half_up_to_two(float(result['return_rate'][i])),
+        'final_value': float(result['final_value'][i]),
+        'funds': float(result['funds'][i]),
+        'holdings': int(result['holdings'][i]),
+        'mdd': float(result['mdd'][i]),
+        'trades': int(result['trades'][i]),
+        'wins': int(result['wins'][i]),
+        'total_fee': float(result['total_fee'][i]),
+    } for i, name in enumerate(result['names'])]
+
+
+if __name__ == "__main__":
+    # python strategy_rules.py 시작일 종료일 [규칙파일.yaml]  - config 종목/자금으로 기본 규칙 + 파일 규칙 비교
+    #   규칙파일: 규칙 spec 목록 (YAML 리스트)
+    trading = load_config()['trading']
+    start_date, end_date = sys.argv[1], sys.argv[2]
+    specs = list(RULES.values())
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], 'r', encoding='utf-8') as f:
+            specs += yaml.safe_load(f)
+
+    params = {'initial_funds': trading['initial_funds'], 'buy_portion': trading['buy_portion'],
+              'fee': trading['fee_rate']}
+    closes, prev_closes = load_closes(trading['symbol'], start_date, end_date)
+    result = run_batch([(spec, params) for spec in specs], closes, prev_closes)
+
+    print(f"{trading['symbol']} {start_date} ~ {end_date} ({len(closes)}일)")
+    print(f"{'규칙':<24}{'최종 보유 금액':>16}{'원금 변화율':>12}{'MDD':>10}{'매매':>8}{'승률':>10}")
+    for summary in summaries(result):
+        win_rate = summary['wins'] / summary['trades'] * 100 if summary['trades'] else 0.0
+        print(f"{summary['strategy']:<24}{summary['final_value']:>16,.2f}{summary['return_rate']:>11}%"
+              f"{summary['mdd']:>9.2f}%{summary['trades']:>8}{win_rate:>9.2f}%")
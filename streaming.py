@@ -0,0 +1,173 @@
+# streaming.py
+import sqlite3
+import sys
+from datetime import datetime
+from init_db import DB_PATH
+from strategies import InfiniteBuy, PreventDrownDown
+from utils import round_half_up_to_two, pointTopercent
+
+'''
+고정 메모리 스트리밍 백테스트
+
+가격은 DB 커서(또는 임의의 generator)에서 한 행씩 읽고, 일별 현황/청산 거래는 누적하지 않고 sink로 바로 보낸다.
+메모리에 남는 것은 보유 회차(buy_records)와 running 통계뿐이므로 기간/종목 수와 무관하게 일정하다.
+
+sink 프로토콜 (result_writer.ResultWriter 와 동일):
+    write_daily(row)    - 일별 현황 dict (df_res 컬럼명)
+    write_trade(trade)  - 청산 거래 dict (trade_history 형식)
+
+전략 로직은 strategies.py의 전략 객체에 있고, run_strategies가 데이터를 한 번 순회하며 여러 전략을 함께 진행한다.
+'''
+
+
+def to_price_row(row):
+    """prices 행 (date, open, high, low, close) -> (날짜, 시가, 고가, 저가, 종가), 0.01$ 단위"""
+    date, open_price, high, low, close = row
+    return (datetime.strptime(date[:10], '%Y-%m-%d').date(), round_half_up_to_two(open_price),
+            round_half_up_to_two(high), round_half_up_to_two(low), round_half_up_to_two(close))
+
+
+def iter_prices(symbol, start, end, db_path=DB_PATH, arraysize=1000):
+    """prices 테이블을 커서로 순회 - (날짜, 시가, 고가, 저가, 종가), 0.01$ 단위 (get_data와 동일)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute('''
+            SELECT date, open, high, low, close
+            FROM prices
+            WHERE symbol = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        ''', (symbol, str(start), str(end)))
+        cursor.arraysize = arraysize
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                yield to_price_row(row)
+    finally:
+        conn.close()
+
+
+def iter_frame(df, start_idx=0, end_idx=None):
+    """get_data DataFrame 행 순회 - (날짜, 시가, 고가, 저가, 종가), start_idx 전날 행부터 (전날 종가용)"""
+    first = max(start_idx - 1, 0)
+    last = len(df) if end_idx is None else end_idx + 1
+    frame = df.iloc[first:last]
+    return zip(frame.index, frame['Open'].tolist(), frame['High'].tolist(), frame['Low'].tolist(),
+               frame['Close'].tolist())
+
+
+def iter_days(rows, start_date=None):
+    """(날짜, 시가, 고가, 종가, 등락율, 전날 종가) - start_date 이전 행은 전날 종가 확보용으로만 사용"""
+    prev_close = None
+    for date, open_price, high, low, close in rows:
+        if start_date is None or str(date) >= str(start_date):
+            if prev_close is None:
+                return_val = float('nan')
+            else:
+                return_val = round_half_up_to_two(pointTopercent(close / prev_close - 1))
+            yield date, open_price, high, close, return_val, close if prev_close is None else prev_close
+        prev_close = close
+
+
+class SummarySink:
+    """누적 없이 건수와 마지막 행만 보관하는 sink"""
+
+    def __init__(self):
+        self.days = 0
+        self.trades = 0
+        self.last_row = None
+
+    def write_daily(self, row):
+        self.days += 1
+        self.last_row = row
+
+    def write_trade(self, trade):
+        self.trades += 1
+
+
+class ListSink:
+    """일별 현황/청산 거래를 리스트로 모으는 sink (DataFrame 결과용)"""
+
+    def __init__(self):
+        self.daily = []
+        self.trades = []
+
+    def write_daily(self, row):
+        self.daily.append(row)
+
+    def write_trade(self, trade):
+        self.trades.append(trade)
+
+
+class TeeSink:
+    """여러 sink로 동시에 기록"""
+
+    def __init__(self, *sinks):
+        self.sinks = [sink for sink in sinks if sink is not None]
+
+    def write_daily(self, row):
+        for sink in self.sinks:
+            sink.write_daily(row)
+
+    def write_trade(self, trade):
+        for sink in self.sinks:
+            sink.write_trade(trade)
+
+
+def run_strategies(rows, strategies, start_date=None):
+    """가격 데이터를 한 번만 순회하며 여러 전략을 함께 진행
+
+    Returns:
+        전략별 요약 [summary dict]
+    """
+    for day in iter_days(rows, start_date):
+        for strategy in strategies:
+            strategy.on_day(*day)
+    return [strategy.summary() for strategy in strategies]
+
+
+# 떨사오팔 (backtest_all.infinite_buy_simulation 과 동일한 결과)
+def stream_infinite_buy(rows, sink, initial_funds, buy_portion, fee, welfare, start_date=None):
+    return run_strategies(rows, [InfiniteBuy(sink, initial_funds, buy_portion, fee, welfare)], start_date)[0]
+
+
+# 침몰방지법 (침몰방지법.prevent_drown_down_simulation 과 동일한 결과)
+def stream_prevent_drown_down(rows, sink, initial_funds, buy_portion, fee, welfare, start_date=None):
+    return run_strategies(rows, [PreventDrownDown(sink, initial_funds, buy_portion, fee, welfare)], start_date)[0]
+
+
+ENGINES = {
+    'infinite_buy': stream_infinite_buy,
+    'prevent_drown_down': stream_prevent_drown_down,
+}
+
+
+if __name__ == "__main__":
+    # python streaming.py [infinite_buy|prevent_drown_down] 종목 시작일 종료일 [결과디렉토리]
+    #   결과디렉토리를 주면 Parquet(result_writer)으로 기록, 없으면 요약만 출력
+    from datetime import timedelta
+    from utils import load_config, data_version
+
+    engine, symbol, start_date, end_date = sys.argv[1:5]
+    result_dir = sys.argv[5] if len(sys.argv) > 5 else None
+    trading = load_config()['trading']
+    warmup_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+    params = {'strategy': engine, 'symbol': symbol, 'start_date': start_date, 'end_date': end_date,
+              'initial_funds': trading['initial_funds'], 'buy_portion': trading['buy_portion'],
+              'fee': trading['fee_rate'], 'welfare': trading.get('welfare', True)}
+
+    if result_dir:
+        from result_writer import ResultWriter
+        sink = ResultWriter(result_dir, params=params, data_version=data_version(symbol, warmup_start, end_date))
+    else:
+        sink = SummarySink()
+    try:
+        summary = ENGINES[engine](iter_prices(symbol, warmup_start, end_date), sink, params['initial_funds'],
+                                  params['buy_portion'], params['fee'], params['welfare'], start_date=start_date)
+    finally:
+        if result_dir:
+            sink.close()
+
+    print(f"{engine} {symbol} {start_date} ~ {end_date}: {summary['days']}일, 매매 {summary['trades']}회")
+    print(f"최종 보유 금액: ${summary['final_value']:,.2f} / 원금 변화율: {summary['return_rate']}% / MDD: {summary['mdd']:.2f}%")
@@ -0,0 +1,297 @@
+# sweep_queue.py
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import pandas as pd
+import yaml
+from analytics import batch_metrics
+from init_db import DB_PATH
+from strategy_rules import RULES, load_closes, run_batch
+from utils import load_config
+
+'''
+SQLite 작업 큐 기반 분산 스윕
+
+스윕(시작일 x 분할 수 x 규칙 변형)을 청크 단위 작업으로 큐에 넣으면, 같은 파일시스템을 공유하는
+여러 호스트의 작업자 프로세스가 리스(lease)를 잡고 청크를 가져가 strategy_rules.run_batch로 계산한다.
+
+- 리스: 작업을 잡은 작업자만 lease_until 까지 처리 권한을 가지며, 처리 중에는 heartbeat로 연장
+- 재시도: 리스가 만료된 작업(작업자 종료/네트워크 단절)은 다른 작업자가 다시 가져감 (최대 max_attempts)
+- 결과 기록은 멱등: (sweep_id, job_id)당 최초 완료 결과만 저장되고 늦게 끝난 중복 실행은 무시
+'''
+
+QUEUE_PATH = 'data/sweep_queue.db'
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 3
+
+
+def connect(queue_path=QUEUE_PATH):
+    """큐 DB 연결 + 스키마 (네트워크 파일시스템 공유를 위해 WAL 대신 기본 저널 모드)"""
+    os.makedirs(os.path.dirname(queue_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(queue_path, timeout=30, isolation_level=None)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sweeps (
+            sweep_id TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            params TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sweep_jobs (
+            sweep_id TEXT NOT NULL,
+            job_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            lease_token TEXT,
+            lease_until REAL,
+            result TEXT,
+            error TEXT,
+            finished_at TEXT,
+            PRIMARY KEY (sweep_id, job_id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sweep_jobs_status ON sweep_jobs(status, lease_until)')
+    return conn
+
+
+def make_jobs(symbol, start_dates, end_date, buy_portions, specs, initial_funds, fee, chunk_size=50,
+              db_path=DB_PATH):
+    """스윕 -> 청크 작업 목록 [(job_id, payload)] - 같은 시작일 변형끼리 묶어 가격 로드를 공유"""
+    jobs = []
+    for start_date in start_dates:
+        variants = [(spec, {'initial_funds': initial_funds, 'buy_portion': buy_portion, 'fee': fee})
+                    for buy_portion in buy_portions for spec in specs]
+        for chunk, i in enumerate(range(0, len(variants), chunk_size)):
+            jobs.append((f"{start_date}_{chunk:04d}", {
+                'symbol': symbol, 'start_date': start_date, 'end_date': end_date, 'db_path': db_path,
+                'variants': variants[i:i + chunk_size],
+            }))
+    return jobs
+
+
+def submit(conn, sweep_id, params, jobs):
+    """스윕 등록 (같은 sweep_id/job_id는 무시되므로 재실행해도 안전)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('INSERT OR IGNORE INTO sweeps (sweep_id, created_at, params) VALUES (?, ?, ?)',
+                     (sweep_id, datetime.now().isoformat(timespec='seconds'), json.dumps(params, default=str)))
+        conn.executemany('INSERT OR IGNORE INTO sweep_jobs (sweep_id, job_id, payload) VALUES (?, ?, ?)',
+                         [(sweep_id, job_id, json.dumps(payload)) for job_id, payload in jobs])
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def claim(conn, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """대기 중이거나 리스가 만료된 작업 1건 확보
+
+    Returns:
+        (sweep_id, job_id, lease_token, payload) 또는 None
+    """
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('''
+            SELECT sweep_id, job_id, payload FROM sweep_jobs
+            WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?)) AND attempts < ?
+            ORDER BY sweep_id, job_id LIMIT 1
+        ''', (now, max_attempts)).fetchone()
+        if row is None:
+            # 재시도 횟수를 넘긴 만료 작업은 실패 처리
+            conn.execute('''
+                UPDATE sweep_jobs SET status = 'failed', error = COALESCE(error, 'lease expired')
+                WHERE status = 'leased' AND lease_until < ? AND attempts >= ?
+            ''', (now, max_attempts))
+            conn.execute('COMMIT')
+            return None
+        token = uuid.uuid4().hex
+        conn.execute('''
+            UPDATE sweep_jobs SET status = 'leased', attempts = attempts + 1, worker = ?, lease_token = ?,
+                lease_until = ?
+            WHERE sweep_id = ? AND job_id = ?
+        ''', (worker, token, now + lease_seconds, row[0], row[1]))
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return row[0], row[1], token, json.loads(row[2])
+
+
+def heartbeat(conn, sweep_id, job_id, token, lease_seconds=LEASE_SECONDS):
+    """리스 연장 - 리스를 잃었으면(다른 작업자가 가져감) False"""
+    cursor = conn.execute('''
+        UPDATE sweep_jobs SET lease_until = ?
+        WHERE sweep_id = ? AND job_id = ? AND lease_token = ? AND status = 'leased'
+    ''', (time.time() + lease_seconds, sweep_id, job_id, token))
+    return cursor.rowcount == 1
+
+
+def complete(conn, sweep_id, job_id, result):
+    """결과 기록 (멱등) - 이미 완료된 작업이면 무시하고 False"""
+    cursor = conn.execute('''
+        UPDATE sweep_jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, finished_at = ?
+        WHERE sweep_id = ? AND job_id = ? AND status != 'done'
+    ''', (json.dumps(result), datetime.now().isoformat(timespec='seconds'), sweep_id, job_id))
+    return cursor.rowcount == 1
+
+
+def fail(conn, sweep_id, job_id, token, error, max_attempts=MAX_ATTEMPTS):
+    """작업 실패 - 재시도 횟수가 남았으면 대기 상태로 되돌림"""
+    conn.execute('''
+        UPDATE sweep_jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END,
+            error = ?, lease_until = NULL
+        WHERE sweep_id = ? AND job_id = ? AND lease_token = ? AND status = 'leased'
+    ''', (max_attempts, str(error)[:1000], sweep_id, job_id, token))
+
+
+def run_job(payload, price_cache):
+    """청크 계산 - 변형별 지표 행 목록"""
+    key = (payload['symbol'], payload['start_date'], payload['end_date'], payload['db_path'])
+    if key not in price_cache:
+        price_cache[key] = load_closes(*key)
+    closes, prev_closes = price_cache[key]
+    variants = [(spec, params) for spec, params in payload['variants']]
+    metrics = batch_metrics(run_batch(variants, closes, prev_closes, record_equity=True))
+    rows = []
+    for (spec, params), (_, row) in zip(variants, metrics.iterrows()):
+        rows.append(dict(row.to_dict(), rule=spec.get('name'), symbol=payload['symbol'],
+                         start_date=payload['start_date'], end_date=payload['end_date'],
+                         buy_portion=params['buy_portion']))
+    return rows
+
+
+def work(queue_path=QUEUE_PATH, worker=None, lease_seconds=LEASE_SECONDS, wait=False, poll_seconds=5):
+    """작업자 루프 - 작업이 없으면 종료 (wait=True면 대기)
+
+    Returns:
+        완료한 작업 수
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect(queue_path)
+    price_cache = {}
+    done = 0
+    try:
+        while True:
+            job = claim(conn, worker, lease_seconds)
+            if job is None:
+                if not wait:
+                    return done
+                time.sleep(poll_seconds)
+                continue
+            sweep_id, job_id, token, payload = job
+
+            # 처리 중 리스 연장 (별도 연결)
+            stop = threading.Event()
+            lost = threading.Event()
+
+            def beat():
+                beat_conn = connect(queue_path)
+                try:
+                    while not stop.wait(lease_seconds / 3):
+                        if not heartbeat(beat_conn, sweep_id, job_id, token, lease_seconds):
+                            lost.set()
+                            return
+                finally:
+                    beat_conn.close()
+
+            thread = threading.Thread(target=beat, daemon=True)
+            thread.start()
+            try:
+                result = run_job(payload, price_cache)
+            except Exception as e:
+                logging.exception(f"Sweep job failed: {sweep_id}/{job_id}")
+                stop.set()
+                thread.join()
+                fail(conn, sweep_id, job_id, token, e)
+                continue
+            stop.set()
+            thread.join()
+            if lost.is_set():
+                logging.warning(f"Lease lost for {sweep_id}/{job_id} - result kept only if first")
+            if complete(conn, sweep_id, job_id, result):
+                done += 1
+    finally:
+        conn.close()
+
+
+def status(conn, sweep_id=None):
+    """작업 상태별 건수"""
+    return dict(conn.execute('''
+        SELECT status, COUNT(*) FROM sweep_jobs WHERE COALESCE(?, sweep_id) = sweep_id GROUP BY status
+    ''', (sweep_id,)).fetchall())
+
+
+def results(conn, sweep_id):
+    """완료된 작업 결과 (변형별 1행 DataFrame)"""
+    rows = []
+    for (result,) in conn.execute("SELECT result FROM sweep_jobs WHERE sweep_id = ? AND status = 'done'",
+                                  (sweep_id,)):
+        rows.extend(json.loads(result))
+    return pd.DataFrame(rows)
+
+
+def _work_process(args):
+    return work(*args)
+
+
+if __name__ == "__main__":
+    # python sweep_queue.py submit 스윕ID 시작일,시작일,... 종료일 분할수,분할수,... [규칙파일.yaml] [청크 크기]
+    # python sweep_queue.py worker [프로세스 수] [wait]   - 공유 파일시스템의 어느 호스트에서나 실행
+    # python sweep_queue.py status [스윕ID]
+    # python sweep_queue.py results 스윕ID [정렬 지표] [상위 N]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1]
+    queue_path = os.environ.get('SWEEP_QUEUE', QUEUE_PATH)
+
+    if command == 'submit':
+        trading = load_config()['trading']
+        sweep_id, start_dates, end_date, portions = sys.argv[2:6]
+        specs = list(RULES.values())
+        if len(sys.argv) > 6:
+            with open(sys.argv[6], 'r', encoding='utf-8') as f:
+                specs += yaml.safe_load(f)
+        chunk_size = int(sys.argv[7]) if len(sys.argv) > 7 else 50
+        start_dates = start_dates.split(',')
+        portions = [int(p) for p in portions.split(',')]
+        jobs = make_jobs(trading['symbol'], start_dates, end_date, portions, specs, trading['initial_funds'],
+                         trading['fee_rate'], chunk_size)
+        conn = connect(queue_path)
+        submit(conn, sweep_id, {'symbol': trading['symbol'], 'start_dates': start_dates, 'end_date': end_date,
+                                'buy_portions': portions, 'rules': len(specs)}, jobs)
+        print(f"Submitted {sweep_id}: {len(jobs)} jobs ({len(start_dates) * len(portions) * len(specs)} runs)")
+        conn.close()
+
+    elif command == 'worker':
+        processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+        wait = len(sys.argv) > 3 and sys.argv[3] == 'wait'
+        started = time.time()
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            done = sum(executor.map(_work_process, [(queue_path, None, LEASE_SECONDS, wait)] * processes))
+        print(f"{done} jobs done by {processes} workers in {time.time() - started:.1f}s")
+
+    elif command == 'status':
+        conn = connect(queue_path)
+        print(status(conn, sys.argv[2] if len(sys.argv) > 2 else None))
+        conn.close()
+
+    elif command == 'results':
+        sweep_id = sys.argv[2]
+        sort_by = sys.argv[3] if len(sys.argv) > 3 else 'calmar'
+        top = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+        conn = connect(queue_path)
+        df = results(conn, sweep_id)
+        conn.close()
+        pd.set_option('display.width', 200)
+        pd.set_option('display.max_columns', None)
+        print(df.sort_values(sort_by, ascending=False).head(top).round(2) if len(df) else "No results yet")
@@ -0,0 +1,108 @@
+# symbol_master.py
+import logging
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from init_db import DB_PATH, ensure_schema
+
+'''
+종목 마스터 (symbols 테이블) - 티커 -> 거래소 코드
+
+한투 API는 용도별로 다른 거래소 코드를 쓴다.
+    주문/잔고 (OVRS_EXCG_CD) : NASD / NYSE / AMEX   <- symbols.exchange 에 저장
+    시세 (EXCD)              : NAS  / NYS  / AMS
+    상품기본정보 (PRDT_TYPE_CD): 512  / 513  / 529
+
+마스터에 없는 종목은 상품기본정보(CTPF1702R)를 거래소별로 조회해 처음 찾은 거래소로 등록한다.
+'''
+
+EXCHANGES = {
+    # 주문 거래소: (시세 EXCD, 상품유형코드)
+    'NASD': ('NAS', '512'),
+    'NYSE': ('NYS', '513'),
+    'AMEX': ('AMS', '529'),
+}
+DEFAULT_EXCHANGE = 'AMEX'  # 마스터 도입 전 하드코딩 값 (SOXL)
+
+
+def quote_code(exchange):
+    """주문 거래소 코드 -> 시세 조회 EXCD"""
+    return EXCHANGES[exchange][0]
+
+
+def load_master(symbols=None, db_path=DB_PATH):
+    """{종목: 거래소} (symbols 지정 시 해당 종목만)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_schema(conn)
+        rows = conn.execute('SELECT symbol, exchange FROM symbols').fetchall()
+    finally:
+        conn.close()
+    master = dict(rows)
+    if symbols is not None:
+        master = {symbol: master[symbol] for symbol in symbols if symbol in master}
+    return master
+
+
+def save_master(entries, db_path=DB_PATH):
+    """[(종목, 거래소, 종목명)] 등록 (한 트랜잭션)"""
+    updated_at = datetime.now().isoformat(timespec='seconds')
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_schema(conn)
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO symbols (symbol, exchange, name, updated_at) VALUES (?, ?, ?, ?)
+            ''', [(symbol, exchange, name, updated_at) for symbol, exchange, name in entries])
+    finally:
+        conn.close()
+
+
+def search_exchange(kis, symbol):
+    """상품기본정보를 거래소별로 조회해 (거래소, 종목명) 반환 (없으면 None)"""
+    for exchange, (_, product_type) in EXCHANGES.items():
+        info = kis.search_info(symbol, product_type)
+        if info and info.get('prdt_eng_name'):
+            code = info.get('ovrs_excg_cd')
+            return (code if code in EXCHANGES else exchange), info.get('prdt_eng_name')
+    return None
+
+
+def resolve(kis, symbols, db_path=DB_PATH, workers=4, refresh=False):
+    """종목별 거래소 - 마스터에 없는 종목만 API로 조회 (동시 요청) 후 등록
+
+    Returns:
+        {종목: 거래소} (찾지 못한 종목은 제외)
+    """
+    master = {} if refresh else load_master(symbols, db_path)
+    missing = [symbol for symbol in symbols if symbol not in master]
+    if missing:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            found = list(pool.map(lambda symbol: search_exchange(kis, symbol), missing))
+        entries = [(symbol, result[0], result[1]) for symbol, result in zip(missing, found) if result]
+        save_master(entries, db_path)
+        master.update({symbol: exchange for symbol, exchange, _ in entries})
+        for symbol, result in zip(missing, found):
+            if result is None:
+                logging.warning(f"Exchange not found for {symbol}")
+    return master
+
+
+if __name__ == "__main__":
+    # python symbol_master.py                    - 등록된 종목 목록
+    # python symbol_master.py 종목1,종목2,... [refresh]  - 거래소 조회/등록 (refresh: 등록된 종목도 다시 조회)
+    if len(sys.argv) > 1:
+        from kis_api import KISApi
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        kis = KISApi()
+        symbols = [s.strip().upper() for s in sys.argv[1].split(',') if s.strip()]
+        resolve(kis, symbols, refresh=len(sys.argv) > 2 and sys.argv[2] == 'refresh')
+        kis.metrics.flush()
+
+    conn = sqlite3.connect(DB_PATH)
+    ensure_schema(conn)
+    for symbol, exchange, name, updated_at in conn.execute(
+            'SELECT symbol, exchange, name, updated_at FROM symbols ORDER BY symbol'):
+        print(f"{symbol:<8} {exchange:<5} {name or '':<50} {updated_at}")
+    conn.close()
@@ -0,0 +1,161 @@
+# synthetic_data.py
+import os
+import sqlite3
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from init_db import ensure_schema
+from market_calendar import load_calendar
+
+DEFAULT_DB_PATH = 'data/synthetic.db'  # trading.db를 덮어쓰지 않도록 별도 파일
+CHUNK_SYMBOLS = 50  # 한 번에 생성/적재하는 종목 수 (메모리 상한)
+
+# 변동성 국면 (기초지수 일간 변동성) 과 국면 전환 확률
+REGIME_VOL = np.array([0.008, 0.014, 0.030])  # 안정 / 보통 / 위기
+REGIME_TRANSITION = np.array([
+    [0.985, 0.014, 0.001],
+    [0.010, 0.980, 0.010],
+    [0.002, 0.038, 0.960],
+])
+
+
+def make_symbols(num_symbols):
+    return [f'S{s:04d}' for s in range(num_symbols)]
+
+
+def trading_dates(start, end):
+    """NYSE 거래일 - 저장된 거래일 비트맵(market_calendar) 기준, 비트맵 기간 밖만 pandas_market_calendars로 계산"""
+    start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+    calendar = load_calendar()
+    dates = []
+    if start < calendar.start:
+        dates += _nyse_sessions(start, min(end, calendar.start - timedelta(days=1)))
+    if start <= calendar.end and end >= calendar.start:
+        dates += calendar.sessions(max(start, calendar.start), min(end, calendar.end))
+    if end > calendar.end:
+        dates += _nyse_sessions(max(start, calendar.end + timedelta(days=1)), end)
+    return pd.DatetimeIndex(dates)
+
+
+def _nyse_sessions(start, end):
+    if end < start:
+        return []
+    import pandas_market_calendars as mcal
+    return [session.date() for session in mcal.get_calendar('NYSE').schedule(start_date=start, end_date=end).index]
+
+
+def _regimes(rng, days, num_symbols):
+    """종목별 마르코프 국면 경로 (일 x 종목)"""
+    cum = np.cumsum(REGIME_TRANSITION, axis=1)
+    state = np.ones(num_symbols, dtype=np.int64)
+    u = rng.random((days, num_symbols))
+    out = np.empty((days, num_symbols), dtype=np.int64)
+    for t in range(days):
+        state = (u[t][:, None] > cum[state]).sum(axis=1)
+        out[t] = state
+    return out
+
+
+def generate_prices(num_symbols, start, end, seed=0, leverage=3.0):
+    """레버리지 ETF 형태의 합성 일봉 (일 x 종목 배열, 0.01$ 단위)
+
+    - 변동성 국면 전환 (안정/보통/위기)
+    - 시가 갭 (전날 종가 대비)
+    - 드물게 기초지수 -7% 수준의 급락일 (레버리지 배수만큼 확대)
+    - 로그 가격은 시작가 쪽으로 약하게 회귀 (장기간 생성 시 0 또는 발산 방지)
+
+    Returns:
+        (날짜 DatetimeIndex, open, high, low, close, volume)
+    """
+    dates = trading_dates(start, end)
+    days = len(dates)
+    rng = np.random.default_rng(seed)
+
+    vol = REGIME_VOL[_regimes(rng, days, num_symbols)] * leverage
+    start_price = rng.uniform(15, 80, num_symbols)
+
+    # 종가: 평균회귀 로그 랜덤워크 + 급락일
+    shocks = rng.standard_normal((days, num_symbols)) * vol
+    crash = rng.random((days, num_symbols)) < 0.002
+    shocks[crash] = np.log1p(-np.minimum(rng.uniform(0.05, 0.09, crash.sum()) * leverage, 0.9))
+    log_close = np.empty((days, num_symbols))
+    level = np.log(start_price)
+    anchor = level.copy()
+    for t in range(days):
+        level = level + shocks[t] - 0.003 * (level - anchor)
+        log_close[t] = level
+    close = np.exp(log_close)
+
+    # 시가: 전날 종가 대비 갭 (일부는 큰 갭)
+    prev_close = np.vstack([start_price, close[:-1]])
+    gap = rng.standard_normal((days, num_symbols)) * vol * 0.3
+    big_gap = rng.random((days, num_symbols)) < 0.01
+    gap[big_gap] *= 5
+    gap[crash] = shocks[crash] * rng.uniform(0.3, 1.0, crash.sum())  # 급락일은 대부분 갭으로 시작
+    open_ = prev_close * np.exp(gap)
+
+    # 고가/저가: 시가/종가 바깥으로 변동성 비례 범위
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal((days, num_symbols))) * vol * 0.5)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal((days, num_symbols))) * vol * 0.5)
+
+    # 호가 단위 0.01$ (반올림 후에도 저가 <= 시가/종가 <= 고가 유지)
+    open_, high, low, close = (np.maximum(np.round(x, 2), 0.01) for x in (open_, high, low, close))
+    high = np.maximum(high, np.maximum(open_, close))
+    low = np.minimum(low, np.minimum(open_, close))
+
+    # 거래량: 변동성이 클수록 증가
+    volume = (rng.lognormal(16, 0.4, (days, num_symbols)) * (vol / vol.mean())).astype(np.int64)
+    return dates, open_, high, low, close, volume
+
+
+def bulk_load(db_path, num_symbols, start, end, seed=0, leverage=3.0, chunk_symbols=CHUNK_SYMBOLS):
+    """합성 일봉을 prices 테이블에 적재 (종목 묶음 단위 생성, 단일 트랜잭션)
+
+    Returns:
+        적재한 행 수
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    # 적재 중에는 저널/동기화 생략, 보조 인덱스는 적재 후 재생성
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('DROP INDEX IF EXISTS idx_prices_date')
+
+    symbols = make_symbols(num_symbols)
+    total = 0
+    try:
+        conn.execute('BEGIN')
+        for c in range(0, num_symbols, chunk_symbols):
+            chunk = symbols[c:c + chunk_symbols]
+            dates, open_, high, low, close, volume = generate_prices(
+                len(chunk), start, end, seed=seed + c, leverage=leverage)
+            date_strs = dates.strftime('%Y-%m-%d').tolist()
+            for k, symbol in enumerate(chunk):
+                # 기본키 (symbol, date) 순서로 삽입
+                conn.executemany('INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                 zip([symbol] * len(date_strs), date_strs, open_[:, k].tolist(),
+                                     high[:, k].tolist(), low[:, k].tolist(), close[:, k].tolist(),
+                                     volume[:, k].tolist()))
+            total += len(chunk) * len(date_strs)
+        conn.execute('COMMIT')
+    finally:
+        ensure_schema(conn)
+        conn.close()
+    return total
+
+
+if __name__ == "__main__":
+    # python synthetic_data.py [종목 수] [연수] [DB 경로] [seed]  - 예: python synthetic_data.py 500 20
+    num_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    db_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_DB_PATH
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    end = pd.Timestamp('2025-12-31')
+    start = end - pd.DateOffset(years=years) + pd.Timedelta(days=1)
+    t0 = time.perf_counter()
+    rows = bulk_load(db_path, num_symbols, start, end, seed=seed)
+    print(f"{num_symbols} symbols x {years} years -> {rows:,} rows in {time.perf_counter() - t0:.1f}s ({db_path})")
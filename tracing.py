@@ -0,0 +1,143 @@
+# tracing.py
+import functools
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+MAX_BUFFERED_SPANS = 10000  # finish 전까지 보관하는 최대 span 수 (초과 시 오래된 것부터 버림 - 데몬 장기 실행 대비)
+
+
+class Tracer:
+    """실행 단계별 소요시간 기록 (span) - 실행 1회당 JSONL 파일 1개"""
+
+    def __init__(self, trace_dir=None):
+        """
+        Args:
+            trace_dir: span 파일 저장 디렉토리 (None이면 저장하지 않으므로 span을 보관하지 않음)
+        """
+        self.trace_dir = trace_dir
+        self.spans = deque(maxlen=MAX_BUFFERED_SPANS)
+        self.start_run('init')
+
+    def start_run(self, job):
+        """새 실행 시작 - 아직 저장되지 않은 span(초기화 단계 등)은 이 실행에 포함"""
+        self.job = job
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job}"
+        self._stack = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """이름 있는 구간 측정. 예외 발생 시 outcome='error'로 기록 후 재발생"""
+        record = {
+            'name': name,
+            'parent': self._stack[-1]['name'] if self._stack else None,
+            'start': datetime.now().isoformat(timespec='milliseconds'),
+            'outcome': 'ok',
+        }
+        record.update(attrs)
+        self._stack.append(record)
+        t0 = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['outcome'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['duration_ms'] = round((time.perf_counter() - t0) * 1000, 3)
+            self._stack.pop()
+            if self.trace_dir:
+                self.spans.append(record)
+
+    def finish(self):
+        """기록된 span을 파일로 저장하고 버퍼 비우기"""
+        spans, self.spans = self.spans, deque(maxlen=MAX_BUFFERED_SPANS)
+        if not self.trace_dir or not spans:
+            return None
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = f'{self.trace_dir}/{self.run_id}.jsonl'
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in spans:
+                record['run_id'] = self.run_id
+                record['job'] = self.job
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        return path
+
+
+def traced(name, fail_on_unsuccessful=False):
+    """메서드 전체를 self.tracer의 span으로 감싸는 데코레이터
+
+    fail_on_unsuccessful: 반환값이 {'success': False, ...} 이면 outcome='fail'
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name) as span:
+                result = func(self, *args, **kwargs)
+                if fail_on_unsuccessful and isinstance(result, dict) and result.get('success') is False:
+                    span['outcome'] = 'fail'
+                return result
+        return wrapper
+    return decorator
+
+
+def _percentile(sorted_values, q):
+    """선형 보간 백분위수"""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(pattern='logs/*/traces/*.jsonl'):
+    """전체 실행 기록의 단계별 횟수/실패/p50/p95/최대 소요시간(ms)"""
+    durations = {}
+    failures = {}
+    runs = set()
+    for path in glob.glob(pattern):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (record.get('job', ''), record['name'])
+                durations.setdefault(key, []).append(record['duration_ms'])
+                if record.get('outcome') != 'ok':
+                    failures[key] = failures.get(key, 0) + 1
+                runs.add(record.get('run_id'))
+
+    summary = []
+    for (job, name), values in sorted(durations.items()):
+        values.sort()
+        summary.append({
+            'job': job,
+            'name': name,
+            'count': len(values),
+            'failures': failures.get((job, name), 0),
+            'p50_ms': _percentile(values, 0.50),
+            'p95_ms': _percentile(values, 0.95),
+            'max_ms': values[-1],
+        })
+    return summary, len(runs)
+
+
+if __name__ == "__main__":
+    # python tracing.py [dry-run|live]  - 모드 생략 시 전체 모드 집계
+    mode = sys.argv[1] if len(sys.argv) > 1 else '*'
+    summary, num_runs = summarize(f'logs/{mode}/traces/*.jsonl')
+
+    print('=' * 80)
+    print(f"단계별 소요시간 요약 (실행 {num_runs}회)")
+    print('=' * 80)
+    print(f"{'job':<10}{'phase':<28}{'count':>7}{'fail':>6}{'p50(ms)':>11}{'p95(ms)':>11}{'max(ms)':>11}")
+    for row in summary:
+        print(f"{row['job']:<10}{row['name']:<28}{row['count']:>7}{row['failures']:>6}"
+              f"{row['p50_ms']:>11.1f}{row['p95_ms']:>11.1f}{row['max_ms']:>11.1f}")
@@ -1,6 +1,8 @@
+import hashlib
 import pandas as pd
 import sqlite3
 import yaml
+from init_db import DB_PATH
 
 def load_config():
     """설정 파일 로드"""
@@ -43,9 +45,25 @@ def calculate_mdd(equity_curve):
     return mdd
 
 
-def get_data(ticker, start, end):
+def data_version(ticker, start, end, db_path=DB_PATH):
+    """가격 데이터 버전 - 구간 내 일봉 내용의 해시 (종가 수정/추가 시 변경)"""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT date, open, high, low, close
+        FROM prices
+        WHERE symbol = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+    """, (ticker, start, end))
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(repr(row).encode())
+    conn.close()
+    return digest.hexdigest()[:16]
+
+
+def get_data(ticker, start, end, db_path=DB_PATH):
     """DB에서 yfinance 형식의 DataFrame 생성"""
-    conn = sqlite3.connect('data/trading.db')
+    conn = sqlite3.connect(db_path)
     
     query = """
         SELECT date, open, high, low, close 